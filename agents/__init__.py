@@ -2,7 +2,9 @@
 Agents Tennis AI
 """
 
+from .coach_synthesis import CoachSynthesis
+from .message_log import Message, MessageLog
 from .onboarding_agent import OnboardingAgent
 
-__all__ = ['OnboardingAgent']
+__all__ = ['OnboardingAgent', 'CoachSynthesis', 'Message', 'MessageLog']
 
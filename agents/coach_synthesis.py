@@ -0,0 +1,219 @@
+"""
+Synthèse multi-élèves pour les coachs Tennis AI
+Résumés par élève en parallèle (admission bornée, cache par version de données) puis un seul appel de fusion
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from api.bedrock_client import BedrockClient
+
+
+class CoachSynthesis:
+    """Moteur de synthèse d'un effectif (étapes `demo_multi_élèves` / `demo_synthèse`)"""
+
+    # Résumés en classe 'dashboard': le coach attend le tableau de bord, donc les résumés font
+    # la queue (attente bornée) au lieu d'être délestés comme le spéculatif, mais n'occupent
+    # jamais les slots ni le budget réservés aux tours interactifs. Le plafond est partagé par
+    # toutes les synthèses du processus: il garde les résumés en attente sous la taille de
+    # file de l'ordonnanceur Bedrock (64 par défaut, dont 12 slots non réservés en cours).
+    SUMMARY_PRIORITY = 'dashboard'
+    MAX_CONCURRENT_SUMMARIES = 32
+    _summary_slots = threading.BoundedSemaphore(MAX_CONCURRENT_SUMMARIES)
+
+    # Résumés conservés en mémoire / durée de vie dans le stockage partagé
+    MAX_ENTRIES = 2048
+    SHARED_TTL_S = 30 * 24 * 3600
+
+    STUDENT_PROMPTS = {
+        'fr': ("Tu es l'assistant d'un coach de tennis. Résume en 2 phrases maximum les données de cet élève: "
+               "niveau, erreur principale, progression récente. Pas de formule de politesse."),
+        'en': ("You assist a tennis coach. Summarize this student's data in at most 2 sentences: "
+               "level, main error, recent progress. No pleasantries.")
+    }
+
+    ROSTER_PROMPTS = {
+        'fr': ("Tu es l'assistant d'un coach de tennis. À partir des résumés d'élèves, rédige une synthèse "
+               "d'effectif: 3 tendances communes, les élèves à prioriser et une suggestion d'entraînement collectif. "
+               "RÈGLE D'OR: une seule erreur à la fois par élève."),
+        'en': ("You assist a tennis coach. From the student summaries, write a roster digest: 3 common trends, "
+               "the students to prioritize and one group drill suggestion. "
+               "GOLDEN RULE: one error at a time per student.")
+    }
+
+    def __init__(self, bedrock: Optional[BedrockClient] = None, language: str = 'fr',
+                 max_workers: Optional[int] = None, backend=None):
+        """
+        Initialiser le moteur
+
+        Args:
+            bedrock: Client Bedrock (ou stand-in local)
+            language: Langue des synthèses ('fr' ou 'en')
+            max_workers: Appels de résumé simultanés (défaut: un par élève à résumer, sous
+                MAX_CONCURRENT_SUMMARIES)
+            backend: SessionStore partagé entre réplicas pour le cache des résumés (optionnel)
+        """
+        self.bedrock = bedrock or BedrockClient()
+        self.language = language if language in self.STUDENT_PROMPTS else 'fr'
+        self.max_workers = max_workers or self.MAX_CONCURRENT_SUMMARIES
+        self.backend = backend
+        self._summaries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ==================== CACHE ====================
+
+    def _cache_key(self, student: Dict[str, Any]) -> tuple:
+        """Un résumé reste valable tant que la version des données de l'élève ne change pas"""
+        return (self.language, str(student["id"]), str(student["version"]))
+
+    @staticmethod
+    def _backend_key(key: tuple) -> str:
+        return "coach-summary:" + hashlib.sha256("\x1f".join(key).encode('utf-8')).hexdigest()
+
+    def _get_cached(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+                return summary
+        if self.backend is not None:
+            blob = self.backend.get_blob(self._backend_key(key))
+            if blob is not None:
+                summary = blob.decode('utf-8')
+                self._put_local(key, summary)
+        return summary
+
+    def _put(self, key: tuple, summary: str) -> None:
+        self._put_local(key, summary)
+        if self.backend is not None:
+            self.backend.put_blob(self._backend_key(key), summary.encode('utf-8'), ttl_s=self.SHARED_TTL_S)
+
+    def _put_local(self, key: tuple, summary: str) -> None:
+        with self._lock:
+            self._summaries[key] = summary
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > self.MAX_ENTRIES:
+                self._summaries.popitem(last=False)
+
+    # ==================== APPELS ====================
+
+    def summarize_student(self, student: Dict[str, Any]) -> str:
+        """
+        Résumer un élève (sans cache)
+
+        Args:
+            student: Données de l'élève (`id`, `version`, `name`, métriques, historique...)
+
+        Returns:
+            str: Résumé de l'élève
+        """
+        data = {k: v for k, v in student.items() if k != "version"}
+        # Température 0: deux coachs partageant un élève coalescent le même appel
+        with self._summary_slots:
+            return self.bedrock.chat(
+                messages=[{"role": "user", "content": json.dumps(data, ensure_ascii=False, sort_keys=True)}],
+                system_prompt=self.STUDENT_PROMPTS[self.language],
+                max_tokens=120,
+                temperature=0,
+                priority=self.SUMMARY_PRIORITY
+            )
+
+    def merge(self, summaries: Dict[str, str], session_id: Optional[str] = None) -> str:
+        """
+        Fusionner les résumés en une synthèse d'effectif (un seul appel)
+
+        Args:
+            summaries: Libellé de l'élève -> résumé
+            session_id: Session du coach (contrôle d'admission)
+
+        Returns:
+            str: Synthèse de l'effectif
+        """
+        lines = "\n".join(f"- {name}: {summary}" for name, summary in summaries.items())
+        return self.bedrock.chat(
+            messages=[{"role": "user", "content": lines}],
+            system_prompt=self.ROSTER_PROMPTS[self.language],
+            max_tokens=400,
+            temperature=0.3,
+            session_id=session_id
+        )
+
+    def synthesize(self, students: List[Dict[str, Any]], session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Synthétiser un effectif: résumés manquants en parallèle puis fusion
+
+        Un élève en échec est exclu de la fusion (et reporté dans `errors`) plutôt que
+        de bloquer tout le tableau de bord.
+
+        Args:
+            students: Élèves (`id`, `version` et `name` requis)
+            session_id: Session du coach (contrôle d'admission de l'appel de fusion)
+
+        Returns:
+            dict: digest, summaries (id -> résumé), errors (id -> erreur), cache_hits, timings_ms
+        """
+        start = time.perf_counter()
+        # Indexé par id: deux élèves homonymes ne s'écrasent pas
+        summaries: Dict[str, Optional[str]] = {}
+        missing = []
+        for student in students:
+            summary = self._get_cached(self._cache_key(student))
+            summaries[str(student["id"])] = summary
+            if summary is None:
+                missing.append(student)
+
+        errors = {}
+
+        def summarize(student):
+            try:
+                summary = self.summarize_student(student)
+                self._put(self._cache_key(student), summary)
+                return str(student["id"]), summary, None
+            except Exception as e:
+                return str(student["id"]), None, str(e)
+
+        # Pas de session_id par résumé: la limite par session sérialiserait la diffusion;
+        # le plafond du processus et la classe 'dashboard' protègent les tours interactifs.
+        # Un worker par élève manquant: la concurrence réelle est fixée par l'ordonnanceur
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                for student_id, summary, error in pool.map(summarize, missing):
+                    summaries[student_id] = summary
+                    if error is not None:
+                        errors[student_id] = error
+        fanout_ms = (time.perf_counter() - start) * 1000
+
+        available = {student_id: summary for student_id, summary in summaries.items() if summary is not None}
+
+        # La synthèse ne change que si un résumé (donc une version d'élève) a changé
+        digest = None
+        if available:
+            included = [s for s in students if str(s["id"]) in available]
+            digest_key = (self.language, "digest", hashlib.sha256(
+                "\x1f".join(sorted(f"{s['id']}@{s['version']}" for s in included)).encode('utf-8')).hexdigest())
+            digest = self._get_cached(digest_key)
+            if digest is None:
+                # Homonymes distingués par leur id dans le prompt de fusion
+                homonyms = Counter(s["name"] for s in included)
+                labelled = {
+                    (s["name"] if homonyms[s["name"]] == 1 else f"{s['name']} ({s['id']})"): available[str(s["id"])]
+                    for s in included
+                }
+                digest = self.merge(labelled, session_id)
+                self._put(digest_key, digest)
+
+        return {
+            "digest": digest,
+            "summaries": available,
+            "errors": errors,
+            "cache_hits": len(students) - len(missing),
+            "timings_ms": {
+                "fanout": round(fanout_ms, 1),
+                "total": round((time.perf_counter() - start) * 1000, 1)
+            }
+        }
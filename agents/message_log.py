@@ -0,0 +1,172 @@
+"""
+Journal de conversation Tennis AI
+Source unique de l'historique: affichage UI, payload Bedrock et persistance
+"""
+
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class Message:
+    """Entrée compacte du journal (un tour utilisateur ou agent)"""
+
+    __slots__ = ('role', 'text', 'local', '_encoded')
+
+    def __init__(self, role: str, text: str, local: bool = False):
+        """
+        Créer un message
+
+        Args:
+            role: 'user' ou 'assistant'
+            text: Contenu texte du message
+            local: True si le message est affiché mais jamais envoyé au modèle
+                   (ex: message de bienvenue pré-écrit)
+        """
+        # Les rôles sont internés: deux chaînes partagées pour tout le journal
+        self.role = sys.intern(role)
+        self.text = text
+        self.local = local
+        self._encoded = None
+
+    def to_bedrock(self) -> Dict[str, Any]:
+        """
+        Encoder le message au format Messages API (calculé une seule fois)
+
+        Returns:
+            dict: Message au format Bedrock/Anthropic
+        """
+        if self._encoded is None:
+            self._encoded = {
+                "role": self.role,
+                "content": [{"type": "text", "text": self.text}]
+            }
+        return self._encoded
+
+    def __iter__(self) -> Iterator[str]:
+        # Permet le déballage `role, content = message` côté UI
+        yield self.role
+        yield self.text
+
+    def __repr__(self) -> str:
+        return f"Message({self.role!r}, {self.text[:30]!r}, local={self.local})"
+
+
+class MessageLog:
+    """Historique de conversation append-only"""
+
+    __slots__ = ('_messages', '_payload')
+
+    def __init__(self, messages: Optional[List[Message]] = None):
+        """
+        Initialiser le journal
+
+        Args:
+            messages: Messages existants (optionnel)
+        """
+        self._messages: List[Message] = []
+        # Payload Bedrock maintenu incrémentalement (messages non locaux uniquement)
+        self._payload: List[Dict[str, Any]] = []
+        for message in messages or []:
+            self._append(message)
+
+    def _append(self, message: Message) -> Message:
+        self._messages.append(message)
+        if not message.local:
+            self._payload.append(message.to_bedrock())
+        return message
+
+    def append(self, role: str, text: str, local: bool = False) -> Message:
+        """
+        Ajouter un message en fin de journal (O(1))
+
+        Args:
+            role: 'user' ou 'assistant'
+            text: Contenu du message
+            local: Message affiché uniquement (non envoyé au modèle)
+
+        Returns:
+            Message: Entrée ajoutée
+        """
+        return self._append(Message(role, text, local))
+
+    def pop(self) -> Message:
+        """
+        Retirer le dernier message (ex: tour utilisateur en échec)
+
+        Returns:
+            Message: Entrée retirée
+        """
+        message = self._messages.pop()
+        if not message.local:
+            self._payload.pop()
+        return message
+
+    def to_bedrock(self) -> List[Dict[str, Any]]:
+        """
+        Obtenir les messages au format de requête Bedrock
+
+        Les dicts sont encodés une fois à l'ajout puis réutilisés à chaque tour.
+        La liste retournée est partagée: ne pas la modifier.
+
+        Returns:
+            list: Messages au format Messages API
+        """
+        return self._payload
+
+    def payload_size(self) -> int:
+        """Nombre de messages envoyés au modèle"""
+        return len(self._payload)
+
+    def to_records(self) -> List[Tuple[str, str, bool]]:
+        """
+        Exporter le journal sous forme compacte pour la persistance
+
+        Returns:
+            list: Tuples (role, text, local)
+        """
+        return [(m.role, m.text, m.local) for m in self._messages]
+
+    @classmethod
+    def from_records(cls, records: List[Any]) -> 'MessageLog':
+        """
+        Reconstruire un journal depuis `to_records`
+
+        Args:
+            records: Séquences (role, text[, local])
+
+        Returns:
+            MessageLog: Journal reconstruit
+        """
+        return cls([Message(r[0], r[1], bool(r[2]) if len(r) > 2 else False) for r in records])
+
+    @classmethod
+    def from_bedrock(cls, messages: List[Dict[str, Any]]) -> 'MessageLog':
+        """
+        Reconstruire un journal depuis un historique au format Bedrock
+
+        Args:
+            messages: Messages au format Messages API
+
+        Returns:
+            MessageLog: Journal reconstruit
+        """
+        log = cls()
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, list):
+                text = "".join(part.get("text", "") for part in content)
+            else:
+                text = content
+            log.append(message["role"], text)
+        return log
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self._messages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MessageLog(self._messages[index])
+        return self._messages[index]
@@ -5,6 +5,10 @@ Utilise AWS Bedrock (Claude) via API client propre
 """
 
 import json
+import logging
+import re
+import time
+import uuid
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import sys
@@ -14,6 +18,11 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from api.bedrock_client import BedrockClient
+from api.scheduler import OverloadedError
+from agents.message_log import MessageLog
+from agents.prefetch import Prefetcher
+
+logger = logging.getLogger(__name__)
 
 
 class OnboardingAgent:
@@ -73,13 +82,55 @@ RÈGLE D'OR: Une seule erreur à la fois!
         "demo_synthèse", "demo_programmes", "intro_dashboard", "terminé"
     ]
     
+    # Politique de génération par étape: le prompt exige 1-2 phrases, inutile de réserver 1024 tokens.
+    # max_sentences sert au post-contrôle local (réponse tronquée plutôt que régénérée).
+    # Pas de séquence d'arrêt: la question finale suit souvent un saut de paragraphe,
+    # la longueur est bornée par max_tokens puis par `trim_reply`.
+    DEFAULT_GENERATION_POLICY = {
+        "max_tokens": 160, "temperature": 0.6, "max_sentences": 2
+    }
+    
+    GENERATION_POLICIES = {
+        # Collecte d'informations: une question courte
+        "bienvenue": {"max_tokens": 120, "temperature": 0.6, "max_sentences": 2},
+        "profil": {"max_tokens": 120, "temperature": 0.6, "max_sentences": 2},
+        "objectifs": {"max_tokens": 120, "temperature": 0.6, "max_sentences": 2},
+        "profil_coach": {"max_tokens": 120, "temperature": 0.6, "max_sentences": 2},
+        "préférences": {"max_tokens": 120, "temperature": 0.6, "max_sentences": 2},
+        # Consignes techniques: précises et peu créatives
+        "configuration_matériel": {"max_tokens": 150, "temperature": 0.3, "max_sentences": 2},
+        "test_cadrage": {"max_tokens": 150, "temperature": 0.3, "max_sentences": 2},
+        "demo_calibration": {"max_tokens": 150, "temperature": 0.3, "max_sentences": 2},
+        "video_evaluation": {"max_tokens": 150, "temperature": 0.3, "max_sentences": 2},
+        "liaison_élèves": {"max_tokens": 150, "temperature": 0.3, "max_sentences": 2},
+        "configuration_court": {"max_tokens": 150, "temperature": 0.3, "max_sentences": 2},
+        "validation_court": {"max_tokens": 150, "temperature": 0.3, "max_sentences": 2},
+        # Restitution d'analyse: une phrase de plus
+        "analyse": {"max_tokens": 200, "temperature": 0.4, "max_sentences": 3},
+        # Niveau: restitution du classifieur local, déterministe (un tour soumis deux fois,
+        # ex: double clic ou rechargement, rejoint l'appel en cours au lieu d'en payer un second)
+        "detection_niveau": {"max_tokens": 200, "temperature": 0, "max_sentences": 3},
+        "demo_multi_élèves": {"max_tokens": 200, "temperature": 0.4, "max_sentences": 3},
+        "demo_synthèse": {"max_tokens": 200, "temperature": 0.4, "max_sentences": 3},
+        # Programmes: séances en liste présentées telles quelles (3 séances de 4 drills),
+        # jamais raccourcies par `trim_reply`; max_sentences ne borne que le texte libre
+        "proposition_programme": {"max_tokens": 600, "temperature": 0.5, "max_sentences": 5},
+        "demo_programmes": {"max_tokens": 600, "temperature": 0.5, "max_sentences": 5},
+        # Clôture
+        "upsell": {"max_tokens": 150, "temperature": 0.7, "max_sentences": 2},
+        "intro_dashboard": {"max_tokens": 150, "temperature": 0.6, "max_sentences": 2},
+        "terminé": {"max_tokens": 120, "temperature": 0.7, "max_sentences": 2},
+    }
+    
     def __init__(
         self,
         user_type: str,
         language: str = 'fr',
         agent_name: str = 'CoachBot',
         region: str = 'eu-west-1',
-        model_id: str = 'anthropic.claude-3-haiku-20240307-v1:0'
+        model_id: str = 'anthropic.claude-3-haiku-20240307-v1:0',
+        bedrock: Optional[BedrockClient] = None,
+        prefetch: bool = True
     ):
         """
         Initialiser l'agent d'onboarding
@@ -90,28 +141,69 @@ RÈGLE D'OR: Une seule erreur à la fois!
             agent_name: Nom de l'agent
             region: Région AWS
             model_id: ID du modèle Claude
+            bedrock: Client Bedrock à réutiliser (optionnel, ex: runner de simulation)
+            prefetch: Pré-synthétiser chaque réponse (TTS) en arrière-plan pendant que l'utilisateur la lit
         """
         self.user_type = user_type.lower()
         self.language = language.lower()
         self.agent_name = agent_name
-        self.bedrock = BedrockClient(region=region, model_id=model_id)
+        self.bedrock = bedrock or BedrockClient(region=region, model_id=model_id)
         
-        # État de la conversation
-        self.conversation_history = []
+        # Identité et classe de priorité des appels au modèle (contrôle d'admission)
+        self.session_id = uuid.uuid4().hex
+        self.priority = 'interactive'
+        
+        # Joueur connu (progression entre séances), None pour une session anonyme
+        self.player_id: Optional[str] = None
+        
+        # État de la conversation (journal unique: UI, Bedrock, persistance)
+        self.messages = MessageLog()
         self.current_stage = "bienvenue"
         self.user_profile = {}
         
+        # Dernier prompt système construit: (clé d'état, prompt)
+        self._prompt_cache = None
+        self.prefetcher = Prefetcher() if prefetch else None
+        
+        # Métriques de génération par tour (étape, latence, tokens de sortie, troncature)
+        self.turn_metrics: List[Dict[str, Any]] = []
+        
         # Étapes selon le type d'utilisateur
         self.stages = self.PLAYER_STAGES if self.user_type == 'player' else self.COACH_STAGES
     
+    @property
+    def conversation_history(self) -> List[Dict[str, Any]]:
+        """Historique au format Bedrock (vue sur le journal, sans copie)"""
+        return self.messages.to_bedrock()
+    
     def _build_system_prompt(self) -> str:
-        """Construire le prompt système avec la connaissance Tennis AI"""
+        """Construire le prompt système avec la connaissance Tennis AI (mis en cache par état)"""
+        stage = self.current_stage
+        key = (self.language, stage, json.dumps(self.user_profile, sort_keys=True, ensure_ascii=False))
+        if self._prompt_cache is not None and self._prompt_cache[0] == key:
+            return self._prompt_cache[1]
+        
         if self.language == 'fr':
-            return self._build_french_prompt()
+            prompt = self._build_french_prompt(stage)
         else:
-            return self._build_english_prompt()
+            prompt = self._build_english_prompt(stage)
+        
+        self._prompt_cache = (key, prompt)
+        return prompt
     
-    def _build_french_prompt(self) -> str:
+    def prepare_turn(self, partial_message: str) -> None:
+        """
+        Préparer le prochain tour pendant que l'utilisateur parle encore
+        
+        Appelé avec les transcriptions partielles de la saisie vocale: le prompt système
+        ne dépend pas du message, il est donc construit avant la fin de la phrase.
+        
+        Args:
+            partial_message: Transcription partielle (non ajoutée à l'historique)
+        """
+        self._build_system_prompt()
+    
+    def _build_french_prompt(self, stage: str) -> str:
         """Prompt système en français"""
         user_type_fr = "Joueur" if self.user_type == "player" else "Coach"
         
@@ -125,7 +217,7 @@ IMPORTANT: RÉPONDS TOUJOURS EN FRANÇAIS!
 
 CONTEXTE ACTUEL:
 - Type d'utilisateur: {user_type_fr}
-- Étape actuelle: {self.current_stage}
+- Étape actuelle: {stage}
 - Profil collecté: {json.dumps(self.user_profile, indent=2, ensure_ascii=False)}
 
 TON STYLE:
@@ -142,6 +234,12 @@ TON STYLE:
 
 Basé sur l'étape actuelle et le message de l'utilisateur, continue la conversation naturellement.
 Avance à travers le flux d'onboarding étape par étape.
+Si le profil contient `analyse_swing`, cite ces mesures (ne les invente pas) et ne travaille que `erreur_principale_id`.
+Si le profil contient `niveau_estime`, annonce ce niveau directement sans poser de questions pour le déterminer.
+Si le profil contient `programme`, présente ces séances telles quelles (n'invente ni drill ni durée).
+Si le profil contient `progression`, appuie-toi sur ces agrégats des séances précédentes (ne redemande pas l'historique).
+Si le profil contient `codes_invitation`, donne à chaque élève son code exact (n'en génère jamais toi-même).
+Si le profil contient `cadrage`, valide le cadrage s'il est valide, sinon donne uniquement sa `consigne`.
 
 RÈGLES STRICTES:
 - Maximum 1-2 phrases courtes
@@ -152,7 +250,7 @@ RÈGLES STRICTES:
 RAPPEL: Tu es un coach IA efficace, pas bavard. Sois CONCIS!
 RÉPONDS TOUJOURS EN FRANÇAIS!"""
     
-    def _build_english_prompt(self) -> str:
+    def _build_english_prompt(self, stage: str) -> str:
         """Prompt système en anglais"""
         user_type_en = "Player" if self.user_type == "player" else "Coach"
         
@@ -166,7 +264,7 @@ IMPORTANT: ALWAYS RESPOND IN ENGLISH!
 
 CURRENT CONTEXT:
 - User type: {user_type_en}
-- Current stage: {self.current_stage}
+- Current stage: {stage}
 - Profile collected: {json.dumps(self.user_profile, indent=2, ensure_ascii=False)}
 
 YOUR STYLE:
@@ -183,6 +281,12 @@ ONBOARDING STAGES:
 
 Based on the current stage and user's message, continue the conversation naturally.
 Progress through the onboarding flow step by step.
+If the profile contains `analyse_swing`, quote those measurements (never invent them) and only address `erreur_principale_id`.
+If the profile contains `niveau_estime`, announce that level directly without asking questions to determine it.
+If the profile contains `programme`, present those sessions as they are (never invent drills or durations).
+If the profile contains `progression`, rely on those aggregates of previous sessions (never ask for the history again).
+If the profile contains `codes_invitation`, give each student their exact code (never make up codes yourself).
+If the profile contains `cadrage`, confirm the framing when valid, otherwise give only its `consigne`.
 
 STRICT RULES:
 - Maximum 1-2 short sentences
@@ -201,9 +305,17 @@ ALWAYS RESPOND IN ENGLISH!"""
             str: Message de bienvenue
         """
         if self.language == 'fr':
-            return self._get_french_welcome()
+            welcome = self._get_french_welcome()
         else:
-            return self._get_english_welcome()
+            welcome = self._get_english_welcome()
+        
+        # Affiché dans l'UI mais jamais envoyé au modèle (Bedrock exige un premier tour 'user')
+        if not len(self.messages):
+            self.messages.append("assistant", welcome, local=True)
+            if self.prefetcher is not None:
+                self.prefetcher.schedule(welcome)
+        
+        return welcome
     
     def _get_french_welcome(self) -> str:
         """Message de bienvenue en français"""
@@ -237,37 +349,151 @@ Your name and club name?"""
         Returns:
             str: Réponse de l'agent
         """
-        # Ajouter le message utilisateur à l'historique
-        self.conversation_history.append({
-            "role": "user",
-            "content": [{"type": "text", "text": user_message}]
-        })
-        
-        # Construire le prompt système
-        system_prompt = self._build_system_prompt()
+        request = self.begin_turn(user_message)
         
         # Obtenir la réponse de Claude
         try:
-            response = self.bedrock.chat(
-                messages=self.conversation_history,
-                system_prompt=system_prompt,
-                max_tokens=1024,
-                temperature=0.7
+            start = time.perf_counter()
+            response, usage = self.bedrock.chat_with_usage(
+                **request, priority=self.priority, session_id=self.session_id
             )
+            latency_ms = (time.perf_counter() - start) * 1000
+            return self.complete_turn(user_message, response, usage, latency_ms)
             
-            # Ajouter la réponse à l'historique
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": [{"type": "text", "text": response}]
-            })
+        except Exception as e:
+            return self.fail_turn(user_message, e)
+    
+    def get_generation_policy(self, stage: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Politique de génération d'une étape
+        
+        Args:
+            stage: Étape (défaut: étape actuelle)
             
-            # Mise à jour automatique de l'étape (logique simplifiée)
-            self._update_stage_if_needed(user_message, response)
+        Returns:
+            dict: max_tokens, temperature, max_sentences
+        """
+        return self.GENERATION_POLICIES.get(stage or self.current_stage, self.DEFAULT_GENERATION_POLICY)
+    
+    def begin_turn(self, user_message: str) -> Dict[str, Any]:
+        """
+        Enregistrer le message utilisateur et préparer la requête modèle
+        
+        Permet d'exécuter l'appel ailleurs (ex: job Bedrock batch) puis de conclure
+        le tour avec `complete_turn` ou `fail_turn`.
+        
+        Args:
+            user_message: Message de l'utilisateur
+            
+        Returns:
+            dict: Arguments de `BedrockClient.chat`
+        """
+        # La pré-synthèse en attente devient inutile: l'utilisateur a répondu
+        if self.prefetcher is not None:
+            self.prefetcher.cancel()
+        
+        # Ajouter le message utilisateur à l'historique
+        self.messages.append("user", user_message)
+        
+        policy = self.get_generation_policy()
+        return {
+            "messages": self.conversation_history,
+            "system_prompt": self._build_system_prompt(),
+            "max_tokens": policy["max_tokens"],
+            "temperature": policy["temperature"]
+        }
+    
+    def complete_turn(
+        self,
+        user_message: str,
+        response: str,
+        usage: Optional[Dict[str, Any]] = None,
+        latency_ms: Optional[float] = None
+    ) -> str:
+        """
+        Conclure un tour avec la réponse du modèle
+        
+        Args:
+            user_message: Message de l'utilisateur
+            response: Réponse du modèle
+            usage: Usage retourné par Bedrock (optionnel)
+            latency_ms: Latence de l'appel modèle (optionnel)
             
-            return response
+        Returns:
+            str: Réponse de l'agent (éventuellement raccourcie)
+        """
+        usage = usage or {}
+        policy = self.get_generation_policy()
+        reply = trim_reply(response, policy["max_sentences"], truncated=usage.get("stop_reason") == "max_tokens")
+        
+        self.turn_metrics.append({
+            "stage": self.current_stage,
+            "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+            "output_tokens": usage.get("output_tokens"),
+            "stop_reason": usage.get("stop_reason"),
+            "trimmed": reply != response
+        })
+        
+        # Ajouter la réponse à l'historique
+        self.messages.append("assistant", reply)
+        
+        # Mise à jour automatique de l'étape (logique simplifiée)
+        self._update_stage_if_needed(user_message, reply)
+        
+        # Pré-synthétiser la réponse pendant que l'utilisateur la lit (clic 🔊 immédiat)
+        if self.prefetcher is not None:
+            self.prefetcher.schedule(reply)
+        
+        return reply
+    
+    def get_generation_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Agréger les métriques de génération par étape
+        
+        Returns:
+            dict: étape -> turns, output_tokens (total/moyenne), trimmed, truncated, latence moyenne
+        """
+        metrics: Dict[str, Dict[str, Any]] = {}
+        for turn in self.turn_metrics:
+            entry = metrics.setdefault(turn["stage"], {
+                "turns": 0, "output_tokens": 0, "trimmed": 0, "truncated": 0, "latency_ms": 0.0
+            })
+            entry["turns"] += 1
+            entry["output_tokens"] += turn["output_tokens"] or 0
+            entry["trimmed"] += turn["trimmed"]
+            entry["truncated"] += turn["stop_reason"] == "max_tokens"
+            entry["latency_ms"] += turn["latency_ms"] or 0.0
+        
+        for entry in metrics.values():
+            entry["avg_output_tokens"] = round(entry["output_tokens"] / entry["turns"], 1)
+            entry["avg_latency_ms"] = round(entry.pop("latency_ms") / entry["turns"], 1)
+        return metrics
+    
+    def fail_turn(self, user_message: str, error: Exception) -> str:
+        """
+        Conclure un tour en échec
+        
+        Args:
+            user_message: Message de l'utilisateur
+            error: Erreur rencontrée
             
-        except Exception as e:
-            return f"Désolé, une erreur s'est produite: {str(e)}"
+        Returns:
+            str: Message d'erreur affiché à l'utilisateur
+        """
+        # Garder le tour visible mais hors payload pour ne pas casser l'alternance user/assistant
+        self.messages.pop()
+        self.messages.append("user", user_message, local=True)
+        if isinstance(error, OverloadedError):
+            if self.language == 'fr':
+                error_message = ("Beaucoup de joueurs me sollicitent en ce moment 🎾 "
+                                 f"Renvoie ton message dans {error.retry_after_s:.0f} secondes, je suis là!")
+            else:
+                error_message = ("Lots of players are talking to me right now 🎾 "
+                                 f"Please resend your message in {error.retry_after_s:.0f} seconds!")
+        else:
+            error_message = f"Désolé, une erreur s'est produite: {str(error)}"
+        self.messages.append("assistant", error_message, local=True)
+        return error_message
     
     def _update_stage_if_needed(self, user_message: str, response: str):
         """
@@ -282,18 +508,240 @@ Your name and club name?"""
         current_index = self.stages.index(self.current_stage)
         
         # Avancer si on a assez d'informations
-        if len(self.conversation_history) > (current_index + 1) * 4:
+        if self.messages.payload_size() > (current_index + 1) * 4:
             if current_index < len(self.stages) - 1:
                 self.current_stage = self.stages[current_index + 1]
+                # Niveau estimé localement: le modèle l'annonce au lieu de le chercher en plusieurs tours
+                if self.current_stage == "detection_niveau":
+                    self.detect_level()
+                # Programme assemblé localement: le modèle le présente sans le composer
+                elif self.current_stage == "proposition_programme":
+                    self.propose_program()
     
     def get_current_stage(self) -> str:
         """Obtenir l'étape actuelle"""
         return self.current_stage
     
+    def set_swing_analysis(self, summary: Dict[str, Any]) -> None:
+        """
+        Transmettre l'analyse locale des clips au modèle (étapes video_evaluation / analyse)
+        
+        Args:
+            summary: Résultat de `analysis.summarize_analysis`
+        """
+        self.user_profile["analyse_swing"] = summary
+    
+    def check_framing(self, frames: Dict[str, Any], keypoints: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Valider le cadrage localement (étapes test_cadrage / validation_court), sans appel au modèle
+        
+        Args:
+            frames: Angle -> image (chemin, octets de l'upload ou image PIL)
+            keypoints: Angle -> keypoints COCO du joueur (optionnel, voir `analysis.framing`)
+            
+        Returns:
+            dict: Rapport complet (voir `analysis.framing.validate_angles`)
+        """
+        from analysis.framing import summarize_framing, validate_angles
+        
+        mode = "test_cadrage" if self.user_type == "player" else "validation_court"
+        report = validate_angles(frames, mode=mode, language=self.language, keypoints=keypoints)
+        self.user_profile["cadrage"] = summarize_framing(report)
+        return report
+    
+    def detect_level(self) -> Dict[str, Any]:
+        """
+        Estimer le niveau du joueur sans appel au modèle (étape detection_niveau)
+        
+        Utilise l'analyse de swing du profil et les réponses du joueur. Si la confiance
+        est suffisante, `niveau_estime` et `confiance_niveau` sont ajoutés au profil;
+        sinon l'agent détermine le niveau en conversation comme auparavant.
+        
+        Returns:
+            dict: Résultat du classifieur (niveau_estime, confiance_niveau, source, fallback)
+        """
+        from analysis.level_classifier import get_level_classifier, parse_answers
+        
+        answers = parse_answers(" ".join(message.text for message in self.messages if message.role == "user"))
+        result = get_level_classifier().classify_one({
+            "analyse_swing": self.user_profile.get("analyse_swing"),
+            "answers": answers
+        })
+        if not result["fallback"]:
+            self.user_profile["niveau_estime"] = result["niveau_estime"]
+            self.user_profile["confiance_niveau"] = result["confiance_niveau"]
+        return result
+    
+    def propose_program(self) -> Dict[str, Any]:
+        """
+        Assembler le programme d'entrée sans appel au modèle (étape proposition_programme)
+        
+        Niveau (`niveau_estime`, sinon estimation locale, sinon débutant), erreur principale
+        de l'analyse de swing, matériel et durée mentionnés par le joueur. Une version
+        compacte est ajoutée au profil sous `programme`.
+        
+        Returns:
+            dict: Programme complet (voir `ProgramBuilder.build`)
+        """
+        from training import get_program_builder, parse_constraints
+        
+        level = self.user_profile.get("niveau_estime")
+        if level is None:
+            level = self.detect_level()["niveau_estime"]
+        constraints = parse_constraints(" ".join(message.text for message in self.messages if message.role == "user"))
+        program = get_program_builder().build(
+            level,
+            primary_error=(self.user_profile.get("analyse_swing") or {}).get("erreur_principale_id"),
+            equipment=constraints["equipment"],
+            session_minutes=constraints["session_minutes"],
+            language=self.language
+        )
+        if program["feasible"]:
+            self.user_profile["programme"] = {
+                "focus": program["focus"],
+                "seances": [
+                    [f"{drill['name']} ({drill['minutes']} min)" for drill in session["drills"]]
+                    for session in program["sessions"]
+                ]
+            }
+        return program
+    
+    def load_progress(self, player_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Associer la session à un joueur et charger sa progression (joueur qui revient)
+        
+        Seul le résumé compact des agrégats entre dans le prompt, sous `progression`:
+        les anciennes séances ne sont ni relues ni résumées.
+        
+        Args:
+            player_id: Identifiant du joueur
+            
+        Returns:
+            dict: Résumé de progression (None pour un nouveau joueur)
+        """
+        from storage.progress_store import get_progress_store
+        
+        self.player_id = player_id
+        snapshot = get_progress_store().snapshot(player_id)
+        if snapshot is not None:
+            self.user_profile["progression"] = snapshot
+        return snapshot
+    
+    def record_progress(self) -> Optional[Dict[str, Any]]:
+        """
+        Enregistrer la séance dans la progression du joueur (idempotent par session)
+        
+        Returns:
+            dict: Résumé de progression à jour (None sans joueur ou sans analyse de swing)
+        """
+        analysis = self.user_profile.get("analyse_swing")
+        if self.player_id is None or not analysis:
+            return None
+        from storage.progress_store import get_progress_store
+        
+        store = get_progress_store()
+        store.record(
+            self.player_id,
+            analysis.get("metriques", {}),
+            main_error=analysis.get("erreur_principale_id"),
+            session_id=self.session_id
+        )
+        self.user_profile["progression"] = store.snapshot(self.player_id)
+        return self.user_profile["progression"]
+    
+    def issue_invitations(self, students: List[str], coach_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Émettre les codes d'invitation de l'effectif en un lot (étape liaison_élèves, coach)
+        
+        Args:
+            students: Noms des élèves
+            coach_id: Identifiant du coach (défaut: identifiant de la session)
+            
+        Returns:
+            list: {student, code, expires_at} par élève
+        """
+        from storage.invite_codes import InviteCodeService
+        
+        issued = InviteCodeService().issue(coach_id or self.session_id, students)
+        self.user_profile["codes_invitation"] = {entry["student"]: entry["code"] for entry in issued}
+        return issued
+    
+    def redeem_invitation(self, code: str, client_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Lier le joueur à son coach avec un code d'invitation (sans appel au modèle)
+        
+        Args:
+            code: Code saisi ou dicté
+            client_id: Identifiant stable du client (IP, cookie) pour limiter les tentatives;
+                       sans lui, la limite est par joueur et un rechargement de page la contourne
+            
+        Returns:
+            dict: ok, coach_id et student si valide, sinon reason ('format', 'inconnu', 'expire',
+                  'epuise', 'limite', 'concurrence') et retry_after_s pour 'limite'
+        """
+        from storage.invite_codes import InviteCodeError, InviteCodeService, RateLimitedError
+        from storage.session_store import ConflictError
+        
+        try:
+            link = InviteCodeService().redeem(code, self.player_id or self.session_id, client_id=client_id)
+        except RateLimitedError as e:
+            return {"ok": False, "reason": e.reason, "retry_after_s": round(e.retry_after_s)}
+        except InviteCodeError as e:
+            return {"ok": False, "reason": e.reason}
+        except ConflictError:
+            return {"ok": False, "reason": "concurrence"}
+        self.user_profile["coach"] = {"coach_id": link["coach_id"], "eleve": link["student"]}
+        return {"ok": True, "coach_id": link["coach_id"], "student": link["student"]}
+    
     def get_user_profile(self) -> Dict[str, Any]:
         """Obtenir le profil utilisateur"""
         return self.user_profile
     
+    def to_state(self) -> Dict[str, Any]:
+        """
+        Exporter l'état de l'agent (stockage partagé multi-réplicas)
+        
+        Returns:
+            dict: État sérialisable en JSON
+        """
+        return {
+            "session_id": self.session_id,
+            "player_id": self.player_id,
+            "user_type": self.user_type,
+            "language": self.language,
+            "agent_name": self.agent_name,
+            "current_stage": self.current_stage,
+            "user_profile": self.user_profile,
+            "messages": self.messages.to_records(),
+            "turn_metrics": self.turn_metrics
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], **kwargs) -> 'OnboardingAgent':
+        """
+        Reconstruire un agent depuis `to_state`
+        
+        Args:
+            state: État exporté
+            **kwargs: Arguments supplémentaires du constructeur (region, bedrock, ...)
+            
+        Returns:
+            OnboardingAgent: Agent restauré
+        """
+        agent = cls(
+            user_type=state["user_type"],
+            language=state["language"],
+            agent_name=state["agent_name"],
+            **kwargs
+        )
+        agent.session_id = state.get("session_id", agent.session_id)
+        agent.player_id = state.get("player_id")
+        agent.current_stage = state["current_stage"]
+        agent.user_profile = state["user_profile"]
+        agent.messages = MessageLog.from_records(state["messages"])
+        agent.turn_metrics = state.get("turn_metrics", [])
+        return agent
+    
     def save_session(self, file_path: Optional[str] = None):
         """
         Sauvegarder la session
@@ -301,15 +749,25 @@ Your name and club name?"""
         Args:
             file_path: Chemin du fichier de sauvegarde
         """
+        # Sauvegarder la séance = sauvegarder la progression du joueur; une panne du stockage
+        # de progression n'empêche jamais l'écriture de la session
+        try:
+            self.record_progress()
+        except Exception as e:
+            logger.warning("Progression non enregistrée pour la session %s: %s", self.session_id, e)
+        
         if not file_path:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             file_path = f"sessions/session_{self.user_type}_{timestamp}.json"
         
         session_data = {
+            "session_id": self.session_id,
             "user_type": self.user_type,
+            "language": self.language,
             "current_stage": self.current_stage,
             "user_profile": self.user_profile,
             "conversation_history": self.conversation_history,
+            "turn_metrics": self.turn_metrics,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -318,3 +776,69 @@ Your name and club name?"""
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(session_data, f, ensure_ascii=False, indent=2)
 
+
+
+# Fin de phrase: ponctuation forte suivie d'un espace (ou fin de texte)
+_SENTENCE_END = re.compile(r'(?<=[.!?…])\s+')
+
+# Numéro d'élément de liste en fin de segment ("Séance 2 : 1."): pas une fin de phrase
+_ENUMERATOR_END = re.compile(r'(?:^|[\s:(])\d{1,2}\.$')
+
+# Ligne d'élément de liste (tiret, puce ou numéro): la réponse est une liste mise en forme
+_LIST_ITEM = re.compile(r'^\s*(?:[-•*]|\d{1,2}[.)])\s+', re.MULTILINE)
+
+
+def _sentences(text: str) -> List[str]:
+    """Découper en phrases sans couper après un numéro de liste"""
+    sentences: List[str] = []
+    for part in _SENTENCE_END.split(text):
+        if not part:
+            continue
+        if sentences and _ENUMERATOR_END.search(sentences[-1]):
+            sentences[-1] = f"{sentences[-1]} {part}"
+        else:
+            sentences.append(part)
+    return sentences
+
+
+def trim_reply(text: str, max_sentences: int, truncated: bool = False) -> str:
+    """
+    Raccourcir localement une réponse trop longue au lieu de la régénérer
+    
+    Conserve les premières phrases dans la limite; si une question suit, elle remplace
+    la dernière phrase gardée (la réponse doit se terminer par UNE question).
+    Une réponse coupée par max_tokens est ramenée à sa dernière phrase complète.
+    Une réponse en liste (ex: séances d'un programme, présentées telles quelles) n'est
+    jamais raccourcie; coupée par max_tokens, elle perd seulement sa dernière ligne incomplète.
+    
+    Args:
+        text: Réponse du modèle
+        max_sentences: Nombre maximum de phrases
+        truncated: La génération a été coupée par max_tokens
+        
+    Returns:
+        str: Réponse raccourcie (inchangée si déjà conforme)
+    """
+    text = text.strip()
+    if _LIST_ITEM.search(text):
+        lines = text.splitlines()
+        if truncated and len(lines) > 1:
+            return '\n'.join(lines[:-1]).rstrip()
+        return text
+    
+    sentences = _sentences(text)
+    
+    if truncated and len(sentences) > 1 and sentences[-1][-1] not in '.!?…':
+        sentences = sentences[:-1]
+    
+    if len(sentences) > max_sentences:
+        kept = sentences[:max_sentences]
+        if not kept[-1].endswith('?'):
+            question = next((s for s in sentences[max_sentences:] if s.endswith('?')), None)
+            if question is not None:
+                kept[-1] = question
+        sentences = kept
+    
+    trimmed = ' '.join(sentences)
+    # Préserver la mise en forme d'origine (sauts de ligne) si rien n'est retiré
+    return text if trimmed == ' '.join(_sentences(text)) else trimmed
@@ -0,0 +1,104 @@
+"""
+Préchargement spéculatif Tennis AI
+Pré-synthétise la dernière réplique de l'agent pendant le temps de lecture de l'utilisateur
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """Préchargement en arrière-plan d'une session, avec annulation et plafonds stricts"""
+
+    # Pool partagé par toutes les sessions du processus: le préchargement ne doit jamais
+    # concurrencer les tours interactifs au-delà de ces plafonds
+    MAX_WORKERS = 2
+    MAX_PENDING = 8
+    TASK_TIMEOUT_S = 5.0
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+    _pending_slots = threading.BoundedSemaphore(MAX_PENDING)
+
+    def __init__(self):
+        """Initialiser le prefetcher (la synthèse TTS est fournie ensuite par l'UI)"""
+        # Synthèse TTS de la dernière réplique (fournie par l'UI quand l'audio est activé)
+        self.tts: Optional[Callable[[str], Any]] = None
+        self.stats = {"scheduled": 0, "skipped": 0, "cancelled": 0, "stale": 0, "tts_ms": 0.0}
+        self._generation = 0
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, value: float = 1) -> None:
+        # Compteurs mis à jour depuis le thread Streamlit et les workers du pool
+        with self._lock:
+            self.stats[name] += value
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS, thread_name_prefix='prefetch')
+            return cls._executor
+
+    def schedule(self, reply: Optional[str] = None) -> bool:
+        """
+        Lancer la pré-synthèse de la réplique (après une réponse de l'agent)
+
+        Ignoré (sans attente) si l'audio est désactivé ou si la file globale est pleine.
+
+        Args:
+            reply: Dernière réplique de l'agent
+
+        Returns:
+            bool: True si le préchargement a été planifié
+        """
+        self.cancel()
+        if not reply or self.tts is None:
+            return False
+        if not self._pending_slots.acquire(blocking=False):
+            self._count("skipped")
+            return False
+
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+
+        def release(_):
+            self._pending_slots.release()
+
+        future = self._get_executor().submit(self._run, generation, reply, self.tts, time.perf_counter())
+        future.add_done_callback(release)
+        self._future = future
+        self._count("scheduled")
+        return True
+
+    def cancel(self) -> None:
+        """Annuler le préchargement en cours (l'utilisateur a soumis son message)"""
+        with self._lock:
+            self._generation += 1
+        future = self._future
+        self._future = None
+        if future is not None and not future.done():
+            if future.cancel():
+                self._count("cancelled")
+
+    def _is_current(self, generation: int) -> bool:
+        return generation == self._generation
+
+    def _run(self, generation: int, reply: str, tts: Callable[[str], Any], queued_at: float) -> None:
+        # Tâche restée trop longtemps en file ou déjà dépassée par un nouveau tour
+        if not self._is_current(generation) or time.perf_counter() - queued_at > self.TASK_TIMEOUT_S:
+            self._count("stale")
+            return
+        start = time.perf_counter()
+        try:
+            tts(reply)
+            self._count("tts_ms", (time.perf_counter() - start) * 1000)
+        except Exception as e:
+            logger.warning("Préchargement TTS échoué: %s", e)
@@ -0,0 +1,137 @@
+"""
+Tour vocal Tennis AI
+Relie la transcription en streaming à l'agent d'onboarding et mesure la latence du tour
+"""
+
+import io
+import time
+import wave
+from array import array
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from api.transcribe_client import TranscriptionBackend
+
+
+class VoiceTurn:
+    """Un tour de conversation dicté au micro"""
+
+    def __init__(self, agent, backend: TranscriptionBackend, sample_rate: int = 16000):
+        """
+        Ouvrir le tour vocal
+
+        Args:
+            agent: OnboardingAgent destinataire
+            backend: Backend de transcription
+            sample_rate: Fréquence d'échantillonnage de l'audio envoyé
+        """
+        self.agent = agent
+        self.stream = backend.start_stream(language=agent.language, sample_rate=sample_rate)
+        self.partial = ""
+        self.partials = 0
+        self._started = time.perf_counter()
+        self._first_partial: Optional[float] = None
+
+    def feed(self, chunk: bytes) -> Optional[str]:
+        """
+        Envoyer un chunk audio dès sa capture
+
+        Chaque transcription partielle est transmise à l'agent pour préparer le prompt.
+
+        Args:
+            chunk: Audio PCM 16 bits
+
+        Returns:
+            str: Nouvelle transcription partielle ou None
+        """
+        partial = self.stream.send(chunk)
+        if partial:
+            if self._first_partial is None:
+                self._first_partial = time.perf_counter()
+            self.partial = partial
+            self.partials += 1
+            self.agent.prepare_turn(partial)
+        return partial
+
+    def close(self) -> None:
+        """Libérer le flux de transcription (à appeler aussi quand le tour échoue)"""
+        self.stream.close()
+
+    def feed_all(self, chunks: Iterable[bytes]) -> None:
+        """Envoyer une suite de chunks"""
+        for chunk in chunks:
+            self.feed(chunk)
+
+    def finish(self, end_of_speech: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Fin de parole: finaliser la transcription puis obtenir la réponse de l'agent
+
+        Args:
+            end_of_speech: Instant (`time.perf_counter`) de la fin de parole; défaut: maintenant.
+                           À fournir quand l'audio n'est envoyé qu'après coup (enregistrement
+                           complet), sinon l'envoi des chunks échappe à la mesure.
+
+        Returns:
+            dict: transcript, response et timings (ms) mesurés depuis la fin de parole
+        """
+        if end_of_speech is None:
+            end_of_speech = time.perf_counter()
+        transcript = self.stream.finish()
+        transcribed = time.perf_counter()
+
+        response = self.agent.chat(transcript) if transcript.strip() else ""
+        answered = time.perf_counter()
+
+        return {
+            "transcript": transcript,
+            "response": response,
+            "partials": self.partials,
+            "timings_ms": {
+                "first_partial": round((self._first_partial - self._started) * 1000, 1) if self._first_partial else None,
+                "finalize": round((transcribed - end_of_speech) * 1000, 1),
+                "agent": round((answered - transcribed) * 1000, 1),
+                "end_to_end": round((answered - end_of_speech) * 1000, 1)
+            }
+        }
+
+
+def read_wav(wav_bytes: bytes) -> Tuple[bytes, int]:
+    """
+    Extraire l'audio PCM 16 bits mono d'un enregistrement WAV
+
+    Args:
+        wav_bytes: Fichier WAV complet
+
+    Returns:
+        tuple: (audio PCM 16 bits mono, fréquence d'échantillonnage)
+
+    Raises:
+        ValueError: Échantillons autres que 16 bits (seul format accepté par la transcription)
+    """
+    with wave.open(io.BytesIO(wav_bytes)) as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        pcm = wav.readframes(wav.getnframes())
+
+    if sample_width != 2:
+        raise ValueError(f"WAV PCM 16 bits attendu, échantillons de {sample_width * 8} bits reçus")
+    if channels > 1:
+        # Downmix: garder le premier canal
+        pcm = array("h", pcm)[::channels].tobytes()
+    return pcm, sample_rate
+
+
+def split_pcm(audio: bytes, sample_rate: int = 16000, chunk_ms: int = 100) -> Iterable[bytes]:
+    """
+    Découper de l'audio PCM 16 bits mono en chunks de durée fixe
+
+    Args:
+        audio: Audio PCM brut
+        sample_rate: Fréquence d'échantillonnage
+        chunk_ms: Durée d'un chunk
+
+    Returns:
+        Itérable de chunks
+    """
+    size = sample_rate * 2 * chunk_ms // 1000
+    return (audio[i:i + size] for i in range(0, len(audio), size))
@@ -0,0 +1,10 @@
+"""
+Analyse locale Tennis AI (CPU, sans appel au modèle)
+"""
+
+from .swing_metrics import (
+    Clip, METRIC_RANGES, analyze_clip, analyze_clips, compute_metrics, load_clip, summarize_analysis
+)
+
+__all__ = ['Clip', 'METRIC_RANGES', 'analyze_clip', 'analyze_clips', 'compute_metrics', 'load_clip',
+           'summarize_analysis']
@@ -0,0 +1,357 @@
+"""
+Validation du cadrage Tennis AI (étapes test_cadrage / validation_court)
+Contrôles CPU vectorisés (Pillow + NumPy) sur une image réduite une seule fois, sans appel au modèle
+
+Contrôles, dans l'ordre du retour donné au joueur: exposition, netteté, lignes du court
+(gradients + transformée de Hough), horizon du trépied, puis taille et position du joueur.
+"""
+
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from .swing_metrics import CONFIDENCE_MIN
+
+
+# Largeur de travail: toutes les mesures sont faites à cette résolution
+WORK_WIDTH = 320
+
+# Exposition (luminance 0-255) et part de pixels saturés tolérée
+BRIGHTNESS_RANGE = (55.0, 205.0)
+CLIPPED_MAX = 0.25
+
+# Netteté: laplacien / gradient sur les 1% de bords les plus forts (indépendant du contraste;
+# une image sans texture n'est pas prise pour une image floue)
+SHARPNESS_MIN = 0.25
+
+# Lignes: gradient minimal, longueur minimale (part de la largeur), tolérance d'horizon (degrés)
+EDGE_MIN = 40.0
+LINE_MIN_LENGTH = 0.25
+TILT_MAX_DEG = 6.0
+_THETAS = np.deg2rad(np.arange(0.0, 180.0, 1.0))
+# Projections précalculées (float32, distance par pas de 2 px)
+_COS_HALF = (np.cos(_THETAS) / 2).astype(np.float32)
+_SIN_HALF = (np.sin(_THETAS) / 2).astype(np.float32)
+_MAX_EDGE_POINTS = 2000
+
+# Joueur: hauteur relative dans l'image et marge minimale aux bords (test_cadrage)
+PLAYER_HEIGHT_RANGE = (0.25, 0.8)
+PLAYER_MARGIN_MIN = 0.02
+
+# Angles à fournir par mode (l'angle frontal reste optionnel)
+REQUIRED_ANGLES = {
+    'test_cadrage': ('lateral',),
+    'validation_court': ('lateral',)
+}
+
+# Orientations EXIF tournées d'un quart de tour (largeur et hauteur échangées à l'affichage)
+_EXIF_ORIENTATION = 0x0112
+_QUARTER_TURNS = (5, 6, 7, 8)
+
+# Lignes attendues: ligne de fond pour le joueur, court complet (fond + côtés) pour le coach
+REQUIRED_LINES = {
+    'test_cadrage': {'horizontales': 1, 'obliques': 0},
+    'validation_court': {'horizontales': 2, 'obliques': 2}
+}
+
+REASONS = {
+    'trop_sombre': ("Image trop sombre: rapproche-toi de la lumière ou filme de jour.",
+                    "Image too dark: move towards the light or film in daylight."),
+    'surexpose': ("Image surexposée: évite de filmer face au soleil.",
+                  "Image overexposed: avoid filming into the sun."),
+    'flou': ("Image floue: nettoie l'objectif et stabilise le trépied.",
+             "Image blurry: clean the lens and steady the tripod."),
+    'lignes_absentes': ("Lignes du court peu visibles: recule ou incline le téléphone vers le court.",
+                        "Court lines barely visible: step back or tilt the phone towards the court."),
+    'court_incomplet': ("Court incomplet: il faut voir la ligne de fond et les deux couloirs.",
+                        "Court incomplete: the baseline and both sidelines must be visible."),
+    'incline': ("Trépied penché: remets le téléphone à l'horizontale.",
+                "Tripod tilted: level the phone."),
+    'joueur_trop_loin': ("Joueur trop petit: rapproche le trépied.",
+                         "Player too small: move the tripod closer."),
+    'joueur_trop_pres': ("Joueur trop grand dans l'image: recule le trépied.",
+                         "Player too large in the frame: move the tripod back."),
+    'joueur_coupe': ("Joueur coupé par le bord de l'image: recentre le cadrage.",
+                     "Player cut off by the frame edge: re-center the shot."),
+    'joueur_absent': ("Aucun joueur détecté: place-toi dans le champ.",
+                      "No player detected: step into the frame."),
+    'angle_manquant': ("Angle manquant: ajoute une image prise de côté (latérale).",
+                       "Missing angle: add a picture taken from the side (lateral).")
+}
+
+Frame = Union[str, bytes, Image.Image]
+Box = Tuple[float, float, float, float]
+
+
+def prepare_frame(source: Frame, width: int = WORK_WIDTH) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Décoder et réduire une image une seule fois (luminance float32)
+
+    Pour un JPEG, le décodage est fait directement à une résolution réduite (draft). L'orientation
+    EXIF est appliquée (photo de téléphone tenu en portrait): les mesures portent sur l'image
+    telle qu'elle s'affiche.
+
+    Args:
+        source: Chemin, octets (upload) ou image PIL
+        width: Largeur de travail
+
+    Returns:
+        tuple: (luminance (h, width), taille d'origine orientée (largeur, hauteur))
+    """
+    image = source if isinstance(source, Image.Image) else Image.open(
+        io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    )
+    orientation = image.getexif().get(_EXIF_ORIENTATION, 1)
+    turned = orientation in _QUARTER_TURNS
+    original = image.size[::-1] if turned else image.size
+    height = max(1, round(width * original[1] / original[0]))
+    if image.format == 'JPEG':
+        image.draft('L', (height, width) if turned else (width, height))
+    if orientation != 1:
+        image = ImageOps.exif_transpose(image)
+    gray = image.convert('L').resize((width, height), Image.BILINEAR)
+    return np.asarray(gray, dtype=np.float32), original
+
+
+def _sharpness(gray: np.ndarray) -> float:
+    """Rapport laplacien / gradient sur les bords les plus forts (bas = bords étalés = flou)"""
+    gx = gray[1:-1, 2:] - gray[1:-1, :-2]
+    gy = gray[2:, 1:-1] - gray[:-2, 1:-1]
+    magnitude = np.hypot(gx, gy)
+    laplacian = gray[1:-1, 2:] + gray[1:-1, :-2] + gray[2:, 1:-1] + gray[:-2, 1:-1] - 4 * gray[1:-1, 1:-1]
+    strongest = magnitude >= np.percentile(magnitude, 99)
+    return float(np.abs(laplacian[strongest]).mean() / max(float(magnitude[strongest].mean()), 1e-6))
+
+
+def _hough_lines(gray: np.ndarray) -> List[Dict[str, float]]:
+    """Lignes droites dominantes (angle de la normale en degrés, distance, longueur relative)"""
+    height, width = gray.shape
+    gx = gray[1:-1, 2:] - gray[1:-1, :-2]
+    gy = gray[2:, 1:-1] - gray[:-2, 1:-1]
+    magnitude = np.hypot(gx, gy)
+
+    # Lignes du court = bords de traits clairs: gradient fort à côté d'un pixel clair
+    neighbours = np.maximum.reduce([gray[1:-1, 2:], gray[1:-1, :-2], gray[2:, 1:-1], gray[:-2, 1:-1]])
+    threshold = max(EDGE_MIN, float(np.percentile(magnitude, 90)))
+    bright = np.percentile(gray, 70)
+    ys, xs = np.nonzero((magnitude > threshold) & (neighbours > bright))
+    if len(xs) == 0:
+        return []
+    step = max(1, len(xs) // _MAX_EDGE_POINTS)
+    xs = xs[::step].astype(np.float32) + 1
+    ys = ys[::step].astype(np.float32) + 1
+
+    # Accumulateur (angle, distance) rempli en un bincount
+    diagonal = int(np.ceil(np.hypot(width, height)))
+    rho_bins = diagonal + 1
+    rho = xs[:, None] * _COS_HALF + ys[:, None] * _SIN_HALF
+    rho += diagonal / 2
+    index = rho.astype(np.int32) + np.arange(len(_THETAS), dtype=np.int32) * rho_bins
+    votes = np.bincount(index.ravel(), minlength=len(_THETAS) * rho_bins) * step
+
+    # Chaque bord de trait vote: ~2 votes par pixel de longueur
+    min_votes = 2 * LINE_MIN_LENGTH * width
+    candidates = np.flatnonzero(votes >= min_votes)
+    candidates = candidates[np.argsort(votes[candidates])[::-1][:64]]
+
+    lines: List[Dict[str, float]] = []
+    for flat in candidates:
+        theta_index, rho_index = divmod(int(flat), rho_bins)
+        theta, distance = float(np.degrees(_THETAS[theta_index])), rho_index * 2.0 - diagonal
+        # Suppression des non-maxima (deux bords d'un même trait, angles voisins)
+        if any(abs(theta - kept['theta']) % 180 < 8 and abs(distance - kept['rho']) < 10 for kept in lines):
+            continue
+        lines.append({'theta': theta, 'rho': distance, 'length': round(float(votes[flat]) / (2 * width), 2)})
+        if len(lines) == 8:
+            break
+    return lines
+
+
+def box_from_keypoints(keypoints: np.ndarray, image_size: Tuple[int, int]) -> Optional[Box]:
+    """
+    Boîte englobante relative (0-1) du joueur depuis des keypoints COCO (x, y, confiance)
+
+    Args:
+        keypoints: (points, 3) ou (frames, points, 3), en pixels de l'image d'origine
+        image_size: Taille d'origine (largeur, hauteur)
+
+    Returns:
+        tuple: (x0, y0, x1, y1) relatifs, élargis pour couvrir tête et pieds; None si aucun point fiable
+    """
+    points = np.asarray(keypoints, dtype=np.float32).reshape(-1, 3)
+    points = points[points[:, 2] >= CONFIDENCE_MIN, :2]
+    if len(points) == 0:
+        return None
+    (x0, y0), (x1, y1) = points.min(axis=0), points.max(axis=0)
+    pad_x, pad_y = 0.15 * (x1 - x0), 0.1 * (y1 - y0)
+    width, height = image_size
+    return ((x0 - pad_x) / width, (y0 - pad_y) / height, (x1 + pad_x) / width, (y1 + pad_y) / height)
+
+
+def _motion_box(gray: np.ndarray, reference: np.ndarray) -> Optional[Box]:
+    """Boîte relative de la zone en mouvement entre deux images du même trépied"""
+    if reference.shape != gray.shape:
+        return None
+    ys, xs = np.nonzero(np.abs(gray - reference) > 25)
+    if len(xs) < 0.002 * gray.size:
+        return None
+    height, width = gray.shape
+    x0, x1 = np.percentile(xs, (2, 98))
+    y0, y1 = np.percentile(ys, (2, 98))
+    return (x0 / width, y0 / height, (x1 + 1) / width, (y1 + 1) / height)
+
+
+def check_frame(source: Frame, mode: str = 'test_cadrage', language: str = 'fr',
+                player_box: Optional[Box] = None, keypoints: Optional[np.ndarray] = None,
+                reference: Optional[Frame] = None, angle: str = 'lateral') -> Dict[str, Any]:
+    """
+    Valider le cadrage d'une image
+
+    Le joueur est localisé, par ordre de priorité, par `player_box`, par des `keypoints`
+    ou par différence avec une image `reference` du même trépied; sinon ce contrôle est omis.
+
+    Args:
+        source: Image (chemin, octets ou image PIL)
+        mode: 'test_cadrage' (joueur) ou 'validation_court' (coach)
+        language: Langue du message ('fr' ou 'en')
+        player_box: Boîte du joueur relative (x0, y0, x1, y1), 0-1
+        keypoints: Keypoints COCO du joueur dans cette image (voir `box_from_keypoints`)
+        reference: Autre image du même trépied (détection du joueur par mouvement)
+        angle: Angle de prise de vue (reporté tel quel)
+
+    Returns:
+        dict: angle, ok, raison (None si ok), message, mesures, ms
+    """
+    start = time.perf_counter()
+    gray, size = prepare_frame(source)
+
+    brightness = float(gray.mean())
+    clipped = float(np.mean((gray > 250) | (gray < 5)))
+    sharpness = _sharpness(gray)
+
+    lines = _hough_lines(gray)
+    horizontal = [line for line in lines if abs(line['theta'] - 90) <= 20]
+    oblique = [line for line in lines if 20 < abs(line['theta'] - 90) < 80]
+    # Inclinaison: ligne quasi horizontale la plus longue (ligne de fond)
+    tilt = round(max(horizontal, key=lambda l: l['length'])['theta'] - 90, 1) if horizontal else None
+
+    if player_box is None and keypoints is not None:
+        player_box = box_from_keypoints(keypoints, size)
+    if player_box is None and reference is not None:
+        player_box = _motion_box(gray, prepare_frame(reference)[0])
+        if player_box is None and mode == 'test_cadrage':
+            player_box = ()
+
+    measures = {
+        'luminosite': round(brightness, 1),
+        'satures': round(clipped, 3),
+        'nettete': round(sharpness, 2),
+        'lignes_horizontales': len(horizontal),
+        'lignes_obliques': len(oblique),
+        'inclinaison_deg': tilt
+    }
+
+    required = REQUIRED_LINES.get(mode, REQUIRED_LINES['test_cadrage'])
+    reason = None
+    if brightness < BRIGHTNESS_RANGE[0]:
+        reason = 'trop_sombre'
+    elif brightness > BRIGHTNESS_RANGE[1] or clipped > CLIPPED_MAX:
+        reason = 'surexpose'
+    elif sharpness < SHARPNESS_MIN:
+        reason = 'flou'
+    elif not lines or len(horizontal) < required['horizontales']:
+        reason = 'lignes_absentes'
+    elif len(oblique) < required['obliques']:
+        reason = 'court_incomplet'
+    elif tilt is not None and abs(tilt) > TILT_MAX_DEG:
+        reason = 'incline'
+
+    if player_box is not None:
+        if not player_box:
+            reason = reason or 'joueur_absent'
+        else:
+            x0, y0, x1, y1 = player_box
+            measures['joueur_hauteur'] = round(y1 - y0, 2)
+            if mode == 'test_cadrage' and reason is None:
+                if min(x0, y0, 1 - x1, 1 - y1) < PLAYER_MARGIN_MIN:
+                    reason = 'joueur_coupe'
+                elif y1 - y0 < PLAYER_HEIGHT_RANGE[0]:
+                    reason = 'joueur_trop_loin'
+                elif y1 - y0 > PLAYER_HEIGHT_RANGE[1]:
+                    reason = 'joueur_trop_pres'
+
+    return {
+        'angle': angle,
+        'ok': reason is None,
+        'raison': reason,
+        'message': REASONS[reason][0 if language == 'fr' else 1] if reason else None,
+        'mesures': measures,
+        'ms': round((time.perf_counter() - start) * 1000, 1)
+    }
+
+
+def validate_angles(frames: Dict[str, Frame], mode: str = 'test_cadrage', language: str = 'fr',
+                    player_boxes: Optional[Dict[str, Box]] = None,
+                    keypoints: Optional[Dict[str, np.ndarray]] = None,
+                    references: Optional[Dict[str, Frame]] = None,
+                    required: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """
+    Valider plusieurs angles d'un coup (décodage et calculs NumPy en parallèle)
+
+    Args:
+        frames: Angle -> image
+        mode, language: Voir `check_frame`
+        player_boxes, keypoints, references: Par angle, optionnels (voir `check_frame`)
+        required: Angles à fournir (défaut: REQUIRED_ANGLES du mode)
+
+    Returns:
+        dict: ok (angles requis présents et tous les angles valides), angles (angle -> résultat
+              de `check_frame`), manquants (angles requis absents), message (consigne si un angle
+              manque ou si aucune image n'est fournie), ms
+    """
+    start = time.perf_counter()
+    player_boxes, keypoints, references = player_boxes or {}, keypoints or {}, references or {}
+    if required is None:
+        required = REQUIRED_ANGLES.get(mode, REQUIRED_ANGLES['test_cadrage'])
+    missing = [angle for angle in required if angle not in frames]
+
+    def check(angle: str) -> Dict[str, Any]:
+        return check_frame(frames[angle], mode=mode, language=language, player_box=player_boxes.get(angle),
+                           keypoints=keypoints.get(angle), reference=references.get(angle), angle=angle)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(4, len(frames)))) as pool:
+        results = dict(zip(frames, pool.map(check, frames)))
+    incomplete = bool(missing) or not results
+    return {
+        'ok': not incomplete and all(result['ok'] for result in results.values()),
+        'angles': results,
+        'manquants': missing,
+        'message': REASONS['angle_manquant'][0 if language == 'fr' else 1] if incomplete else None,
+        'ms': round((time.perf_counter() - start) * 1000, 1)
+    }
+
+
+def summarize_framing(report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Résumé compact pour le prompt de l'agent: une consigne à la fois
+
+    Args:
+        report: Résultat de `validate_angles`
+
+    Returns:
+        dict: valide, angles (angle -> 'ok', raison ou 'angle_manquant'), consigne (premier angle
+              à corriger, sinon angle manquant)
+    """
+    failing = [result for result in report['angles'].values() if not result['ok']]
+    missing = report.get('manquants', [])
+    angles = {angle: result['raison'] or 'ok' for angle, result in report['angles'].items()}
+    angles.update({angle: 'angle_manquant' for angle in missing})
+    return {
+        'valide': report['ok'],
+        'angles': angles,
+        'consigne': failing[0]['message'] if failing else report.get('message')
+    }
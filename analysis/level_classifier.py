@@ -0,0 +1,274 @@
+"""
+Détection de niveau Tennis AI (étape detection_niveau)
+Règles + régression logistique multinomiale NumPy, sérialisée en JSON dans le dépôt
+
+Entrées par joueur: le résumé `analyse_swing` (voir `summarize_analysis`) et les réponses
+du profil (texte libre). Les prédictions peu confiantes sont laissées à l'agent.
+
+Usage:
+    python -m analysis.level_classifier train joueurs.jsonl --out analysis/models/level_model.json
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .swing_metrics import METRIC_RANGES
+
+
+LEVELS = ('débutant', 'intermédiaire', 'avancé')
+
+SWING_FEATURES = tuple(METRIC_RANGES)
+ANSWER_FEATURES = ('annees_pratique', 'seances_par_semaine', 'competition', 'classe')
+FEATURES = SWING_FEATURES + ANSWER_FEATURES
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'level_model.json')
+
+# Sous ce seuil, l'agent détermine le niveau en conversation
+MIN_CONFIDENCE = 0.6
+
+# Ancienneté: "depuis 6 ans", "for 2 years" (jamais l'âge: "j'ai 24 ans")
+_YEARS = re.compile(r'(?:depuis|for|since|pendant)\s+(\d+(?:[.,]\d+)?)\s*(ans?|années?|years?|mois|months?)',
+                    re.IGNORECASE)
+_PER_WEEK = re.compile(r'(\d+)\s*(?:fois|x|séances?|sessions?|times?)\s*(?:par|per|/|a)\s*(?:semaine|week)', re.IGNORECASE)
+# Classement FFT (30/1, 15/4, 4/6, -2/6...) ou UTR; jamais une date ("12/3") ni "classe de 3e"
+_FFT_RANK = r'(?<![\d/])(?:(?:30|15)/[1-5]|-?[1-5]/6)(?![\d/])'
+_UNRANKED = re.compile(r"\b(?:non|pas|jamais)\s+class[ée]e?s?\b|\bpas\s+de\s+classement\b|\bnc\b|"
+                       r"\bunranked\b|\bnot\s+ranked\b", re.IGNORECASE)
+_RANKED = re.compile(r'\bclassée?s?\b|\bclassement\b|\branked\b|\branking\b|\butr\s*\d|' + _FFT_RANK,
+                     re.IGNORECASE)
+_NO_COMPETITION = re.compile(
+    r"\b(?:pas|jamais|aucun|aucune|no|never|not|don't|do not)\s+(?:\w+\s+){0,2}?"
+    r"(?:tournois?|compétitions?|competitions?|matchs?|tournaments?)\b|\ben loisirs?\b|\bfor fun\b",
+    re.IGNORECASE
+)
+_COMPETITION = re.compile(r'(tournoi|compétition|competition|match(?:s)? officiel|interclubs?|tournament)', re.IGNORECASE)
+
+
+def _mentioned(text: str, positive: re.Pattern, negative: re.Pattern) -> Optional[float]:
+    """1.0 si affirmé, 0.0 si nié, None si le joueur n'en parle pas (feature manquante)"""
+    if negative.search(text):
+        return 0.0
+    if positive.search(text):
+        return 1.0
+    return None
+
+
+def parse_answers(text: str) -> Dict[str, Optional[float]]:
+    """
+    Extraire les réponses utiles du texte libre du joueur
+
+    Args:
+        text: Messages du joueur concaténés
+
+    Returns:
+        dict: annees_pratique, seances_par_semaine, competition, classe (0/1);
+              None pour tout ce qui n'est pas mentionné
+    """
+    years = None
+    match = _YEARS.search(text)
+    if match:
+        value = float(match.group(1).replace(',', '.'))
+        years = value / 12 if match.group(2).lower().startswith(('mois', 'month')) else value
+    per_week = _PER_WEEK.search(text)
+    return {
+        'annees_pratique': years,
+        'seances_par_semaine': float(per_week.group(1)) if per_week else None,
+        'competition': _mentioned(text, _COMPETITION, _NO_COMPETITION),
+        'classe': _mentioned(text, _RANKED, _UNRANKED)
+    }
+
+
+def build_features(players: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """
+    Matrice de features (joueurs, FEATURES), NaN pour les valeurs manquantes
+
+    Les métriques de swing sont converties en écart à leur plage cible (0 = dans la plage).
+
+    Args:
+        players: Dicts avec `analyse_swing` (optionnel) et `answers` (dict de `parse_answers`)
+
+    Returns:
+        np.ndarray: Features
+    """
+    X = np.full((len(players), len(FEATURES)), np.nan)
+    for i, player in enumerate(players):
+        metrics = (player.get('analyse_swing') or {}).get('metriques', {})
+        for j, name in enumerate(SWING_FEATURES):
+            if name in metrics:
+                X[i, j] = metrics[name]
+        answers = player.get('answers') or {}
+        for j, name in enumerate(ANSWER_FEATURES, start=len(SWING_FEATURES)):
+            if answers.get(name) is not None:
+                X[i, j] = answers[name]
+
+    # Écarts aux plages cibles, calculés sur toute la colonne d'un coup
+    swing = X[:, :len(SWING_FEATURES)]
+    low, high = np.array([METRIC_RANGES[n] for n in SWING_FEATURES]).T
+    X[:, :len(SWING_FEATURES)] = np.maximum(np.maximum(low - swing, swing - high), 0.0) / (high - low)
+    return X
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def fit(X: np.ndarray, y: np.ndarray, l2: float = 1e-2, epochs: int = 500, lr: float = 0.5) -> Dict[str, Any]:
+    """
+    Entraîner la régression logistique multinomiale (descente de gradient, NumPy)
+
+    Les valeurs manquantes sont imputées par la moyenne (0 après standardisation),
+    comme à la prédiction.
+
+    Args:
+        X: Features (voir `build_features`)
+        y: Index de niveau (0, 1, 2)
+        l2: Régularisation
+        epochs: Itérations
+        lr: Pas d'apprentissage
+
+    Returns:
+        dict: Modèle sérialisable (features, mean, scale, weights, bias)
+    """
+    mean = np.nanmean(X, axis=0)
+    scale = np.nanstd(X, axis=0)
+    mean = np.where(np.isnan(mean), 0.0, mean)
+    scale = np.where(np.isnan(scale) | (scale == 0), 1.0, scale)
+    Xs = np.nan_to_num((X - mean) / scale)
+
+    targets = np.eye(len(LEVELS))[y]
+    weights = np.zeros((len(LEVELS), X.shape[1]))
+    bias = np.zeros(len(LEVELS))
+    for _ in range(epochs):
+        error = _softmax(Xs @ weights.T + bias) - targets
+        weights -= lr * (error.T @ Xs / len(X) + l2 * weights)
+        bias -= lr * error.mean(axis=0)
+
+    return {
+        'features': list(FEATURES),
+        'levels': list(LEVELS),
+        'mean': np.round(mean, 6).tolist(),
+        'scale': np.round(scale, 6).tolist(),
+        'weights': np.round(weights, 6).tolist(),
+        'bias': np.round(bias, 6).tolist()
+    }
+
+
+class LevelClassifier:
+    """Classifieur de niveau CPU: règles explicites puis modèle logistique"""
+
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH, min_confidence: float = MIN_CONFIDENCE,
+                 model: Optional[Dict[str, Any]] = None):
+        """
+        Charger le modèle
+
+        Args:
+            model_path: Modèle JSON (voir `fit`)
+            min_confidence: Seuil sous lequel l'agent reprend la main
+            model: Modèle déjà chargé (prioritaire sur `model_path`)
+        """
+        if model is None:
+            with open(model_path, 'r', encoding='utf-8') as f:
+                model = json.load(f)
+        if model['features'] != list(FEATURES):
+            raise ValueError(f"Modèle incompatible: features {model['features']}")
+        self.mean = np.array(model['mean'])
+        self.scale = np.array(model['scale'])
+        self.weights = np.array(model['weights'])
+        self.bias = np.array(model['bias'])
+        self.min_confidence = min_confidence
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilités (joueurs, niveaux) du modèle logistique"""
+        Xs = np.nan_to_num((X - self.mean) / self.scale)
+        return _softmax(Xs @ self.weights.T + self.bias)
+
+    def classify(self, players: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Classer un lot de joueurs en un appel vectorisé
+
+        La confiance est la probabilité du niveau retenu, atténuée quand peu de features
+        sont connues. Les règles explicites priment sur le modèle.
+
+        Args:
+            players: Voir `build_features`
+
+        Returns:
+            list: niveau_estime, confiance_niveau, source ('regle' / 'modele'), fallback (bool)
+        """
+        X = build_features(players)
+        proba = self.predict_proba(X)
+        level = proba.argmax(axis=1)
+        coverage = 1.0 - np.isnan(X).mean(axis=1)
+        confidence = proba.max(axis=1) * (0.5 + 0.5 * coverage)
+        source = np.zeros(len(X), dtype=bool)
+
+        years = X[:, FEATURES.index('annees_pratique')]
+        ranked = X[:, FEATURES.index('classe')] == 1
+        competing = X[:, FEATURES.index('competition')] == 1
+        # Règles: moins de 6 mois sans compétition = débutant; classé + compétition = avancé
+        beginner = (years < 0.5) & ~competing & ~ranked
+        advanced = ranked & competing & ~(years < 2)
+        for mask, index, rule_confidence in ((beginner, 0, 0.9), (advanced, 2, 0.85)):
+            level[mask] = index
+            confidence[mask] = np.maximum(confidence[mask], rule_confidence)
+            source |= mask
+
+        return [
+            {
+                'niveau_estime': LEVELS[level[i]],
+                'confiance_niveau': round(float(confidence[i]), 2),
+                'source': 'regle' if source[i] else 'modele',
+                'fallback': bool(confidence[i] < self.min_confidence)
+            }
+            for i in range(len(X))
+        ]
+
+    def classify_one(self, player: Dict[str, Any]) -> Dict[str, Any]:
+        """Classer un seul joueur (voir `classify`)"""
+        return self.classify([player])[0]
+
+
+_default: Optional[LevelClassifier] = None
+_default_lock = threading.Lock()
+
+
+def get_level_classifier() -> LevelClassifier:
+    """Classifieur partagé par le processus (modèle chargé une fois)"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = LevelClassifier()
+        return _default
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraîner le classifieur de niveau Tennis AI")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train = subparsers.add_parser("train", help="Entraîner depuis un JSONL étiqueté")
+    train.add_argument("data", help="Une ligne par joueur: analyse_swing, answers, niveau")
+    train.add_argument("--out", default=DEFAULT_MODEL_PATH)
+    train.add_argument("--l2", type=float, default=1e-2)
+    args = parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        players = [json.loads(line) for line in f if line.strip()]
+    X = build_features(players)
+    y = np.array([LEVELS.index(p['niveau']) for p in players])
+    model = fit(X, y, l2=args.l2)
+    accuracy = float((LevelClassifier(model=model).predict_proba(X).argmax(axis=1) == y).mean())
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(model, f, ensure_ascii=False, indent=2)
+    print(f"Modèle écrit: {args.out} ({len(players)} joueurs, précision d'entraînement {accuracy:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Métriques de swing Tennis AI (analyse locale, CPU)
+Calcul vectorisé NumPy sur toutes les frappes et toutes les frames d'un clip de keypoints
+
+Format des keypoints: (frappes, frames, points, 3) avec (x, y, confiance) en pixels,
+points au format COCO-17 éventuellement suivis de 2 points raquette (manche, tête).
+"""
+
+import json
+import os
+import warnings
+from typing import Any, Dict, Iterable, Iterator, List
+
+import numpy as np
+
+
+# Indices COCO-17 utilisés (+ raquette optionnelle)
+KEYPOINTS = {
+    'left_shoulder': 5, 'right_shoulder': 6,
+    'left_elbow': 7, 'right_elbow': 8,
+    'left_wrist': 9, 'right_wrist': 10,
+    'left_hip': 11, 'right_hip': 12,
+    'left_ankle': 15, 'right_ankle': 16,
+    'racket_butt': 17, 'racket_tip': 18
+}
+
+# Keypoints moins fiables que ce seuil ignorés (NaN)
+CONFIDENCE_MIN = 0.3
+
+# Plages cibles (unités: longueur de buste, sauf degrés); hors plage = erreur candidate
+METRIC_RANGES = {
+    'stance': (0.8, 1.6),           # Écart des pieds au contact
+    'contact_point': (0.2, 1.0),    # Avance du poignet devant les hanches au contact
+    'follow_through': (0.0, 0.8),   # Distance finale poignet / épaule opposée
+    'body_rotation': (45.0, 90.0),  # Rotation des épaules pendant la frappe (degrés)
+    'grip': (100.0, 160.0)          # Angle avant-bras / raquette au contact (degrés, si raquette)
+}
+
+
+class Clip:
+    """Clip de frappes: keypoints et métadonnées"""
+
+    __slots__ = ('clip_id', 'angle', 'fps', 'handedness', 'keypoints')
+
+    def __init__(self, keypoints: np.ndarray, clip_id: str = 'clip', angle: str = 'lateral',
+                 fps: float = 30.0, handedness: str = 'right'):
+        """
+        Args:
+            keypoints: Tableau (frappes, frames, points, 3) ou (frames, points, 3) pour une frappe
+            clip_id: Identifiant du clip
+            angle: Angle de prise de vue ('lateral' ou 'frontal')
+            fps: Images par seconde
+            handedness: Main dominante ('right' ou 'left')
+        """
+        keypoints = np.asarray(keypoints, dtype=np.float32)
+        if keypoints.ndim == 3:
+            keypoints = keypoints[np.newaxis]
+        if keypoints.ndim != 4 or keypoints.shape[-1] != 3 or keypoints.shape[2] < 17:
+            raise ValueError(f"Keypoints attendus (frappes, frames, >=17, 3), reçu {keypoints.shape}")
+        self.keypoints = keypoints
+        self.clip_id = clip_id
+        self.angle = angle
+        self.fps = fps
+        self.handedness = handedness
+
+
+def load_clip(path: str, **overrides) -> Clip:
+    """
+    Charger un clip depuis un fichier `.npy` (tableau seul) ou `.json`
+
+    Le JSON contient `strokes` (liste de frappes, chacune liste de frames) et
+    optionnellement `id`, `angle`, `fps`, `handedness`. Les frappes de longueurs
+    différentes sont complétées par des frames de confiance nulle.
+
+    Args:
+        path: Chemin du fichier
+        **overrides: Métadonnées à imposer (clip_id, angle, fps, handedness)
+
+    Returns:
+        Clip: Clip chargé
+    """
+    clip_id = os.path.splitext(os.path.basename(path))[0]
+    if path.endswith('.npy'):
+        return Clip(np.load(path), **dict({'clip_id': clip_id}, **overrides))
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    strokes = [np.asarray(stroke, dtype=np.float32) for stroke in data['strokes']]
+    frames = max(len(stroke) for stroke in strokes)
+    keypoints = np.zeros((len(strokes), frames) + strokes[0].shape[1:], dtype=np.float32)
+    for i, stroke in enumerate(strokes):
+        keypoints[i, :len(stroke)] = stroke
+
+    metadata = {
+        'clip_id': data.get('id', clip_id),
+        'angle': data.get('angle', 'lateral'),
+        'fps': data.get('fps', 30.0),
+        'handedness': data.get('handedness', 'right')
+    }
+    metadata.update(overrides)
+    return Clip(keypoints, **metadata)
+
+
+def _angle_deg(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Angle entre vecteurs 2D (dernier axe), en degrés"""
+    cos = np.sum(u * v, axis=-1) / (np.linalg.norm(u, axis=-1) * np.linalg.norm(v, axis=-1))
+    return np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+
+
+def compute_metrics(clip: Clip) -> Dict[str, np.ndarray]:
+    """
+    Calculer les métriques de chaque frappe (aucune boucle Python sur frappes ou frames)
+
+    Le contact est la frame de vitesse maximale du poignet dominant. Les distances sont
+    normalisées par la longueur du buste (indépendantes de la distance à la caméra).
+
+    Args:
+        clip: Clip à analyser
+
+    Returns:
+        dict: Métrique -> tableau (frappes,), NaN si non mesurable
+    """
+    kp = clip.keypoints
+    xy = np.where(kp[..., 2:3] >= CONFIDENCE_MIN, kp[..., :2], np.nan)   # (S, F, J, 2)
+    strokes = np.arange(xy.shape[0])
+
+    side, other = ('right', 'left') if clip.handedness == 'right' else ('left', 'right')
+    wrist = xy[:, :, KEYPOINTS[f'{side}_wrist']]
+    elbow = xy[:, :, KEYPOINTS[f'{side}_elbow']]
+    opposite_shoulder = xy[:, :, KEYPOINTS[f'{other}_shoulder']]
+    shoulders = xy[:, :, [KEYPOINTS['left_shoulder'], KEYPOINTS['right_shoulder']]]
+    hips = xy[:, :, [KEYPOINTS['left_hip'], KEYPOINTS['right_hip']]]
+    ankles = xy[:, :, [KEYPOINTS['left_ankle'], KEYPOINTS['right_ankle']]]
+
+    # Frappes sans keypoints fiables: NaN attendus (pas d'avertissement "All-NaN slice")
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        # Longueur de buste par frappe (médiane sur les frames)
+        hip_center = hips.mean(axis=2)
+        torso = np.nanmedian(np.linalg.norm(shoulders.mean(axis=2) - hip_center, axis=-1), axis=1)
+
+        # Contact: vitesse max du poignet dominant
+        velocity = np.diff(wrist, axis=1)
+        speed = np.linalg.norm(velocity, axis=-1)
+        measurable = ~np.all(np.isnan(speed), axis=1)
+        contact = np.argmax(np.nan_to_num(speed, nan=-1.0), axis=1) + 1
+        at_contact = (strokes, contact)
+
+        stance = np.linalg.norm(ankles[:, :, 0] - ankles[:, :, 1], axis=-1)[at_contact] / torso
+
+        # Sens de la frappe = sens horizontal du poignet au contact
+        direction = np.sign(velocity[strokes, contact - 1, 0])
+        contact_point = (wrist[at_contact][:, 0] - hip_center[at_contact][:, 0]) * direction / torso
+
+        # Fin de geste: dernière frame où le poignet est visible
+        visible = ~np.isnan(wrist[..., 0])
+        last = wrist.shape[1] - 1 - np.argmax(visible[:, ::-1], axis=1)
+        follow_through = np.linalg.norm(wrist[strokes, last] - opposite_shoulder[strokes, last], axis=-1) / torso
+
+        # Rotation estimée par le raccourcissement apparent de la ligne d'épaules
+        width = np.linalg.norm(shoulders[:, :, 0] - shoulders[:, :, 1], axis=-1)
+        body_rotation = np.degrees(np.arccos(np.clip(np.nanmin(width, axis=1) / np.nanmax(width, axis=1), 0.0, 1.0)))
+
+        if xy.shape[2] > KEYPOINTS['racket_tip']:
+            racket = xy[:, :, KEYPOINTS['racket_tip']] - xy[:, :, KEYPOINTS['racket_butt']]
+            grip = _angle_deg((wrist - elbow)[at_contact], racket[at_contact])
+        else:
+            grip = np.full(xy.shape[0], np.nan)
+
+    metrics = {
+        'stance': stance,
+        'contact_point': contact_point,
+        'follow_through': follow_through,
+        'body_rotation': body_rotation,
+        'grip': grip
+    }
+    for values in metrics.values():
+        values[~measurable] = np.nan
+    metrics['contact_frame'] = np.where(measurable, contact, -1)
+    return metrics
+
+
+def _deviation(name: str, value: float) -> float:
+    """Écart à la plage cible, relatif à sa largeur (0 si dans la plage)"""
+    low, high = METRIC_RANGES[name]
+    return max(low - value, value - high, 0.0) / (high - low)
+
+
+def analyze_clip(clip: Clip) -> Dict[str, Any]:
+    """
+    Analyser un clip: métriques par frappe, médianes et erreur principale
+
+    Args:
+        clip: Clip à analyser
+
+    Returns:
+        dict: clip_id, angle, strokes, valid_strokes, metrics (médianes), consistency (écarts-types),
+              per_stroke, deviations, main_error (une seule erreur à la fois)
+    """
+    metrics = compute_metrics(clip)
+    contact_frame = metrics.pop('contact_frame')
+
+    medians, spreads, deviations = {}, {}, {}
+    for name, values in metrics.items():
+        if np.all(np.isnan(values)):
+            continue
+        medians[name] = round(float(np.nanmedian(values)), 3)
+        spreads[name] = round(float(np.nanstd(values)), 3)
+        deviations[name] = round(_deviation(name, medians[name]), 3)
+
+    worst = max(deviations, key=deviations.get, default=None)
+    return {
+        'clip_id': clip.clip_id,
+        'angle': clip.angle,
+        'strokes': int(clip.keypoints.shape[0]),
+        'valid_strokes': int(np.count_nonzero(contact_frame >= 0)),
+        'metrics': medians,
+        'consistency': spreads,
+        'per_stroke': {name: np.round(values.astype(np.float64), 3).tolist() for name, values in metrics.items()},
+        'deviations': deviations,
+        'main_error': worst if worst is not None and deviations[worst] > 0 else None
+    }
+
+
+def analyze_clips(paths: Iterable[str], **overrides) -> Iterator[Dict[str, Any]]:
+    """
+    Analyser des clips un par un (résultat disponible dès que chaque clip est traité)
+
+    Args:
+        paths: Fichiers `.npy` / `.json`
+        **overrides: Métadonnées imposées à tous les clips (voir `load_clip`)
+
+    Yields:
+        dict: Résultat de `analyze_clip` (ou `error` si le clip est illisible)
+    """
+    for path in paths:
+        try:
+            yield analyze_clip(load_clip(path, **overrides))
+        except (OSError, ValueError, KeyError) as e:
+            yield {'clip_id': os.path.basename(path), 'error': str(e)}
+
+
+def summarize_analysis(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Résumé compact de plusieurs clips (1-2 angles) pour le prompt de l'agent
+
+    Chaque métrique est la moyenne des médianes par clip, pondérée par le nombre de frappes valides.
+
+    Args:
+        results: Résultats de `analyze_clip`
+
+    Returns:
+        dict: clips, frappes, métriques, erreur_principale_id, confiance
+    """
+    results = [r for r in results if 'error' not in r and r['valid_strokes']]
+    metrics = {}
+    for name in METRIC_RANGES:
+        pairs = [(r['metrics'][name], r['valid_strokes']) for r in results if name in r['metrics']]
+        if pairs:
+            values, weights = np.array(pairs, dtype=np.float64).T
+            metrics[name] = round(float(np.average(values, weights=weights)), 2)
+
+    deviations = {name: _deviation(name, value) for name, value in metrics.items()}
+    worst = max(deviations, key=deviations.get, default=None)
+    strokes = sum(r['strokes'] for r in results)
+    valid = sum(r['valid_strokes'] for r in results)
+    return {
+        'clips': len(results),
+        'frappes': valid,
+        'angles': sorted({r['angle'] for r in results}),
+        'metriques': metrics,
+        'erreur_principale_id': worst if worst is not None and deviations[worst] > 0 else None,
+        'confiance': round(valid / strokes, 2) if strokes else 0.0
+    }
@@ -4,6 +4,26 @@ API clients pour Tennis AI
 
 from .bedrock_client import BedrockClient
 from .polly_client import PollyClient
+from .scheduler import AdmissionScheduler, OverloadedError
+from .single_flight import SingleFlight
 
-__all__ = ['BedrockClient', 'PollyClient']
+
+def get_coalescing_stats() -> dict:
+    """Compteurs de coalescence des clients Bedrock et Polly"""
+    return {
+        'bedrock': BedrockClient.inflight.stats(),
+        'polly': PollyClient.inflight.stats()
+    }
+
+
+def get_scheduler_stats() -> dict:
+    """Métriques d'admission (files, délestage, temps d'attente) des clients Bedrock et Polly"""
+    return {
+        'bedrock': BedrockClient.scheduler.stats(),
+        'polly': PollyClient.scheduler.stats()
+    }
+
+
+__all__ = ['BedrockClient', 'PollyClient', 'SingleFlight', 'AdmissionScheduler', 'OverloadedError',
+           'get_coalescing_stats', 'get_scheduler_stats']
 
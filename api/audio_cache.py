@@ -0,0 +1,92 @@
+"""
+Cache audio TTS partagé
+Audio synthétisé commun à toutes les sessions du processus (messages pré-écrits, warm-up)
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class AudioCache:
+    """Cache LRU thread-safe pour l'audio Polly, adossé optionnellement au stockage partagé"""
+
+    # Durée de vie des entrées dans le stockage partagé
+    SHARED_TTL_S = 7 * 24 * 3600
+
+    def __init__(self, max_entries: int = 256, backend=None):
+        """
+        Initialiser le cache
+
+        Args:
+            max_entries: Nombre maximum d'entrées conservées en mémoire
+            backend: SessionStore partagé entre réplicas (optionnel)
+        """
+        self.max_entries = max_entries
+        self.backend = backend
+        self._entries: "OrderedDict[Tuple[str, ...], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        text: str,
+        voice_id: str,
+        engine: str,
+        audio_format: str = 'mp3',
+        sample_rate: Optional[str] = None
+    ) -> Tuple[str, ...]:
+        """Clé de cache d'une synthèse (une entrée par encodage: mp3, ogg_vorbis, pcm/WAV)"""
+        return (text, voice_id, engine, audio_format, sample_rate or 'default')
+
+    @staticmethod
+    def _backend_key(key: Tuple[str, ...]) -> str:
+        return "tts:" + hashlib.sha256("\x1f".join(key).encode('utf-8')).hexdigest()
+
+    def get(self, key: Tuple[str, ...]) -> Optional[bytes]:
+        """
+        Lire une entrée (mémoire locale puis stockage partagé)
+
+        Args:
+            key: Clé retournée par `make_key`
+
+        Returns:
+            bytes: Audio ou None si absent
+        """
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+                return audio
+
+        if self.backend is not None:
+            audio = self.backend.get_blob(self._backend_key(key))
+            if audio is not None:
+                self._put_local(key, audio)
+        return audio
+
+    def put(self, key: Tuple[str, ...], audio: bytes) -> None:
+        """
+        Écrire une entrée (évince la plus ancienne si plein)
+
+        Args:
+            key: Clé retournée par `make_key`
+            audio: Audio synthétisé
+        """
+        self._put_local(key, audio)
+        if self.backend is not None:
+            self.backend.put_blob(self._backend_key(key), audio, ttl_s=self.SHARED_TTL_S)
+
+    def _put_local(self, key: Tuple[str, ...], audio: bytes) -> None:
+        with self._lock:
+            self._entries[key] = audio
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Instance partagée par le processus
+shared_audio_cache = AudioCache()
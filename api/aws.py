@@ -0,0 +1,79 @@
+"""
+Accès partagé aux clients AWS
+Import paresseux de boto3 et clients mis en commun pour tout le processus
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+
+# Taille du pool de connexions HTTP par client (sessions Streamlit concurrentes)
+MAX_POOL_CONNECTIONS = int(os.getenv('TENNIS_AI_MAX_POOL_CONNECTIONS', '32'))
+
+# Durées mesurées (ms) des imports et créations de clients, exposées par le warm-up
+TIMINGS: Dict[str, float] = {}
+
+_clients: Dict[Tuple[str, str], Any] = {}
+_lock = threading.Lock()
+
+
+def _timed(label: str, start: float) -> None:
+    TIMINGS[label] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def load_boto3():
+    """
+    Importer boto3 à la demande (coûteux: chargement de botocore)
+
+    Returns:
+        module: Module boto3
+    """
+    start = time.perf_counter()
+    import boto3
+    if 'import_boto3' not in TIMINGS:
+        _timed('import_boto3', start)
+    return boto3
+
+
+def get_client(service_name: str, region: str):
+    """
+    Obtenir un client boto3 partagé (thread-safe, créé une seule fois)
+
+    Les clients boto3 sont thread-safe: les partager entre sessions évite de recharger
+    les modèles de service et de refaire la poignée de main TLS à chaque session.
+
+    Args:
+        service_name: Nom du service ('bedrock-runtime', 'polly', ...)
+        region: Région AWS
+
+    Returns:
+        Client boto3
+    """
+    key = (service_name, region)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            boto3 = load_boto3()
+            from botocore.config import Config
+
+            start = time.perf_counter()
+            client = boto3.client(
+                service_name,
+                region_name=region,
+                config=Config(max_pool_connections=MAX_POOL_CONNECTIONS, tcp_keepalive=True)
+            )
+            _timed(f'client_{service_name}', start)
+            _clients[key] = client
+    return client
+
+
+def reset_clients() -> None:
+    """Oublier les clients partagés (ex: après changement de credentials)"""
+    with _lock:
+        _clients.clear()
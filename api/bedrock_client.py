@@ -3,15 +3,25 @@ Client AWS Bedrock pour Claude
 Gère les appels à l'API Claude via Bedrock
 """
 
-import boto3
+import hashlib
 import json
-from typing import List, Dict, Any, Optional
-from botocore.exceptions import ClientError
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from .aws import get_client
+from .scheduler import OverloadedError, scheduler_from_env
+from .single_flight import SingleFlight
 
 
 class BedrockClient:
     """Client pour AWS Bedrock (Claude)"""
     
+    # Coalescence des requêtes déterministes identiques (partagée par toutes les instances)
+    inflight = SingleFlight('bedrock')
+    
+    # Contrôle d'admission partagé: priorités, concurrence, budget de tokens par minute
+    scheduler = scheduler_from_env('bedrock', max_concurrency=16, tokens_per_minute=200000)
+    
     def __init__(self, region: str = 'eu-west-1', model_id: str = 'anthropic.claude-3-haiku-20240307-v1:0'):
         """
         Initialiser le client Bedrock
@@ -22,49 +32,275 @@ class BedrockClient:
         """
         self.region = region
         self.model_id = model_id
-        self.client = boto3.client('bedrock-runtime', region_name=region)
+        self.client = get_client('bedrock-runtime', region)
     
-    def chat(
-        self,
+    @staticmethod
+    def build_request_body(
         messages: List[Dict[str, Any]],
         system_prompt: str,
         max_tokens: int = 1024,
-        temperature: float = 0.7
-    ) -> Optional[str]:
+        temperature: float = 0.7,
+        stop_sequences: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """
-        Envoyer un message à Claude
+        Construire le corps de requête Messages API (online et batch)
         
         Args:
             messages: Historique des messages
             system_prompt: Prompt système
             max_tokens: Nombre max de tokens
             temperature: Température
+            stop_sequences: Séquences d'arrêt de la génération (optionnel)
             
         Returns:
-            str: Réponse de Claude ou None si erreur
+            dict: Corps de requête Bedrock
         """
-        request_body = {
+        body = {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": max_tokens,
             "temperature": temperature,
             "system": system_prompt,
             "messages": messages
         }
+        if stop_sequences:
+            body["stop_sequences"] = stop_sequences
+        return body
+    
+    def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+        stop_sequences: Optional[List[str]] = None,
+        priority: str = 'interactive',
+        session_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Envoyer un message à Claude
+        
+        Args:
+            messages: Historique des messages
+            system_prompt: Prompt système
+            max_tokens: Nombre max de tokens
+            temperature: Température
+            stop_sequences: Séquences d'arrêt (optionnel)
+            priority: Classe de priorité ('interactive', 'dashboard', 'background', 'batch')
+            session_id: Session appelante (limite de concurrence par session)
+            
+        Returns:
+            str: Réponse de Claude ou None si erreur
+        """
+        return self.chat_with_usage(messages, system_prompt, max_tokens, temperature, stop_sequences,
+                                    priority, session_id)[0]
+    
+    def chat_with_usage(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+        stop_sequences: Optional[List[str]] = None,
+        priority: str = 'interactive',
+        session_id: Optional[str] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Envoyer un message à Claude et retourner aussi l'usage
+        
+        Args:
+            messages: Historique des messages
+            system_prompt: Prompt système
+            max_tokens: Nombre max de tokens
+            temperature: Température
+            stop_sequences: Séquences d'arrêt (optionnel)
+            priority: Classe de priorité ('interactive', 'dashboard', 'background', 'batch')
+            session_id: Session appelante (limite de concurrence par session)
+            
+        Returns:
+            tuple: (réponse, usage: input_tokens, output_tokens, stop_reason)
+            
+        Raises:
+            OverloadedError: Appel délesté par le contrôle d'admission
+        """
+        request_body = self.build_request_body(messages, system_prompt, max_tokens, temperature, stop_sequences)
+        body = json.dumps(request_body)
+        
+        def invoke():
+            # Estimation: ~4 caractères par token en entrée + la sortie maximale
+            with self.scheduler.admit(priority, session_id, tokens=len(body) // 4 + max_tokens) as admitted:
+                text, usage = self._invoke(body)
+                admitted['tokens'] = usage.get('input_tokens', 0) + usage.get('output_tokens', 0)
+                return text, usage
+        
+        # Seules les requêtes déterministes peuvent partager une même réponse: synthèses
+        # d'élèves du coach et étape detection_niveau (les autres étapes sont à 0.3-0.7).
+        # Les appels rejoints ne consomment aucun slot d'admission; pas de partage entre
+        # priorités, pour ne pas hériter du délestage d'une classe moins prioritaire
+        if temperature == 0:
+            key = (self.region, self.model_id, priority, hashlib.sha256(body.encode('utf-8')).digest())
+            return self.inflight.do(key, invoke)
+        return invoke()
+    
+    def _invoke(self, body: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Appeler invoke_model avec un corps déjà sérialisé
+        
+        Args:
+            body: Corps de requête JSON
+            
+        Returns:
+            tuple: (réponse de Claude, usage)
+        """
+        from botocore.exceptions import ClientError
         
         try:
             response = self.client.invoke_model(
                 modelId=self.model_id,
-                body=json.dumps(request_body)
+                body=body
             )
             
             response_body = json.loads(response['body'].read())
-            return response_body['content'][0]['text']
+            usage = dict(response_body.get('usage', {}))
+            usage['stop_reason'] = response_body.get('stop_reason')
+            return response_body['content'][0]['text'], usage
             
         except ClientError as e:
             error_code = e.response['Error']['Code']
             error_message = e.response['Error']['Message']
+            # Quota AWS dépassé malgré l'admission (autres clients du même compte)
+            if error_code in ('ThrottlingException', 'ServiceQuotaExceededException'):
+                raise OverloadedError('bedrock', 'quota', error_message)
             raise Exception(f"Bedrock Error [{error_code}]: {error_message}")
         
         except Exception as e:
             raise Exception(f"Erreur inattendue: {str(e)}")
+    
+    # ==================== BATCH INFERENCE ====================
+    
+    # Minimum d'enregistrements accepté par un job Bedrock batch
+    BATCH_MIN_RECORDS = 100
+    
+    def submit_batch(
+        self,
+        records: Dict[str, Dict[str, Any]],
+        input_s3_uri: str,
+        output_s3_uri: str,
+        role_arn: str,
+        job_name: str
+    ) -> str:
+        """
+        Soumettre un job Bedrock batch (model invocation job)
+        
+        Args:
+            records: recordId -> corps de requête (voir `build_request_body`)
+            input_s3_uri: Préfixe S3 où déposer le fichier JSONL d'entrée
+            output_s3_uri: Préfixe S3 de sortie
+            role_arn: Rôle IAM utilisé par Bedrock pour lire/écrire S3
+            job_name: Nom unique du job
+            
+        Returns:
+            str: ARN du job
+        """
+        from botocore.exceptions import ClientError
+        
+        bucket, prefix = _split_s3_uri(input_s3_uri)
+        key = f"{prefix.rstrip('/')}/{job_name}.jsonl".lstrip('/')
+        body = "\n".join(
+            json.dumps({"recordId": record_id, "modelInput": model_input}, ensure_ascii=False)
+            for record_id, model_input in records.items()
+        )
+        
+        try:
+            get_client('s3', self.region).put_object(Bucket=bucket, Key=key, Body=body.encode('utf-8'))
+            response = get_client('bedrock', self.region).create_model_invocation_job(
+                jobName=job_name,
+                roleArn=role_arn,
+                modelId=self.model_id,
+                inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{bucket}/{key}"}},
+                outputDataConfig={"s3OutputDataConfig": {"s3Uri": output_s3_uri}}
+            )
+            return response['jobArn']
+            
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            raise Exception(f"Bedrock Batch Error [{error_code}]: {error_message}")
+    
+    def wait_batch(self, job_arn: str, poll_interval: float = 30.0, timeout_s: float = 24 * 3600) -> str:
+        """
+        Attendre la fin d'un job batch
+        
+        Args:
+            job_arn: ARN du job
+            poll_interval: Intervalle de polling en secondes
+            timeout_s: Délai maximal d'attente; au-delà, le job est arrêté
+            
+        Returns:
+            str: Statut final ('Completed', 'PartiallyCompleted', ...)
+            
+        Raises:
+            TimeoutError: Le job n'est pas terminé avant l'échéance
+        """
+        client = get_client('bedrock', self.region)
+        deadline = time.monotonic() + timeout_s
+        while True:
+            status = client.get_model_invocation_job(jobIdentifier=job_arn)['status']
+            if status in ('Completed', 'PartiallyCompleted', 'Failed', 'Stopped', 'Expired'):
+                return status
+            if time.monotonic() >= deadline:
+                # Ne pas laisser tourner (et facturer) un job que plus personne n'attend
+                try:
+                    client.stop_model_invocation_job(jobIdentifier=job_arn)
+                except Exception:
+                    pass
+                raise TimeoutError(f"Job batch {job_arn} toujours '{status}' après {timeout_s:.0f}s")
+            time.sleep(min(poll_interval, max(0.0, deadline - time.monotonic())))
+    
+    def read_batch_results(
+        self,
+        job_arn: str,
+        output_s3_uri: str
+    ) -> Dict[str, Optional[Tuple[str, Dict[str, Any]]]]:
+        """
+        Lire les sorties d'un job batch terminé
+        
+        Args:
+            job_arn: ARN du job
+            output_s3_uri: Préfixe S3 de sortie passé à `submit_batch`
+            
+        Returns:
+            dict: recordId -> (texte de réponse, usage) comme `chat_with_usage`
+                  (None si l'enregistrement a échoué)
+        """
+        s3 = get_client('s3', self.region)
+        bucket, prefix = _split_s3_uri(output_s3_uri)
+        # Bedrock écrit sous <prefix>/<job_id>/<fichier d'entrée>.jsonl.out
+        job_prefix = f"{prefix.rstrip('/')}/{job_arn.split('/')[-1]}/".lstrip('/')
+        
+        results = {}
+        paginator = s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=job_prefix):
+            for obj in page.get('Contents', []):
+                if not obj['Key'].endswith('.jsonl.out'):
+                    continue
+                lines = s3.get_object(Bucket=bucket, Key=obj['Key'])['Body'].read().decode('utf-8')
+                for line in lines.splitlines():
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    output = record.get('modelOutput')
+                    if not output:
+                        results[record['recordId']] = None
+                        continue
+                    usage = dict(output.get('usage', {}))
+                    usage['stop_reason'] = output.get('stop_reason')
+                    results[record['recordId']] = (output['content'][0]['text'], usage)
+        return results
+
 
+def _split_s3_uri(uri: str):
+    """Découper s3://bucket/prefix en (bucket, prefix)"""
+    if not uri.startswith('s3://'):
+        raise ValueError(f"URI S3 invalide: {uri}")
+    bucket, _, prefix = uri[len('s3://'):].partition('/')
+    return bucket, prefix
@@ -0,0 +1,149 @@
+"""
+Stand-ins locaux des clients AWS
+Remplacent Bedrock et Polly hors-ligne (benchmarks, tests de charge) avec des latences réalistes
+"""
+
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .scheduler import AdmissionScheduler
+
+
+class LocalBedrockClient:
+    """Stand-in de BedrockClient: latence log-normale + débit de sortie par token"""
+
+    REPLIES = {
+        'fr': "Super! Et quel est ton objectif principal au tennis?",
+        'en': "Great! And what is your main tennis goal?"
+    }
+
+    def __init__(
+        self,
+        first_token_ms: float = 400.0,
+        sigma: float = 0.35,
+        tokens_per_s: float = 120.0,
+        output_tokens: int = 24,
+        max_concurrency: Optional[int] = None,
+        seed: Optional[int] = None,
+        scheduler: Optional[AdmissionScheduler] = None
+    ):
+        """
+        Initialiser le stand-in
+
+        Args:
+            first_token_ms: Latence médiane avant le premier token
+            sigma: Dispersion log-normale de cette latence
+            tokens_per_s: Débit de génération
+            output_tokens: Nombre de tokens de chaque réponse
+            max_concurrency: Appels simultanés servis (quota simulé; au-delà, file d'attente)
+            seed: Graine aléatoire (reproductibilité)
+            scheduler: Contrôle d'admission appliqué comme par BedrockClient (optionnel)
+        """
+        self.region = 'local'
+        self.model_id = 'local-stand-in'
+        self.scheduler = scheduler
+        self.first_token_ms = first_token_ms
+        self.sigma = sigma
+        self.tokens_per_s = tokens_per_s
+        self.output_tokens = output_tokens
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self.calls = 0
+
+    def _sample_latency_s(self, max_tokens: int) -> float:
+        with self._lock:
+            first_token = self._random.lognormvariate(0, self.sigma) * self.first_token_ms / 1000
+            self.calls += 1
+        return first_token + min(self.output_tokens, max_tokens) / self.tokens_per_s
+
+    def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+        stop_sequences: Optional[List[str]] = None,
+        priority: str = 'interactive',
+        session_id: Optional[str] = None
+    ) -> Optional[str]:
+        """Même signature que BedrockClient.chat"""
+        return self.chat_with_usage(messages, system_prompt, max_tokens, temperature, stop_sequences,
+                                    priority, session_id)[0]
+
+    def chat_with_usage(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: str,
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+        stop_sequences: Optional[List[str]] = None,
+        priority: str = 'interactive',
+        session_id: Optional[str] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Même signature que BedrockClient.chat_with_usage (admission seulement si `scheduler` est fourni)"""
+        if self.scheduler is not None:
+            with self.scheduler.admit(priority, session_id, tokens=max_tokens) as admitted:
+                text, usage = self._serve(system_prompt, max_tokens)
+                admitted['tokens'] = usage['input_tokens'] + usage['output_tokens']
+                return text, usage
+        return self._serve(system_prompt, max_tokens)
+
+    def _serve(self, system_prompt: str, max_tokens: int) -> Tuple[str, Dict[str, Any]]:
+        latency_s = self._sample_latency_s(max_tokens)
+        if self._slots is None:
+            time.sleep(latency_s)
+        else:
+            with self._slots:
+                time.sleep(latency_s)
+        language = 'fr' if 'FRANÇAIS' in system_prompt else 'en'
+        output_tokens = min(self.output_tokens, max_tokens)
+        usage = {
+            'input_tokens': len(system_prompt) // 4,
+            'output_tokens': output_tokens,
+            'stop_reason': 'end_turn' if output_tokens == self.output_tokens else 'max_tokens'
+        }
+        return self.REPLIES[language], usage
+
+
+class LocalPollyClient:
+    """Stand-in de PollyClient: latence proportionnelle à la longueur du texte"""
+
+    VOICES = {'fr': {'voice_id': 'Lea', 'engine': 'neural', 'language_code': 'fr-FR'},
+              'en': {'voice_id': 'Joanna', 'engine': 'neural', 'language_code': 'en-US'}}
+
+    def __init__(self, language: str = 'fr', base_ms: float = 150.0, ms_per_char: float = 1.5,
+                 sigma: float = 0.25, seed: Optional[int] = None):
+        """
+        Initialiser le stand-in
+
+        Args:
+            language: Langue
+            base_ms: Latence médiane fixe
+            ms_per_char: Latence additionnelle par caractère
+            sigma: Dispersion log-normale
+            seed: Graine aléatoire
+        """
+        self.region = 'local'
+        self.language = language
+        self.voice_config = self.VOICES.get(language, self.VOICES['fr'])
+        self.base_ms = base_ms
+        self.ms_per_char = ms_per_char
+        self.sigma = sigma
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def synthesize(self, text: str, voice_id: Optional[str] = None, engine: Optional[str] = None,
+                   audio_format: str = 'mp3', sample_rate: Optional[str] = None,
+                   priority: str = 'interactive', session_id: Optional[str] = None) -> bytes:
+        """Même signature que PollyClient.synthesize (audio factice, ~16 ko/s)"""
+        with self._lock:
+            factor = self._random.lognormvariate(0, self.sigma)
+        time.sleep(factor * (self.base_ms + self.ms_per_char * len(text)) / 1000)
+        return b"\x00" * (len(text) * 200)
+
+    def set_language(self, language: str):
+        self.language = language
+        self.voice_config = self.VOICES.get(language, self.VOICES['fr'])
@@ -3,14 +3,24 @@ Client AWS Polly pour Text-to-Speech
 Génération audio à la demande (lazy loading)
 """
 
-import boto3
-from typing import Optional
-from botocore.exceptions import ClientError
+import io
+import wave
+from typing import Optional, Tuple
+
+from .aws import get_client
+from .scheduler import OverloadedError, scheduler_from_env
+from .single_flight import SingleFlight
 
 
 class PollyClient:
     """Client pour AWS Polly (TTS)"""
     
+    # Coalescence des synthèses identiques (partagée par toutes les instances)
+    inflight = SingleFlight('polly')
+    
+    # Contrôle d'admission partagé (budget optionnel en caractères par minute)
+    scheduler = scheduler_from_env('polly', max_concurrency=8)
+    
     # Configuration des voix par langue
     VOICES = {
         'fr': {
@@ -25,6 +35,14 @@ class PollyClient:
         }
     }
     
+    # Formats de sortie Polly: type MIME servi et fréquences d'échantillonnage autorisées.
+    # Le PCM brut est encapsulé en WAV pour être lisible par le navigateur.
+    AUDIO_FORMATS = {
+        'mp3': {'content_type': 'audio/mpeg', 'sample_rates': ('8000', '16000', '22050', '24000')},
+        'ogg_vorbis': {'content_type': 'audio/ogg', 'sample_rates': ('8000', '16000', '22050', '24000')},
+        'pcm': {'content_type': 'audio/wav', 'sample_rates': ('8000', '16000')}
+    }
+    
     def __init__(self, region: str = 'eu-west-1', language: str = 'fr'):
         """
         Initialiser le client Polly
@@ -35,16 +53,93 @@ class PollyClient:
         """
         self.region = region
         self.language = language.lower()
-        self.client = boto3.client('polly', region_name=region)
+        self.client = get_client('polly', region)
         
         # Récupérer la configuration de la voix
         self.voice_config = self.VOICES.get(self.language, self.VOICES['fr'])
     
+    @classmethod
+    def content_type(cls, audio_format: str) -> str:
+        """
+        Type MIME servi pour un format de sortie
+        
+        Args:
+            audio_format: 'mp3', 'ogg_vorbis' ou 'pcm'
+            
+        Returns:
+            str: Type MIME
+        """
+        return cls.AUDIO_FORMATS[audio_format]['content_type']
+    
+    @classmethod
+    def check_format(cls, audio_format: str, sample_rate: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """
+        Valider un format de sortie et sa fréquence d'échantillonnage
+        
+        Args:
+            audio_format: 'mp3', 'ogg_vorbis' ou 'pcm'
+            sample_rate: Fréquence en Hz (optionnel; 16000 imposé pour le PCM)
+            
+        Returns:
+            tuple: (format, fréquence ou None pour la valeur par défaut)
+            
+        Raises:
+            ValueError: Format ou fréquence non supportés par Polly
+        """
+        if audio_format not in cls.AUDIO_FORMATS:
+            raise ValueError(f"Format audio non supporté: {audio_format}")
+        if audio_format == 'pcm' and sample_rate is None:
+            sample_rate = '16000'
+        if sample_rate is not None and sample_rate not in cls.AUDIO_FORMATS[audio_format]['sample_rates']:
+            raise ValueError(f"Fréquence {sample_rate} Hz non supportée pour {audio_format}")
+        return audio_format, sample_rate
+    
+    @classmethod
+    def parse_format(cls, spec: str) -> Tuple[str, Optional[str]]:
+        """
+        Lire un format forcé 'format[:fréquence]' (ex: TENNIS_AI_AUDIO_FORMAT='ogg_vorbis:16000')
+        
+        Returns:
+            tuple: (format, fréquence ou None)
+            
+        Raises:
+            ValueError: Format ou fréquence non supportés
+        """
+        audio_format, _, sample_rate = spec.strip().partition(':')
+        return cls.check_format(audio_format, sample_rate or None)
+    
+    @staticmethod
+    def choose_format(user_agent: Optional[str]) -> Tuple[str, Optional[str]]:
+        """
+        Choisir le format audio selon les capacités du client
+        
+        - Mobile Android/Chrome: Ogg Vorbis 16 kHz (le plus compact pour la voix)
+        - iPhone/iPad/Safari: MP3 16 kHz (lecture Ogg non garantie)
+        - Desktop: MP3 à la fréquence par défaut de la voix
+        
+        Args:
+            user_agent: En-tête User-Agent du navigateur (optionnel)
+            
+        Returns:
+            tuple: (format, fréquence d'échantillonnage ou None pour la valeur par défaut)
+        """
+        ua = (user_agent or '').lower()
+        apple = 'iphone' in ua or 'ipad' in ua or ('safari' in ua and 'chrome' not in ua and 'android' not in ua)
+        if apple:
+            return 'mp3', '16000'
+        if 'mobile' in ua or 'android' in ua:
+            return 'ogg_vorbis', '16000'
+        return 'mp3', None
+    
     def synthesize(
         self,
         text: str,
         voice_id: Optional[str] = None,
-        engine: Optional[str] = None
+        engine: Optional[str] = None,
+        audio_format: str = 'mp3',
+        sample_rate: Optional[str] = None,
+        priority: str = 'interactive',
+        session_id: Optional[str] = None
     ) -> Optional[bytes]:
         """
         Convertir du texte en audio (LAZY - appelé seulement au clic)
@@ -53,28 +148,81 @@ class PollyClient:
             text: Texte à synthétiser
             voice_id: ID de la voix (optionnel, utilise la config de langue par défaut)
             engine: Engine (optionnel, utilise la config de langue par défaut)
+            audio_format: 'mp3', 'ogg_vorbis' ou 'pcm' (PCM retourné encapsulé en WAV)
+            sample_rate: Fréquence d'échantillonnage en Hz (optionnel, défaut Polly)
+            priority: Classe de priorité ('interactive', 'background', 'batch')
+            session_id: Session appelante (limite de concurrence par session)
             
         Returns:
-            bytes: Audio MP3 ou None si erreur
+            bytes: Audio encodé ou None si erreur
+            
+        Raises:
+            OverloadedError: Synthèse délestée par le contrôle d'admission
         """
         voice_id = voice_id or self.voice_config['voice_id']
         engine = engine or self.voice_config['engine']
         language_code = self.voice_config['language_code']
         
+        audio_format, sample_rate = self.check_format(audio_format, sample_rate)
+        
+        def synthesize():
+            with self.scheduler.admit(priority, session_id, tokens=len(text)):
+                return self._synthesize(text, voice_id, engine, language_code, audio_format, sample_rate)
+        
+        # Les synthèses identiques simultanées (ex: message d'accueil) partagent un seul appel.
+        # La priorité fait partie de la clé: un appel interactif ne rejoint jamais un leader
+        # 'background' (délesté sans attente) et n'hérite donc pas de son OverloadedError.
+        key = (self.region, text, voice_id, engine, language_code, audio_format, sample_rate, priority)
+        return self.inflight.do(key, synthesize)
+    
+    def _synthesize(
+        self,
+        text: str,
+        voice_id: str,
+        engine: str,
+        language_code: str,
+        audio_format: str = 'mp3',
+        sample_rate: Optional[str] = None
+    ) -> bytes:
+        """
+        Appeler synthesize_speech
+        
+        Args:
+            text: Texte à synthétiser
+            voice_id: ID de la voix
+            engine: Engine Polly
+            language_code: Code de langue
+            audio_format: Format de sortie Polly
+            sample_rate: Fréquence d'échantillonnage (optionnel)
+            
+        Returns:
+            bytes: Audio encodé
+        """
+        from botocore.exceptions import ClientError
+        
+        params = {
+            'Text': text,
+            'OutputFormat': audio_format,
+            'VoiceId': voice_id,
+            'Engine': engine,
+            'LanguageCode': language_code
+        }
+        if sample_rate is not None:
+            params['SampleRate'] = sample_rate
+        
         try:
-            response = self.client.synthesize_speech(
-                Text=text,
-                OutputFormat='mp3',
-                VoiceId=voice_id,
-                Engine=engine,
-                LanguageCode=language_code
-            )
+            response = self.client.synthesize_speech(**params)
+            audio = response['AudioStream'].read()
             
-            return response['AudioStream'].read()
+            if audio_format == 'pcm':
+                return _wrap_wav(audio, int(sample_rate))
+            return audio
             
         except ClientError as e:
             error_code = e.response['Error']['Code']
             error_message = e.response['Error']['Message']
+            if error_code == 'ThrottlingException':
+                raise OverloadedError('polly', 'quota', error_message)
             raise Exception(f"Polly Error [{error_code}]: {error_message}")
         
         except Exception as e:
@@ -107,3 +255,15 @@ class PollyClient:
             print(f"Erreur récupération voix: {e}")
             return []
 
+
+
+
+def _wrap_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Encapsuler du PCM 16 bits mono (sortie Polly) dans un conteneur WAV"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
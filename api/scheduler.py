@@ -0,0 +1,318 @@
+"""
+Contrôle d'admission des appels aux modèles (Bedrock, Polly)
+Classes de priorité, limites de concurrence globale et par session, budget de tokens par minute
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+
+# Classes de priorité (plus petit = plus prioritaire)
+PRIORITIES = {
+    'interactive': 0,   # Tour de conversation d'un utilisateur connecté
+    'dashboard': 1,     # Diffusion attendue par un utilisateur (résumés du tableau de bord coach)
+    'background': 2,    # Travail spéculatif (préchargement TTS)
+    'batch': 3          # Runs hors-ligne (simulations, exports)
+}
+
+# Attente maximale avant délestage, par classe (secondes)
+DEFAULT_MAX_WAIT_S = {
+    'interactive': 10.0,
+    'dashboard': 15.0,   # Fait la queue hors des slots réservés, délesté seulement après attente
+    'background': 0.0,   # Le spéculatif ne fait jamais la queue: ignoré si pas de place
+    'batch': 120.0
+}
+
+
+class OverloadedError(Exception):
+    """Appel refusé par le contrôle d'admission (service saturé)"""
+
+    def __init__(self, service: str, priority: str, reason: str, retry_after_s: float = 1.0):
+        self.service = service
+        self.priority = priority
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+        super().__init__(f"{service} saturé ({priority}: {reason}), réessayer dans {retry_after_s:.0f}s")
+
+
+class _Ticket:
+    """Demande d'admission en attente ou en cours"""
+
+    __slots__ = ('rank', 'priority', 'session_id', 'tokens')
+
+    def __init__(self, rank, priority: str, session_id: Optional[str], tokens: int):
+        self.rank = rank
+        self.priority = priority
+        self.session_id = session_id
+        self.tokens = tokens
+
+    def __lt__(self, other: '_Ticket') -> bool:
+        return self.rank < other.rank
+
+
+class AdmissionScheduler:
+    """Ordonnanceur d'admission thread-safe pour un service"""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        per_session: int = 2,
+        tokens_per_minute: Optional[int] = None,
+        reserved_share: float = 0.25,
+        max_wait_s: Optional[Dict[str, float]] = None,
+        max_queue: int = 64
+    ):
+        """
+        Initialiser l'ordonnanceur
+
+        Args:
+            name: Nom du service (pour les métriques et les erreurs)
+            max_concurrency: Appels simultanés maximum
+            per_session: Appels simultanés maximum par session
+            tokens_per_minute: Budget de tokens glissant (None = illimité)
+            reserved_share: Part des slots et du budget réservée au trafic interactif
+            max_wait_s: Attente maximale par classe avant délestage
+            max_queue: Taille maximale de la file (au-delà, délestage immédiat)
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.per_session = per_session
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait_s = dict(DEFAULT_MAX_WAIT_S, **(max_wait_s or {}))
+        self.max_queue = max_queue
+
+        # Le travail non interactif ne peut jamais occuper les slots et le budget réservés
+        self._background_slots = max(1, max_concurrency - max(1, int(max_concurrency * reserved_share)))
+        self._reserved_tokens = int((tokens_per_minute or 0) * reserved_share)
+
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._in_flight_by_class = {p: 0 for p in PRIORITIES}
+        self._in_flight_by_session: Dict[str, int] = {}
+        self._tokens = float(tokens_per_minute or 0)
+        self._refilled_at = time.monotonic()
+
+        self._admitted = {p: 0 for p in PRIORITIES}
+        self._shed = {p: 0 for p in PRIORITIES}
+        self._queue_ms = {p: deque(maxlen=1024) for p in PRIORITIES}
+
+    # ==================== BUDGET ====================
+
+    def _refill(self) -> None:
+        if self.tokens_per_minute is None:
+            return
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.tokens_per_minute),
+            self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60.0
+        )
+        self._refilled_at = now
+
+    def _token_floor(self, priority: str) -> int:
+        return 0 if priority == 'interactive' else self._reserved_tokens
+
+    def _token_wait_s(self, ticket: _Ticket) -> float:
+        """Temps avant que le budget couvre la demande (0 si déjà couvert)"""
+        if self.tokens_per_minute is None:
+            return 0.0
+        missing = ticket.tokens + self._token_floor(ticket.priority) - self._tokens
+        return max(0.0, missing * 60.0 / self.tokens_per_minute)
+
+    # ==================== ADMISSION ====================
+
+    def _session_full(self, ticket: _Ticket) -> bool:
+        return (ticket.session_id is not None
+                and self._in_flight_by_session.get(ticket.session_id, 0) >= self.per_session)
+
+    def _can_grant(self, ticket: _Ticket) -> bool:
+        # Ne jamais doubler une demande plus prioritaire (ou plus ancienne) qui pourrait partir
+        for other in self._waiting:
+            if other is not ticket and other.rank < ticket.rank and not self._session_full(other):
+                return False
+        if self._session_full(ticket):
+            return False
+        if self._in_flight >= self.max_concurrency:
+            return False
+        if ticket.priority != 'interactive':
+            background = self._in_flight - self._in_flight_by_class['interactive']
+            if background >= self._background_slots:
+                return False
+        return self._token_wait_s(ticket) == 0.0
+
+    def _grant(self, ticket: _Ticket) -> None:
+        self._in_flight += 1
+        self._in_flight_by_class[ticket.priority] += 1
+        if ticket.session_id is not None:
+            self._in_flight_by_session[ticket.session_id] = self._in_flight_by_session.get(ticket.session_id, 0) + 1
+        if self.tokens_per_minute is not None:
+            self._tokens -= ticket.tokens
+
+    def _release(self, ticket: _Ticket, actual_tokens: Optional[int]) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._in_flight_by_class[ticket.priority] -= 1
+            if ticket.session_id is not None:
+                remaining = self._in_flight_by_session[ticket.session_id] - 1
+                if remaining:
+                    self._in_flight_by_session[ticket.session_id] = remaining
+                else:
+                    del self._in_flight_by_session[ticket.session_id]
+            # Restituer (ou prélever) l'écart entre l'estimation et l'usage réel
+            if self.tokens_per_minute is not None and actual_tokens is not None:
+                self._refill()
+                self._tokens = min(float(self.tokens_per_minute), self._tokens + ticket.tokens - actual_tokens)
+            self._cond.notify_all()
+
+    def _shed_ticket(self, ticket: _Ticket, reason: str, retry_after_s: float) -> OverloadedError:
+        self._shed[ticket.priority] += 1
+        return OverloadedError(self.name, ticket.priority, reason, max(1.0, retry_after_s))
+
+    def acquire(self, priority: str = 'interactive', session_id: Optional[str] = None, tokens: int = 0) -> _Ticket:
+        """
+        Attendre un slot d'exécution (voir `admit` pour l'usage normal)
+
+        Args:
+            priority: Classe de priorité (voir PRIORITIES)
+            session_id: Session appelante (limite par session)
+            tokens: Tokens estimés de l'appel (budget par minute)
+
+        Returns:
+            _Ticket: Ticket à rendre avec `release`
+
+        Raises:
+            OverloadedError: File pleine ou attente maximale dépassée
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Priorité inconnue: {priority} (attendu: {', '.join(PRIORITIES)})")
+        if self.tokens_per_minute is not None:
+            tokens = min(tokens, self.tokens_per_minute - self._token_floor(priority))
+
+        start = time.perf_counter()
+        deadline = start + self.max_wait_s[priority]
+        ticket = _Ticket((PRIORITIES[priority], next(self._sequence)), priority, session_id, tokens)
+
+        with self._cond:
+            self._refill()
+            if self._can_grant(ticket):
+                self._grant(ticket)
+            else:
+                if len(self._waiting) >= self.max_queue:
+                    raise self._shed_ticket(ticket, "file pleine", 1.0)
+                heapq.heappush(self._waiting, ticket)
+                try:
+                    while True:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            reason = "attente trop longue" if self.max_wait_s[priority] else "aucun slot libre"
+                            raise self._shed_ticket(ticket, reason, self._token_wait_s(ticket))
+                        # Réveil au plus tard quand le budget de tokens sera reconstitué
+                        self._cond.wait(min(remaining, self._token_wait_s(ticket) or remaining))
+                        self._refill()
+                        if self._can_grant(ticket):
+                            self._grant(ticket)
+                            break
+                finally:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+
+            self._admitted[priority] += 1
+            self._queue_ms[priority].append((time.perf_counter() - start) * 1000)
+        return ticket
+
+    def release(self, ticket: _Ticket, actual_tokens: Optional[int] = None) -> None:
+        """
+        Rendre un slot obtenu par `acquire`
+
+        Args:
+            ticket: Ticket d'admission
+            actual_tokens: Tokens réellement consommés (corrige l'estimation)
+        """
+        self._release(ticket, actual_tokens)
+
+    @contextmanager
+    def admit(self, priority: str = 'interactive', session_id: Optional[str] = None,
+              tokens: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Exécuter un appel sous contrôle d'admission
+
+        Usage:
+            with scheduler.admit('interactive', session_id, tokens=estimate) as usage:
+                ...
+                usage['tokens'] = actual   # optionnel: usage réel
+
+        Raises:
+            OverloadedError: Appel délesté (aucun appel n'a été fait)
+        """
+        ticket = self.acquire(priority, session_id, tokens)
+        usage: Dict[str, Any] = {'tokens': None}
+        try:
+            yield usage
+        finally:
+            self._release(ticket, usage['tokens'])
+
+    # ==================== MÉTRIQUES ====================
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Métriques de l'ordonnanceur
+
+        Returns:
+            dict: in_flight, waiting, tokens disponibles et, par classe: admitted, shed,
+                  temps de file p50/p95/max (ms, 1024 derniers appels admis)
+        """
+        with self._cond:
+            self._refill()
+            classes = {}
+            for priority in PRIORITIES:
+                samples = sorted(self._queue_ms[priority])
+                classes[priority] = {
+                    "admitted": self._admitted[priority],
+                    "shed": self._shed[priority],
+                    "in_flight": self._in_flight_by_class[priority],
+                    "waiting": sum(1 for t in self._waiting if t.priority == priority),
+                    "queue_p50_ms": round(samples[len(samples) // 2], 1) if samples else 0.0,
+                    "queue_p95_ms": round(samples[int(len(samples) * 0.95)], 1) if samples else 0.0,
+                    "queue_max_ms": round(samples[-1], 1) if samples else 0.0
+                }
+            return {
+                "name": self.name,
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiting),
+                "tokens_available": None if self.tokens_per_minute is None else int(self._tokens),
+                "classes": classes
+            }
+
+
+def scheduler_from_env(name: str, max_concurrency: int, tokens_per_minute: Optional[int] = None) -> AdmissionScheduler:
+    """
+    Créer l'ordonnanceur d'un service, surchargeable par variables d'environnement
+
+    TENNIS_AI_<NAME>_CONCURRENCY, TENNIS_AI_<NAME>_PER_SESSION, TENNIS_AI_<NAME>_TPM (0 = illimité)
+
+    Args:
+        name: Nom du service (ex: 'bedrock')
+        max_concurrency: Concurrence par défaut
+        tokens_per_minute: Budget par défaut
+
+    Returns:
+        AdmissionScheduler: Ordonnanceur configuré
+    """
+    prefix = f"TENNIS_AI_{name.upper()}"
+    tpm = int(os.getenv(f"{prefix}_TPM", tokens_per_minute or 0)) or None
+    return AdmissionScheduler(
+        name,
+        max_concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", max_concurrency)),
+        per_session=int(os.getenv(f"{prefix}_PER_SESSION", 2)),
+        tokens_per_minute=tpm
+    )
@@ -0,0 +1,94 @@
+"""
+Coalescence des requêtes identiques (single-flight)
+Les appelants concurrents avec la même clé partagent un seul appel en cours et son résultat
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    """Appel en cours partagé entre appelants"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Groupe single-flight thread-safe avec compteurs"""
+
+    def __init__(self, name: str):
+        """
+        Initialiser le groupe
+
+        Args:
+            name: Nom du groupe (pour les métriques)
+        """
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.deduplicated = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Exécuter `fn` ou rejoindre l'appel identique déjà en cours
+
+        Seuls les appels simultanés sont partagés: une fois terminé, l'appel suivant
+        avec la même clé est réexécuté (aucun cache).
+
+        Args:
+            key: Clé de requête (hashable)
+            fn: Appel à exécuter
+
+        Returns:
+            Résultat de l'appel (l'exception du leader est relancée chez tous les appelants)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.deduplicated += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Compteurs du groupe
+
+        Returns:
+            dict: calls (appels réellement exécutés), deduplicated (appels évités), in_flight
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "calls": self.calls,
+                "deduplicated": self.deduplicated,
+                "in_flight": len(self._calls)
+            }
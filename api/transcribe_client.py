@@ -0,0 +1,219 @@
+"""
+Speech-to-text en streaming pour Tennis AI
+Interface commune, backend AWS Transcribe Streaming et stand-in local hors-ligne
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from typing import Iterable, Optional
+
+
+class TranscriptionStream:
+    """Flux de transcription d'un tour vocal"""
+
+    def send(self, chunk: bytes) -> Optional[str]:
+        """
+        Envoyer un chunk audio (PCM 16 bits mono)
+
+        Args:
+            chunk: Audio brut
+
+        Returns:
+            str: Transcription partielle courante ou None si inchangée
+        """
+        raise NotImplementedError
+
+    def finish(self) -> str:
+        """
+        Terminer le flux et attendre la transcription finale
+
+        Returns:
+            str: Transcription finale
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Libérer les ressources du flux (idempotent; à appeler aussi après un échec)"""
+
+    def __enter__(self) -> 'TranscriptionStream':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class TranscriptionBackend:
+    """Backend de transcription (interface)"""
+
+    def start_stream(self, language: str = 'fr', sample_rate: int = 16000) -> TranscriptionStream:
+        """
+        Ouvrir un flux de transcription
+
+        Args:
+            language: 'fr' ou 'en'
+            sample_rate: Fréquence d'échantillonnage en Hz
+
+        Returns:
+            TranscriptionStream: Flux ouvert
+        """
+        raise NotImplementedError
+
+
+# ==================== STAND-IN LOCAL ====================
+
+class _LocalStream(TranscriptionStream):
+    """Flux local: révèle le texte attendu au prorata de l'audio reçu"""
+
+    def __init__(self, transcript: str, bytes_per_word: int, chunk_latency_s: float, finalize_latency_s: float):
+        self.words = transcript.split()
+        self.bytes_per_word = bytes_per_word
+        self.chunk_latency_s = chunk_latency_s
+        self.finalize_latency_s = finalize_latency_s
+        self.received = 0
+        self.revealed = 0
+
+    def send(self, chunk: bytes) -> Optional[str]:
+        if self.chunk_latency_s:
+            time.sleep(self.chunk_latency_s)
+        self.received += len(chunk)
+        revealed = min(len(self.words), self.received // self.bytes_per_word)
+        if revealed == self.revealed:
+            return None
+        self.revealed = revealed
+        return " ".join(self.words[:revealed])
+
+    def finish(self) -> str:
+        if self.finalize_latency_s:
+            time.sleep(self.finalize_latency_s)
+        return " ".join(self.words)
+
+
+class LocalTranscriber(TranscriptionBackend):
+    """Stand-in hors-ligne pour les tests et benchmarks (aucun appel réseau)"""
+
+    def __init__(
+        self,
+        transcripts: Iterable[str],
+        bytes_per_word: int = 12800,
+        chunk_latency_ms: float = 0.0,
+        finalize_latency_ms: float = 0.0
+    ):
+        """
+        Initialiser le stand-in
+
+        Args:
+            transcripts: Textes "prononcés", utilisés un par flux (en boucle)
+            bytes_per_word: Audio nécessaire pour révéler un mot (défaut: 0,4 s à 16 kHz)
+            chunk_latency_ms: Temps de traitement simulé par chunk
+            finalize_latency_ms: Temps simulé de la finalisation après le dernier chunk
+        """
+        self._transcripts = itertools.cycle(list(transcripts))
+        self._lock = threading.Lock()
+        self.bytes_per_word = bytes_per_word
+        self.chunk_latency_s = chunk_latency_ms / 1000
+        self.finalize_latency_s = finalize_latency_ms / 1000
+
+    def start_stream(self, language: str = 'fr', sample_rate: int = 16000) -> TranscriptionStream:
+        with self._lock:
+            transcript = next(self._transcripts)
+        return _LocalStream(transcript, self.bytes_per_word, self.chunk_latency_s, self.finalize_latency_s)
+
+
+# ==================== AWS TRANSCRIBE STREAMING ====================
+
+class _TranscribeStream(TranscriptionStream):
+    """Flux AWS Transcribe piloté depuis une boucle asyncio dédiée"""
+
+    def __init__(self, region: str, language_code: str, sample_rate: int):
+        from amazon_transcribe.client import TranscribeStreamingClient
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='transcribe-stream', daemon=True)
+        self._thread.start()
+
+        self._final_segments = []
+        self._partial = ""
+        self._lock = threading.Lock()
+        self._reader = None
+
+        try:
+            client = TranscribeStreamingClient(region=region)
+            self._stream = self._run(client.start_stream_transcription(
+                language_code=language_code,
+                media_sample_rate_hz=sample_rate,
+                media_encoding='pcm'
+            ))
+            self._reader = asyncio.run_coroutine_threadsafe(self._read_results(), self._loop)
+        except BaseException:
+            self.close()
+            raise
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _read_results(self):
+        async for event in self._stream.output_stream:
+            for result in event.transcript.results:
+                if not result.alternatives:
+                    continue
+                text = result.alternatives[0].transcript
+                with self._lock:
+                    if result.is_partial:
+                        self._partial = text
+                    else:
+                        self._final_segments.append(text)
+                        self._partial = ""
+
+    def _current(self) -> str:
+        with self._lock:
+            return " ".join(self._final_segments + ([self._partial] if self._partial else []))
+
+    def send(self, chunk: bytes) -> Optional[str]:
+        before = self._current()
+        self._run(self._stream.input_stream.send_audio_event(audio_chunk=chunk))
+        current = self._current()
+        return current if current != before else None
+
+    def finish(self) -> str:
+        try:
+            self._run(self._stream.input_stream.end_stream())
+            self._reader.result()
+            return " ".join(self._final_segments)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        # Arrêter la boucle et son thread (un tour en échec ne doit pas les laisser tourner)
+        if self._loop.is_closed():
+            return
+        if self._reader is not None:
+            self._reader.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=1)
+        if not self._thread.is_alive():
+            self._loop.close()
+
+
+class TranscribeStreamingBackend(TranscriptionBackend):
+    """Backend AWS Transcribe Streaming (dépendance optionnelle `amazon-transcribe`)"""
+
+    LANGUAGE_CODES = {'fr': 'fr-FR', 'en': 'en-US'}
+
+    def __init__(self, region: str = 'eu-west-1'):
+        """
+        Initialiser le backend
+
+        Args:
+            region: Région AWS
+        """
+        try:
+            import amazon_transcribe  # noqa: F401
+        except ImportError:
+            raise Exception("Le paquet 'amazon-transcribe' est requis pour la saisie vocale (pip install amazon-transcribe)")
+        self.region = region
+
+    def start_stream(self, language: str = 'fr', sample_rate: int = 16000) -> TranscriptionStream:
+        language_code = self.LANGUAGE_CODES.get(language, 'fr-FR')
+        return _TranscribeStream(self.region, language_code, sample_rate)
@@ -0,0 +1,150 @@
+"""
+Warm-up des clients AWS au démarrage du conteneur
+Précharge les modèles de service, ouvre les connexions et pré-synthétise l'audio d'accueil
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from . import aws
+from .audio_cache import shared_audio_cache
+from storage.session_store import get_session_store
+
+
+# Fichier de readiness lu par le HEALTHCHECK du Dockerfile
+READY_FILE = os.getenv('TENNIS_AI_READY_FILE', '/tmp/tennis-ai.ready')
+
+logger = logging.getLogger(__name__)
+
+_ready = threading.Event()
+_report: Dict[str, Any] = {}
+
+
+def _open_connection(client) -> None:
+    """
+    Ouvrir une connexion TLS dans le pool du client (sans appel facturé)
+
+    Une requête non signée vers l'endpoint suffit à établir la connexion keep-alive
+    que le client réutilisera pour son premier vrai appel.
+    """
+    from botocore.awsrequest import AWSRequest
+
+    request = AWSRequest(method='GET', url=client.meta.endpoint_url).prepare()
+    client._endpoint.http_session.send(request)
+
+
+def _prewarm_welcome_audio(region: str) -> int:
+    """
+    Pré-synthétiser les messages de bienvenue (joueur/coach, fr/en) dans chaque
+    format servi par `PollyClient.choose_format` (desktop, Apple, mobile)
+
+    Returns:
+        int: Nombre de synthèses
+    """
+    from agents.onboarding_agent import OnboardingAgent
+    from .polly_client import PollyClient
+
+    formats = {PollyClient.choose_format(ua) for ua in (None, 'iPhone Safari', 'Android Mobile')}
+    count = 0
+    for language in PollyClient.VOICES:
+        polly = PollyClient(region=region, language=language)
+        for user_type in ('player', 'coach'):
+            agent = OnboardingAgent(user_type=user_type, language=language, region=region, prefetch=False)
+            text = agent.start_conversation()
+            for audio_format, sample_rate in formats:
+                key = shared_audio_cache.make_key(
+                    text, polly.voice_config['voice_id'], polly.voice_config['engine'], audio_format, sample_rate
+                )
+                if shared_audio_cache.get(key) is None:
+                    shared_audio_cache.put(key, polly.synthesize(
+                        text, audio_format=audio_format, sample_rate=sample_rate
+                    ))
+                count += 1
+    return count
+
+
+def warm_up(region: Optional[str] = None, synthesize_welcome: bool = True) -> Dict[str, Any]:
+    """
+    Exécuter le warm-up complet puis signaler la readiness
+
+    Chaque étape est best-effort: un échec (ex: credentials absents) est reporté
+    mais n'empêche pas le démarrage.
+
+    Args:
+        region: Région AWS (défaut: AWS_REGION ou eu-west-1)
+        synthesize_welcome: Pré-synthétiser l'audio d'accueil via Polly
+
+    Returns:
+        dict: Rapport (timings en ms, erreurs éventuelles)
+    """
+    region = region or os.getenv('AWS_REGION', 'eu-west-1')
+    start = time.perf_counter()
+    errors = {}
+
+    # Mode multi-réplicas: l'audio pré-synthétisé est partagé via le stockage externe
+    try:
+        shared_audio_cache.backend = get_session_store()
+    except Exception as e:
+        errors['state_store'] = str(e)
+
+    for service_name in ('bedrock-runtime', 'polly'):
+        try:
+            client = aws.get_client(service_name, region)
+            step = time.perf_counter()
+            _open_connection(client)
+            aws.TIMINGS[f'connect_{service_name}'] = round((time.perf_counter() - step) * 1000, 1)
+        except Exception as e:
+            errors[service_name] = str(e)
+
+    if synthesize_welcome and os.getenv('AWS_ACCESS_KEY_ID'):
+        try:
+            step = time.perf_counter()
+            _report['welcome_audio'] = _prewarm_welcome_audio(region)
+            aws.TIMINGS['welcome_audio'] = round((time.perf_counter() - step) * 1000, 1)
+        except Exception as e:
+            errors['welcome_audio'] = str(e)
+
+    aws.TIMINGS['warmup_total'] = round((time.perf_counter() - start) * 1000, 1)
+    _report.update({'timings_ms': dict(aws.TIMINGS), 'errors': errors})
+
+    try:
+        with open(READY_FILE, 'w', encoding='utf-8') as f:
+            json.dump(_report, f, ensure_ascii=False)
+    except OSError as e:
+        logger.warning("Readiness non écrite (%s): %s", READY_FILE, e)
+
+    for step_name, error in errors.items():
+        logger.warning("Warm-up %s échoué: %s", step_name, error)
+    _ready.set()
+    logger.info("Warm-up terminé: %s", json.dumps(_report, ensure_ascii=False))
+    return _report
+
+
+def start_background_warmup(**kwargs) -> threading.Thread:
+    """
+    Lancer le warm-up dans un thread daemon (même processus que le serveur)
+
+    Returns:
+        threading.Thread: Thread de warm-up
+    """
+    # Supprimer une readiness périmée d'un démarrage précédent
+    if os.path.exists(READY_FILE):
+        os.remove(READY_FILE)
+
+    thread = threading.Thread(target=warm_up, kwargs=kwargs, name='tennis-ai-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready() -> bool:
+    """Warm-up terminé dans ce processus"""
+    return _ready.is_set()
+
+
+def get_report() -> Dict[str, Any]:
+    """Dernier rapport de warm-up"""
+    return dict(_report)
@@ -4,8 +4,12 @@ Interface Streamlit moderne et propre
 """
 
 import streamlit as st
+import logging
 import sys
 import os
+import tempfile
+import uuid
+import time
 from typing import Optional
 from dotenv import load_dotenv
 
@@ -13,12 +17,21 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from agents.onboarding_agent import OnboardingAgent
+from agents.voice_turn import VoiceTurn, read_wav, split_pcm
+from analysis import analyze_clips, summarize_analysis
 from api.polly_client import PollyClient
+from api.scheduler import OverloadedError
+from api.audio_cache import shared_audio_cache
+from api.aws import reset_clients
+from api.transcribe_client import TranscribeStreamingBackend
+from storage.session_store import ConflictError, get_session_store
 from utils import get_aws_credentials
 
 # Charger les variables d'environnement depuis .env (si présent)
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 def render_credentials_setup() -> None:
     """UI pour saisir les credentials AWS si non configurés."""
     st.markdown("### 🔐 Configurer vos identifiants AWS")
@@ -47,6 +60,8 @@ def render_credentials_setup() -> None:
         if session_token.strip():
             os.environ["AWS_SESSION_TOKEN"] = session_token.strip()
         os.environ["AWS_REGION"] = (region.strip() or "eu-west-1")
+        # Les clients partagés ont pu être créés sans credentials (warm-up)
+        reset_clients()
 
         # Marquer comme configuré et relancer
         st.session_state["aws_credentials_configured"] = True
@@ -178,15 +193,170 @@ def initialize_session():
         st.session_state.initialized = True
         st.session_state.user_type = None
         st.session_state.language = 'fr'  # Langue par défaut
-        st.session_state.agent = None
-        st.session_state.messages = []
+        st.session_state.agent = None  # L'agent porte le journal de conversation
         st.session_state.tts_enabled = False
         st.session_state.polly_client = None
         st.session_state.audio_cache = {}  # Cache pour TTS lazy
+        st.session_state.state_version = None  # Version de l'état partagé (mode multi-réplicas)
+
+
+# ==================== ÉTAT PARTAGÉ (MULTI-RÉPLICAS) ====================
+
+def sync_shared_session():
+    """
+    Recharger l'agent depuis le stockage partagé (TENNIS_AI_STATE_URL)
+    
+    La session est identifiée par le paramètre d'URL `sid`: n'importe quelle réplica
+    peut donc la servir. L'agent local n'est reconstruit que si la version a changé.
+    """
+    store = get_session_store()
+    session_id = st.query_params.get("sid")
+    if store is None or not session_id:
+        return
+    
+    state, version = store.load(session_id)
+    if state is None or version == st.session_state.state_version:
+        return
+    
+    st.session_state.agent = OnboardingAgent.from_state(state)
+    st.session_state.user_type = state["user_type"]
+    st.session_state.language = state["language"]
+    st.session_state.state_version = version
+
+
+def publish_new_session():
+    """Enregistrer l'agent nouvellement créé dans le stockage partagé (sous son session_id)"""
+    store = get_session_store()
+    if store is None:
+        return
+    
+    # Même identifiant partout: stockage partagé, fichiers de session et analytics
+    session_id = st.session_state.agent.session_id
+    st.session_state.state_version = store.save(session_id, st.session_state.agent.to_state(), 0)
+    st.query_params["sid"] = session_id
+
+
+# Durée max d'un tour de l'agent (appel modèle compris) sous bail exclusif
+TURN_LEASE_S = 120
+
+
+def run_agent_turn(turn) -> bool:
+    """
+    Exécuter un tour sur l'agent, sous bail exclusif en mode partagé
+    
+    Le bail est pris avant l'appel modèle: un tour concurrent sur la même session (autre
+    onglet, autre réplica) est refusé au lieu d'être rejoué, l'appel modèle n'est donc
+    jamais facturé deux fois.
+    
+    Args:
+        turn: Fonction appliquée à l'agent (ex: lambda agent: agent.chat(message))
+        
+    Returns:
+        bool: False si le tour a été refusé (session occupée ou modifiée entre-temps)
+    """
+    store = get_session_store()
+    session_id = st.query_params.get("sid")
+    tts_prefetch = make_tts_prefetch()
+    if store is None or not session_id:
+        if st.session_state.agent.prefetcher is not None:
+            st.session_state.agent.prefetcher.tts = tts_prefetch
+        turn(st.session_state.agent)
+        return True
+    
+    busy_msg = ("Un autre onglet est en train de répondre dans cette session, réessaie dans un instant."
+                if st.session_state.language == 'fr' else
+                "Another tab is answering in this session, please retry in a moment.")
+    owner = uuid.uuid4().hex
+    if not store.acquire_lease(session_id, owner, TURN_LEASE_S):
+        st.warning(busy_msg)
+        return False
+    try:
+        state, version = store.load(session_id)
+        # Agent local à jour: pas de reconstruction (ni du prefetcher)
+        if version == st.session_state.state_version or state is None:
+            agent = st.session_state.agent
+        else:
+            agent = OnboardingAgent.from_state(state)
+        if agent.prefetcher is not None:
+            agent.prefetcher.tts = tts_prefetch
+        turn(agent)
+        try:
+            st.session_state.state_version = store.save(session_id, agent.to_state(), version)
+        except ConflictError:
+            # Bail expiré pendant l'appel modèle et session reprise ailleurs: tour abandonné,
+            # l'agent local sera relu depuis le stockage au prochain affichage
+            st.session_state.state_version = None
+            st.warning(busy_msg)
+            return False
+        st.session_state.agent = agent
+        return True
+    finally:
+        store.release_lease(session_id, owner)
 
 
 # ==================== TTS (LAZY LOADING) ====================
 
+def make_tts_prefetch():
+    """
+    Fonction de pré-synthèse de la réponse de l'agent, exécutée par le prefetcher
+    pendant que l'utilisateur lit (le clic 🔊 Écouter trouve alors l'audio en cache)
+    
+    Tout est résolu ici, dans le thread Streamlit: le thread de préchargement
+    ne touche jamais `st.session_state`.
+    
+    Returns:
+        Callable[[str], None] ou None si l'audio est désactivé
+    """
+    if not st.session_state.tts_enabled:
+        return None
+    
+    if st.session_state.polly_client is None:
+        st.session_state.polly_client = PollyClient(
+            region='eu-west-1',
+            language=st.session_state.language
+        )
+    polly = st.session_state.polly_client
+    audio_format, sample_rate = get_audio_format()
+    voice_config = dict(polly.voice_config)
+    
+    def synthesize(text: str) -> None:
+        key = shared_audio_cache.make_key(
+            text, voice_config['voice_id'], voice_config['engine'], audio_format, sample_rate
+        )
+        if shared_audio_cache.get(key) is None:
+            shared_audio_cache.put(key, polly.synthesize(
+                text, voice_id=voice_config['voice_id'], engine=voice_config['engine'],
+                audio_format=audio_format, sample_rate=sample_rate, priority='background'
+            ))
+    
+    return synthesize
+
+
+def get_audio_format() -> tuple:
+    """
+    Format audio de la session, choisi une fois selon le navigateur
+    
+    TENNIS_AI_AUDIO_FORMAT (ex: 'ogg_vorbis:16000') force le format pour tous les clients;
+    une valeur non supportée est signalée dans les logs et ignorée.
+    
+    Returns:
+        tuple: (format Polly, fréquence d'échantillonnage ou None)
+    """
+    if st.session_state.get("audio_format") is None:
+        forced = os.getenv("TENNIS_AI_AUDIO_FORMAT")
+        if forced:
+            try:
+                st.session_state.audio_format = PollyClient.parse_format(forced)
+            except ValueError as e:
+                logger.warning("TENNIS_AI_AUDIO_FORMAT=%r ignoré (%s), format choisi selon le navigateur", forced, e)
+        if st.session_state.get("audio_format") is None:
+            # st.context.headers: Streamlit >= 1.37
+            context = getattr(st, "context", None)
+            user_agent = context.headers.get("User-Agent") if context is not None else None
+            st.session_state.audio_format = PollyClient.choose_format(user_agent)
+    return st.session_state.audio_format
+
+
 def get_tts_audio(text: str, message_id: str) -> Optional[bytes]:
     """
     Obtenir l'audio TTS (généré UNIQUEMENT au clic via cache)
@@ -196,7 +366,7 @@ def get_tts_audio(text: str, message_id: str) -> Optional[bytes]:
         message_id: ID unique du message
         
     Returns:
-        bytes: Audio MP3 ou None
+        bytes: Audio (format choisi selon le client, voir `get_audio_format`) ou None
     """
     # Vérifier le cache
     if message_id in st.session_state.audio_cache:
@@ -214,13 +384,32 @@ def get_tts_audio(text: str, message_id: str) -> Optional[bytes]:
             # Synchroniser la langue
             st.session_state.polly_client.set_language(st.session_state.language)
         
-        audio_bytes = st.session_state.polly_client.synthesize(text)
+        # Cache partagé du processus (messages pré-écrits pré-synthétisés au warm-up)
+        audio_format, sample_rate = get_audio_format()
+        voice_config = st.session_state.polly_client.voice_config
+        shared_key = shared_audio_cache.make_key(
+            text, voice_config['voice_id'], voice_config['engine'], audio_format, sample_rate
+        )
+        audio_bytes = shared_audio_cache.get(shared_key)
+        if audio_bytes is None:
+            audio_bytes = st.session_state.polly_client.synthesize(
+                text, audio_format=audio_format, sample_rate=sample_rate,
+                session_id=st.session_state.agent.session_id
+            )
+            shared_audio_cache.put(shared_key, audio_bytes)
         
         # Mettre en cache
         st.session_state.audio_cache[message_id] = audio_bytes
         
         return audio_bytes
         
+    except OverloadedError as e:
+        if st.session_state.language == 'fr':
+            st.warning(f"🔊 Audio très demandé en ce moment, réessaie dans {e.retry_after_s:.0f} secondes.")
+        else:
+            st.warning(f"🔊 Audio is busy right now, please retry in {e.retry_after_s:.0f} seconds.")
+        return None
+        
     except Exception as e:
         error_msg = f"TTS Error: {str(e)}" if st.session_state.language == 'en' else f"Erreur TTS: {str(e)}"
         st.error(error_msg)
@@ -346,11 +535,9 @@ def start_onboarding(user_type: str):
         language=st.session_state.language
     )
     
-    # Obtenir le message de bienvenue
-    welcome_message = st.session_state.agent.start_conversation()
-    
-    # Ajouter à l'historique
-    st.session_state.messages = [("assistant", welcome_message)]
+    # Message de bienvenue (ajouté au journal de l'agent)
+    st.session_state.agent.start_conversation()
+    publish_new_session()
     
     # Reset audio cache (nouvelle langue potentiellement)
     st.session_state.audio_cache = {}
@@ -404,8 +591,9 @@ def render_chat_message(role: str, content: str, message_id: str):
                             st.rerun()
             else:
                 # Afficher le lecteur audio (déjà généré)
+                # Servi par Streamlit avec le bon type MIME et le support des requêtes Range
                 audio_bytes = st.session_state.audio_cache[message_id]
-                st.audio(audio_bytes, format='audio/mp3')
+                st.audio(audio_bytes, format=PollyClient.content_type(get_audio_format()[0]))
 
 
 def render_chat_interface():
@@ -453,16 +641,22 @@ def render_chat_interface():
         
         st.markdown("---")
         
+        # Analyse de swing locale (joueurs): keypoints exportés par l'outil de pose
+        if st.session_state.user_type == "player":
+            render_swing_upload(is_fr)
+            st.markdown("---")
+        
         if st.button(new_session):
             # Reset
             st.session_state.user_type = None
             st.session_state.agent = None
-            st.session_state.messages = []
             st.session_state.audio_cache = {}
+            st.session_state.state_version = None
+            st.query_params.clear()
             st.rerun()
     
-    # Historique des messages
-    for idx, (role, content) in enumerate(st.session_state.messages):
+    # Historique des messages (journal unique de l'agent)
+    for idx, (role, content) in enumerate(st.session_state.agent.messages):
         message_id = f"msg_{idx}"
         render_chat_message(role, content, message_id)
     
@@ -496,18 +690,124 @@ def render_chat_interface():
     
     # Traiter le message
     if submit and user_input:
-        # Ajouter le message utilisateur
-        st.session_state.messages.append(("user", user_input))
-        
-        # Obtenir la réponse de l'agent
+        # Obtenir la réponse de l'agent (le journal enregistre les deux tours)
         with st.spinner(thinking_msg):
-            response = st.session_state.agent.chat(user_input)
+            accepted = run_agent_turn(lambda agent: agent.chat(user_input))
         
-        # Ajouter la réponse
-        st.session_state.messages.append(("assistant", response))
+        # Rafraîchir (un tour refusé garde l'avertissement affiché)
+        if accepted:
+            st.rerun()
+    
+    # Saisie vocale (st.audio_input disponible à partir de Streamlit 1.40)
+    if hasattr(st, "audio_input"):
+        voice_label = "🎤 Répondre à la voix" if is_fr else "🎤 Answer by voice"
+        # Clé liée à la longueur du journal: le widget est réinitialisé après chaque tour
+        recording = st.audio_input(voice_label, key=f"voice_{len(st.session_state.agent.messages)}")
+        if recording is not None:
+            with st.spinner(thinking_msg):
+                try:
+                    wav_bytes = recording.getvalue()
+                    accepted = run_agent_turn(lambda agent: run_voice_turn(agent, wav_bytes))
+                except Exception as e:
+                    st.error(f"Erreur saisie vocale: {str(e)}" if is_fr else f"Voice input error: {str(e)}")
+                    return
+            if accepted:
+                st.rerun()
+
+
+# ==================== VOICE INPUT ====================
+
+def get_transcription_backend():
+    """Backend STT partagé par la session (AWS Transcribe Streaming)"""
+    if st.session_state.get("transcription_backend") is None:
+        st.session_state.transcription_backend = TranscribeStreamingBackend(
+            region=os.getenv("AWS_REGION", "eu-west-1")
+        )
+    return st.session_state.transcription_backend
+
+
+def run_voice_turn(agent: OnboardingAgent, wav_bytes: bytes) -> dict:
+    """
+    Transcrire un enregistrement WAV terminé puis le soumettre à l'agent
+    
+    `st.audio_input` ne livre le WAV qu'à l'arrêt de l'enregistrement: tout l'audio est
+    transcrit après la fin de parole, sans recouvrement avec la parole. Les timings sont
+    donc mesurés depuis la réception de l'enregistrement.
+    
+    Args:
+        agent: Agent destinataire
+        wav_bytes: Enregistrement du micro (WAV PCM 16 bits)
         
-        # Rafraîchir
-        st.rerun()
+    Returns:
+        dict: Résultat du tour vocal (transcription, réponse, timings)
+    """
+    end_of_speech = time.perf_counter()
+    pcm, sample_rate = read_wav(wav_bytes)
+    
+    turn = VoiceTurn(agent, get_transcription_backend(), sample_rate=sample_rate)
+    try:
+        turn.feed_all(split_pcm(pcm, sample_rate))
+        return turn.finish(end_of_speech=end_of_speech)
+    finally:
+        # Un envoi en échec ne doit pas laisser le flux (boucle asyncio, thread) ouvert
+        turn.close()
+
+
+# ==================== SWING ANALYSIS ====================
+
+def render_swing_upload(is_fr: bool) -> None:
+    """Envoi de clips de keypoints (.npy / .json) et analyse locale dans la barre latérale"""
+    uploads = st.file_uploader(
+        "🎥 Clips de swing (keypoints)" if is_fr else "🎥 Swing clips (keypoints)",
+        type=["npy", "json"],
+        accept_multiple_files=True,
+        help=("1 à 2 angles (latéral, frontal), keypoints COCO-17 par frame" if is_fr else
+              "1 to 2 angles (lateral, frontal), COCO-17 keypoints per frame")
+    )
+    if not uploads or not st.button("📊 Analyser" if is_fr else "📊 Analyze"):
+        return
+    
+    summaries = []
+    accepted = run_agent_turn(lambda agent: summaries.append(run_swing_analysis(agent, uploads)))
+    if not accepted:
+        return
+    summary = summaries[0]
+    if summary["clips"] < len(uploads):
+        st.warning(f"{len(uploads) - summary['clips']} clip(s) illisible(s) ou sans frappe mesurable" if is_fr else
+                   f"{len(uploads) - summary['clips']} clip(s) unreadable or without a measurable stroke")
+    if summary["clips"]:
+        st.success(f"✅ {summary['frappes']} frappe(s) analysée(s)" if is_fr else
+                   f"✅ {summary['frappes']} stroke(s) analyzed")
+
+
+def run_swing_analysis(agent: OnboardingAgent, uploads) -> dict:
+    """
+    Analyser localement les clips envoyés puis transmettre le résumé à l'agent
+    
+    Args:
+        agent: Agent destinataire (profil `analyse_swing`)
+        uploads: Fichiers envoyés (`.npy` / `.json`, voir `analysis.load_clip`)
+        
+    Returns:
+        dict: Résumé de `summarize_analysis`
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i, upload in enumerate(uploads):
+            # Un sous-dossier par fichier: deux uploads homonymes ne s'écrasent pas
+            os.makedirs(os.path.join(directory, str(i)))
+            path = os.path.join(directory, str(i), os.path.basename(upload.name))
+            with open(path, 'wb') as f:
+                f.write(upload.getvalue())
+            paths.append(path)
+        results = list(analyze_clips(paths))
+    
+    for result in results:
+        if 'error' in result:
+            logger.warning("Clip ignoré (%s): %s", result['clip_id'], result['error'])
+    summary = summarize_analysis(results)
+    agent.set_swing_analysis(summary)
+    return summary
 
 
 # ==================== MAIN ====================
@@ -524,6 +824,11 @@ def main():
         render_credentials_setup()
         st.stop()
     
+    # Mode multi-réplicas: état de l'agent et cache TTS viennent du stockage partagé
+    if shared_audio_cache.backend is None:
+        shared_audio_cache.backend = get_session_store()
+    sync_shared_session()
+    
     # Afficher l'interface appropriée
     if st.session_state.user_type is None:
         render_role_selection()
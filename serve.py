@@ -0,0 +1,42 @@
+"""
+Tennis AI - Lanceur de production
+Démarre le warm-up AWS en arrière-plan puis Streamlit dans le même processus
+"""
+
+import logging
+import os
+import sys
+import time
+
+# Ajouter le répertoire courant au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+_boot_start = time.perf_counter()
+
+from dotenv import load_dotenv
+
+from api.warmup import start_background_warmup
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Warm-up + serveur Streamlit (les clients préchauffés sont partagés par les sessions)"""
+    load_dotenv()
+    logging.basicConfig(
+        level=os.getenv('TENNIS_AI_LOG_LEVEL', 'INFO'),
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+    )
+    start_background_warmup()
+
+    from streamlit.web import cli as stcli
+
+    boot_ms = (time.perf_counter() - _boot_start) * 1000
+    logger.info("Boot lanceur: %.1f ms, démarrage de Streamlit", boot_ms)
+
+    sys.argv = ["streamlit", "run", os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")] + sys.argv[1:]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Stockage partagé Tennis AI
+"""
+
+from .invite_codes import (
+    InviteCodeError,
+    InviteCodeService,
+    RateLimitedError,
+    RedisInviteCodeStore,
+    SQLiteInviteCodeStore,
+    get_invite_store,
+)
+from .progress_store import ProgressStore, get_progress_store
+from .session_store import (
+    ConflictError,
+    RedisSessionStore,
+    SessionStore,
+    SQLiteSessionStore,
+    get_session_store,
+)
+
+__all__ = [
+    'ConflictError',
+    'InviteCodeError',
+    'InviteCodeService',
+    'ProgressStore',
+    'RateLimitedError',
+    'RedisInviteCodeStore',
+    'RedisSessionStore',
+    'SessionStore',
+    'SQLiteInviteCodeStore',
+    'SQLiteSessionStore',
+    'get_invite_store',
+    'get_progress_store',
+    'get_session_store',
+]
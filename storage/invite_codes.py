@@ -0,0 +1,462 @@
+"""
+Codes d'invitation coach → élèves Tennis AI (étape liaison_élèves)
+Codes courts aléatoires avec caractère de contrôle, résolution O(1) par clé primaire avec expiration,
+émission en lot pour un effectif et limitation des tentatives de validation
+
+Format: 8 caractères base32 Crockford (40 bits aléatoires) + 1 caractère de contrôle, affichés
+`XXXX-XXXXX`. Les fautes de frappe sur un caractère sont rejetées sans accès au stockage.
+"""
+
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .session_store import ConflictError
+
+
+# Base32 Crockford: sans I, L, O, U (pas de confusion à la lecture ni à la dictée)
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+CODE_LENGTH = 8
+_INDEX = {char: i for i, char in enumerate(ALPHABET)}
+_READ_AS = str.maketrans({'O': '0', 'I': '1', 'L': '1'})
+
+# Poids impairs distincts: toute erreur sur un seul caractère change la somme de contrôle
+_WEIGHTS = tuple(2 * i + 1 for i in range(CODE_LENGTH))
+
+
+class InviteCodeError(Exception):
+    """Code d'invitation refusé"""
+
+    def __init__(self, reason: str):
+        """
+        Args:
+            reason: 'format', 'inconnu', 'expire' ou 'epuise'
+        """
+        super().__init__(f"Code d'invitation refusé: {reason}")
+        self.reason = reason
+
+
+class RateLimitedError(InviteCodeError):
+    """Trop de tentatives invalides pour ce client"""
+
+    def __init__(self, retry_after_s: float):
+        super().__init__('limite')
+        self.retry_after_s = retry_after_s
+
+
+def _check_char(body: str) -> str:
+    return ALPHABET[sum(w * _INDEX[c] for w, c in zip(_WEIGHTS, body)) % len(ALPHABET)]
+
+
+def generate_code() -> str:
+    """Nouveau code canonique (sans tiret)"""
+    value = int.from_bytes(secrets.token_bytes(5), 'big')
+    body = ''.join(ALPHABET[(value >> shift) & 31] for shift in range(35, -1, -5))
+    return body + _check_char(body)
+
+
+def normalize_code(text: str) -> Optional[str]:
+    """
+    Forme canonique d'un code saisi ou dicté (casse, tirets, espaces, O/I/L tolérés)
+
+    Returns:
+        str: Code canonique, None si le format ou le caractère de contrôle est invalide
+    """
+    code = ''.join(text.split()).replace('-', '').upper().translate(_READ_AS)
+    if len(code) != CODE_LENGTH + 1 or any(c not in _INDEX for c in code):
+        return None
+    return code if _check_char(code[:-1]) == code[-1] else None
+
+
+def format_code(code: str) -> str:
+    """Affichage `XXXX-XXXXX`"""
+    return f"{code[:4]}-{code[4:]}"
+
+
+class InviteCodeStore:
+    """Interface de stockage des codes (index par code, expiration, compteurs d'échecs)"""
+
+    def insert_many(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """
+        Insérer des codes sans écraser les existants
+
+        Args:
+            rows: code, coach_id, student, expires_at, uses_left
+
+        Returns:
+            list: Codes déjà pris (collisions à régénérer)
+        """
+        raise NotImplementedError
+
+    def get(self, code: str, now: float) -> Optional[Dict[str, Any]]:
+        """Code valide (non expiré) ou None"""
+        raise NotImplementedError
+
+    def consume(self, code: str, player_id: str, now: float) -> Dict[str, Any]:
+        """
+        Utiliser un code (atomique; idempotent pour un même joueur)
+
+        Raises:
+            InviteCodeError: Code inconnu, expiré ou épuisé
+        """
+        raise NotImplementedError
+
+    def failures(self, key: str, now: float) -> Tuple[int, float]:
+        """Échecs dans la fenêtre courante et secondes avant sa fin"""
+        raise NotImplementedError
+
+    def add_failure(self, key: str, now: float, window_s: float) -> None:
+        """Compter un échec dans la fenêtre courante"""
+        raise NotImplementedError
+
+
+class SQLiteInviteCodeStore(InviteCodeStore):
+    """Stockage SQLite WAL (clé primaire sur le code, index d'expiration pour la purge)"""
+
+    def __init__(self, path: str = 'sessions/invites.db'):
+        """
+        Ouvrir la base
+
+        Args:
+            path: Chemin du fichier SQLite (peut être partagé avec l'état des sessions)
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS invite_codes ("
+                "code TEXT PRIMARY KEY, coach_id TEXT NOT NULL, student TEXT, "
+                "expires_at REAL NOT NULL, uses_left INTEGER NOT NULL) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS invite_codes_expiry ON invite_codes (expires_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS invite_redemptions ("
+                "code TEXT NOT NULL, player_id TEXT NOT NULL, redeemed_at REAL NOT NULL, "
+                "PRIMARY KEY (code, player_id)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS invite_failures ("
+                "key TEXT PRIMARY KEY, window_end REAL NOT NULL, failures INTEGER NOT NULL) WITHOUT ROWID"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def insert_many(self, rows: List[Dict[str, Any]]) -> List[str]:
+        params = [(row['code'], row['coach_id'], row['student'], row['expires_at'], row['uses_left']) for row in rows]
+        conn = self._connect()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO invite_codes (code, coach_id, student, expires_at, uses_left) "
+                "VALUES (?, ?, ?, ?, ?)",
+                params
+            )
+            if conn.total_changes - before == len(rows):
+                return []
+
+        # Collision: codes dont la ligne enregistrée n'est pas celle de ce lot
+        taken, kept = [], set()
+        for code, coach_id, student, expires_at, _ in params:
+            stored = conn.execute(
+                "SELECT coach_id, student, expires_at FROM invite_codes WHERE code = ?", (code,)
+            ).fetchone()
+            if stored != (coach_id, student, expires_at) or code in kept:
+                taken.append(code)
+            else:
+                kept.add(code)
+        return taken
+
+    def get(self, code: str, now: float) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT coach_id, student, expires_at, uses_left FROM invite_codes WHERE code = ? AND expires_at > ?",
+            (code, now)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'code': code, 'coach_id': row[0], 'student': row[1], 'expires_at': row[2], 'uses_left': row[3]}
+
+    def consume(self, code: str, player_id: str, now: float) -> Dict[str, Any]:
+        conn = self._connect()
+        with conn:
+            row = conn.execute(
+                "SELECT coach_id, student, expires_at, uses_left FROM invite_codes WHERE code = ?", (code,)
+            ).fetchone()
+            if row is None:
+                raise InviteCodeError('inconnu')
+            if row[2] <= now:
+                raise InviteCodeError('expire')
+            info = {'code': code, 'coach_id': row[0], 'student': row[1], 'expires_at': row[2]}
+            # Déjà lié: pas de nouvelle utilisation
+            if conn.execute(
+                "SELECT 1 FROM invite_redemptions WHERE code = ? AND player_id = ?", (code, player_id)
+            ).fetchone():
+                return info
+            cursor = conn.execute(
+                "UPDATE invite_codes SET uses_left = uses_left - 1 WHERE code = ? AND uses_left > 0", (code,)
+            )
+            if cursor.rowcount != 1:
+                raise InviteCodeError('epuise')
+            conn.execute(
+                "INSERT INTO invite_redemptions (code, player_id, redeemed_at) VALUES (?, ?, ?)",
+                (code, player_id, now)
+            )
+        return info
+
+    def failures(self, key: str, now: float) -> Tuple[int, float]:
+        row = self._connect().execute(
+            "SELECT failures, window_end FROM invite_failures WHERE key = ? AND window_end > ?", (key, now)
+        ).fetchone()
+        return (row[0], row[1] - now) if row else (0, 0.0)
+
+    def add_failure(self, key: str, now: float, window_s: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO invite_failures (key, window_end, failures) VALUES (?, ?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "failures = CASE WHEN window_end > ? THEN failures + 1 ELSE 1 END, "
+                "window_end = CASE WHEN window_end > ? THEN window_end ELSE excluded.window_end END",
+                (key, now + window_s, now, now)
+            )
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Supprimer les codes expirés (parcours de l'index d'expiration uniquement)"""
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM invite_codes WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM invite_failures WHERE window_end <= ?", (now,))
+        return cursor.rowcount
+
+
+class RedisInviteCodeStore(InviteCodeStore):
+    """Stockage Redis (dépendance optionnelle `redis`); l'expiration est portée par la clé"""
+
+    PREFIX = 'tennis-ai'
+
+    # Relectures après une utilisation concurrente du même code (WATCH)
+    MAX_RETRIES = 5
+
+    def __init__(self, url: str = 'redis://localhost:6379/0'):
+        """
+        Se connecter à Redis
+
+        Args:
+            url: URL Redis
+        """
+        try:
+            import redis
+        except ImportError:
+            raise Exception("Le paquet 'redis' est requis pour TENNIS_AI_STATE_URL=redis://... (pip install redis)")
+        self._redis = redis.Redis.from_url(url)
+        self._watch_error = redis.WatchError
+
+    def _key(self, kind: str, key: str) -> str:
+        return f"{self.PREFIX}:{kind}:{key}"
+
+    def insert_many(self, rows: List[Dict[str, Any]]) -> List[str]:
+        with self._redis.pipeline(transaction=False) as pipe:
+            for row in rows:
+                payload = {k: row[k] for k in ('coach_id', 'student', 'expires_at', 'uses_left')}
+                pipe.set(self._key('invite', row['code']), json.dumps(payload, ensure_ascii=False),
+                         nx=True, exat=int(row['expires_at']) + 1)
+            results = pipe.execute()
+        return [row['code'] for row, ok in zip(rows, results) if not ok]
+
+    def get(self, code: str, now: float) -> Optional[Dict[str, Any]]:
+        payload = self._redis.get(self._key('invite', code))
+        if payload is None:
+            return None
+        info = json.loads(payload)
+        if info['expires_at'] <= now:
+            return None
+        return dict(info, code=code)
+
+    def consume(self, code: str, player_id: str, now: float) -> Dict[str, Any]:
+        key = self._key('invite', code)
+        used_key = self._key('invite-used', code)
+        for _ in range(self.MAX_RETRIES + 1):
+            with self._redis.pipeline() as pipe:
+                try:
+                    pipe.watch(key, used_key)
+                    payload = pipe.get(key)
+                    if payload is None:
+                        raise InviteCodeError('inconnu')
+                    info = json.loads(payload)
+                    if info['expires_at'] <= now:
+                        raise InviteCodeError('expire')
+                    result = {'code': code, 'coach_id': info['coach_id'], 'student': info['student'],
+                              'expires_at': info['expires_at']}
+                    if pipe.sismember(used_key, player_id):
+                        return result
+                    if info['uses_left'] <= 0:
+                        raise InviteCodeError('epuise')
+                    info['uses_left'] -= 1
+                    pipe.multi()
+                    pipe.set(key, json.dumps(info, ensure_ascii=False), keepttl=True)
+                    pipe.sadd(used_key, player_id)
+                    pipe.expireat(used_key, int(info['expires_at']) + 1)
+                    pipe.execute()
+                    return result
+                except self._watch_error:
+                    # Utilisation concurrente du même code: relire et réessayer
+                    continue
+        raise ConflictError(f"Code {code} modifié en continu par d'autres utilisations")
+
+    def failures(self, key: str, now: float) -> Tuple[int, float]:
+        redis_key = self._key('invite-fail', key)
+        with self._redis.pipeline(transaction=False) as pipe:
+            pipe.get(redis_key)
+            pipe.pttl(redis_key)
+            count, ttl_ms = pipe.execute()
+        return (int(count), max(ttl_ms, 0) / 1000) if count else (0, 0.0)
+
+    def add_failure(self, key: str, now: float, window_s: float) -> None:
+        redis_key = self._key('invite-fail', key)
+        # SET NX EX ouvre la fenêtre au premier échec sans la repousser ensuite
+        # (équivalent d'EXPIRE NX, qui exige Redis >= 7)
+        with self._redis.pipeline() as pipe:
+            pipe.set(redis_key, 0, nx=True, ex=int(window_s))
+            pipe.incr(redis_key)
+            pipe.execute()
+
+
+class InviteCodeService:
+    """Émission, résolution et validation des codes d'invitation"""
+
+    # Validité par défaut d'un code (un effectif s'inscrit sur quelques jours)
+    DEFAULT_TTL_S = 14 * 24 * 3600
+
+    # Tentatives invalides tolérées par client et par fenêtre. Pas de limite par code saisi:
+    # les codes d'un lot sont tirés indépendamment (aucun préfixe commun) et une telle limite
+    # laisserait n'importe qui bloquer un code valide; 40 bits suffisent contre l'énumération
+    MAX_FAILURES = 5
+    FAILURE_WINDOW_S = 15 * 60
+
+    def __init__(self, store: Optional[InviteCodeStore] = None):
+        """
+        Args:
+            store: Stockage des codes (défaut: selon TENNIS_AI_STATE_URL, voir `get_invite_store`)
+        """
+        self.store = store or get_invite_store()
+
+    def issue(self, coach_id: str, students: Iterable[Optional[str]] = (None,), ttl_s: Optional[int] = None,
+              max_uses: int = 1) -> List[Dict[str, Any]]:
+        """
+        Émettre des codes, en lot pour tout un effectif (une seule transaction)
+
+        Args:
+            coach_id: Identifiant du coach
+            students: Noms des élèves (un code chacun); `None` pour un code anonyme
+            ttl_s: Validité en secondes (défaut: DEFAULT_TTL_S)
+            max_uses: Utilisations par code (1 = nominatif; plus pour un code de groupe)
+
+        Returns:
+            list: {student, code (affiché `XXXX-XXXXX`), expires_at}, dans l'ordre de `students`
+        """
+        students = list(students)
+        expires_at = time.time() + (ttl_s or self.DEFAULT_TTL_S)
+        codes: List[Optional[str]] = [None] * len(students)
+        pending = list(range(len(students)))
+        while pending:
+            rows = [
+                {'code': generate_code(), 'coach_id': coach_id, 'student': students[i],
+                 'expires_at': expires_at, 'uses_left': max_uses}
+                for i in pending
+            ]
+            taken = set(self.store.insert_many(rows))
+            # Collision (rare à 40 bits): nouveau tirage pour ces élèves seulement
+            retry = []
+            for i, row in zip(pending, rows):
+                if row['code'] in taken:
+                    retry.append(i)
+                else:
+                    codes[i] = row['code']
+            pending = retry
+        return [
+            {'student': student, 'code': format_code(code), 'expires_at': expires_at}
+            for student, code in zip(students, codes)
+        ]
+
+    def resolve(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Coach associé à un code (lecture seule, sans consommer d'utilisation)
+
+        Returns:
+            dict: code, coach_id, student, expires_at, uses_left; None si invalide ou expiré
+        """
+        code = normalize_code(text)
+        return self.store.get(code, time.time()) if code else None
+
+    def redeem(self, text: str, player_id: str, client_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Valider un code pour un élève (lie l'élève au coach)
+
+        Les tentatives invalides sont limitées par client: un rechargement de page (nouvelle
+        session, nouveau joueur anonyme) ne remet pas le compteur à zéro.
+
+        Args:
+            text: Code saisi ou dicté
+            player_id: Identifiant de l'élève (lié au code)
+            client_id: Identifiant stable du client (IP, cookie); défaut: `player_id`
+
+        Returns:
+            dict: code, coach_id, student, expires_at
+
+        Raises:
+            RateLimitedError: Trop de tentatives invalides récentes
+            InviteCodeError: Code mal formé, inconnu, expiré ou épuisé
+            ConflictError: Code modifié en continu par d'autres utilisations (Redis)
+        """
+        now = time.time()
+        code = normalize_code(text)
+        key = f"client:{client_id or player_id}"
+        count, retry_after_s = self.store.failures(key, now)
+        if count >= self.MAX_FAILURES:
+            raise RateLimitedError(retry_after_s)
+        try:
+            if code is None:
+                raise InviteCodeError('format')
+            return self.store.consume(code, player_id, now)
+        except InviteCodeError:
+            self.store.add_failure(key, now, self.FAILURE_WINDOW_S)
+            raise
+
+
+_store: Optional[InviteCodeStore] = None
+_store_lock = threading.Lock()
+
+
+def get_invite_store() -> InviteCodeStore:
+    """
+    Stockage des codes configuré par TENNIS_AI_STATE_URL (singleton du processus)
+
+    - sqlite:///sessions/state.db : tables ajoutées à la base partagée
+    - redis://host:6379/0 : Redis
+    - non défini : SQLite local `sessions/invites.db`
+    """
+    global _store
+    url = os.getenv('TENNIS_AI_STATE_URL', '')
+    with _store_lock:
+        if _store is None:
+            if url.startswith(('redis://', 'rediss://')):
+                _store = RedisInviteCodeStore(url)
+            elif url.startswith('sqlite:///'):
+                _store = SQLiteInviteCodeStore(url[len('sqlite:///'):])
+            elif not url:
+                _store = SQLiteInviteCodeStore()
+            else:
+                raise ValueError(f"TENNIS_AI_STATE_URL non supportée: {url}")
+    return _store
@@ -0,0 +1,183 @@
+"""
+Progression des joueurs Tennis AI (boucle film → erreur principale → correction → sauvegarde)
+Agrégats courants par joueur et par métrique, mis à jour en O(1) par séance
+
+Un seul enregistrement par joueur dans le SessionStore (clé `progress:<joueur>`, sans expiration):
+une séance relit et réécrit cet enregistrement en compare-and-set, sans jamais relire les séances passées.
+"""
+
+import copy
+import threading
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+from .session_store import SessionStore, SQLiteSessionStore, get_session_store
+
+
+# Seuil d'écart de score pour parler de progrès / régression
+TREND_THRESHOLD = 0.05
+
+
+class ProgressStore:
+    """Agrégats de progression par joueur (compteurs, EWMA, meilleur/dernier, séries)"""
+
+    KEY_PREFIX = 'progress:'
+
+    # Séances récentes mémorisées pour l'idempotence (A, B puis A n'est compté qu'une fois)
+    RECENT_SESSIONS = 32
+
+    def __init__(self, store: Optional[SessionStore] = None, ranges: Optional[Dict[str, tuple]] = None,
+                 alpha: float = 0.3):
+        """
+        Initialiser le stockage
+
+        Args:
+            store: SessionStore sous-jacent (défaut: stockage partagé, sinon SQLite local)
+            ranges: Plages cibles par métrique (défaut: `analysis.swing_metrics.METRIC_RANGES`)
+            alpha: Poids de la dernière séance dans l'EWMA des scores
+        """
+        if ranges is None:
+            from analysis.swing_metrics import METRIC_RANGES
+            ranges = METRIC_RANGES
+        self.store = store or get_session_store() or SQLiteSessionStore('sessions/progress.db')
+        self.ranges = dict(ranges)
+        self.alpha = alpha
+
+    def _score(self, name: str, value: float) -> float:
+        """Score 0-1 d'une mesure: 1 dans la plage cible, décroît avec l'écart relatif"""
+        low, high = self.ranges[name]
+        deviation = max(low - value, value - high, 0.0) / (high - low)
+        return max(0.0, 1.0 - deviation)
+
+    # ==================== ÉCRITURE ====================
+
+    def record(self, player_id: str, metrics: Dict[str, float], main_error: Optional[str] = None,
+               session_id: Optional[str] = None, day: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Intégrer une séance aux agrégats du joueur
+
+        Idempotent par `session_id` parmi les RECENT_SESSIONS dernières séances: une même séance
+        sauvegardée plusieurs fois (même entrecoupée d'autres séances) n'est comptée qu'une fois.
+
+        Args:
+            player_id: Identifiant du joueur
+            metrics: Métrique -> valeur de la séance (ex: `analyse_swing["metriques"]`)
+            main_error: Erreur principale de la séance
+            session_id: Identifiant de la séance
+            day: Date de la séance (défaut: aujourd'hui)
+
+        Returns:
+            dict: Agrégats à jour
+        """
+        day = day or date.today()
+
+        def apply(state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            state = copy.deepcopy(state) if state else {
+                'sessions': 0, 'first_day': day.isoformat(), 'last_day': None,
+                'day_streak': 0, 'best_day_streak': 0, 'recent_sessions': [],
+                'current_error': None, 'error_streak': 0, 'errors': {}, 'metrics': {}
+            }
+            if session_id is not None and session_id in state['recent_sessions']:
+                return state
+
+            state['sessions'] += 1
+            if session_id is not None:
+                state['recent_sessions'] = (state['recent_sessions'] + [session_id])[-self.RECENT_SESSIONS:]
+
+            # Série de jours consécutifs avec au moins une séance
+            last_day = state['last_day']
+            if last_day != day.isoformat():
+                consecutive = last_day == (day - timedelta(days=1)).isoformat()
+                state['day_streak'] = state['day_streak'] + 1 if consecutive else 1
+                state['best_day_streak'] = max(state['best_day_streak'], state['day_streak'])
+                state['last_day'] = day.isoformat()
+
+            # Une seule erreur à la fois: séances consécutives sur la même erreur
+            if main_error is not None:
+                state['errors'][main_error] = state['errors'].get(main_error, 0) + 1
+                same = state['current_error'] == main_error
+                state['error_streak'] = state['error_streak'] + 1 if same else 1
+                state['current_error'] = main_error
+
+            for name, value in metrics.items():
+                if name not in self.ranges or value is None:
+                    continue
+                score = self._score(name, value)
+                aggregate = state['metrics'].get(name)
+                if aggregate is None:
+                    aggregate = state['metrics'][name] = {
+                        'count': 0, 'last': value, 'best': value, 'best_score': score,
+                        'ewma': score, 'trend': 0.0, 'in_range_streak': 0
+                    }
+                else:
+                    aggregate['trend'] = round(score - aggregate['ewma'], 4)
+                    aggregate['ewma'] = round(self.alpha * score + (1 - self.alpha) * aggregate['ewma'], 4)
+                    if score > aggregate['best_score']:
+                        aggregate['best'], aggregate['best_score'] = value, score
+                aggregate['count'] += 1
+                aggregate['last'] = value
+                aggregate['in_range_streak'] = aggregate['in_range_streak'] + 1 if score == 1.0 else 0
+            return state
+
+        # Historique du joueur: jamais expiré comme une session inactive
+        state, _ = self.store.update(self.KEY_PREFIX + player_id, apply, persistent=True)
+        return state
+
+    # ==================== LECTURE ====================
+
+    def get(self, player_id: str) -> Optional[Dict[str, Any]]:
+        """Agrégats bruts du joueur (None si aucune séance)"""
+        state, _ = self.store.load(self.KEY_PREFIX + player_id)
+        return state
+
+    def snapshot(self, player_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Résumé compact pour le prompt de l'agent (remplace la relecture des anciennes séances)
+
+        Args:
+            player_id: Identifiant du joueur
+
+        Returns:
+            dict: seances, serie_jours, derniere_seance, erreur_travaillee, seances_sur_erreur,
+                  metriques (derniere, meilleure, score, tendance); None si aucune séance
+        """
+        state = self.get(player_id)
+        if not state:
+            return None
+        metrics = {}
+        for name, aggregate in state['metrics'].items():
+            if aggregate['count'] < 2:
+                trend = 'nouvelle'
+            elif aggregate['trend'] > TREND_THRESHOLD:
+                trend = 'en_progres'
+            elif aggregate['trend'] < -TREND_THRESHOLD:
+                trend = 'en_baisse'
+            else:
+                trend = 'stable'
+            metrics[name] = {
+                'derniere': aggregate['last'],
+                'meilleure': aggregate['best'],
+                'score': round(aggregate['ewma'], 2),
+                'tendance': trend
+            }
+        return {
+            'seances': state['sessions'],
+            'serie_jours': state['day_streak'],
+            'derniere_seance': state['last_day'],
+            'erreur_travaillee': state['current_error'],
+            'seances_sur_erreur': state['error_streak'],
+            'metriques': metrics
+        }
+
+
+_progress: Optional[ProgressStore] = None
+_progress_lock = threading.Lock()
+
+
+def get_progress_store() -> ProgressStore:
+    """Stockage de progression partagé par le processus"""
+    global _progress
+    with _progress_lock:
+        if _progress is None:
+            _progress = ProgressStore()
+        return _progress
@@ -0,0 +1,335 @@
+"""
+État partagé des sessions Tennis AI
+Stockage externe (SQLite WAL ou Redis) de l'état des agents et du cache TTS pour le multi-réplicas
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class ConflictError(Exception):
+    """Version de session modifiée par un autre worker (concurrence optimiste)"""
+
+
+class SessionStore:
+    """Interface de stockage partagé (état versionné + blobs)"""
+
+    def load(self, session_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        """
+        Lire l'état d'une session
+
+        Args:
+            session_id: Identifiant de session
+
+        Returns:
+            tuple: (état ou None, version; 0 si absente)
+        """
+        raise NotImplementedError
+
+    def save(self, session_id: str, state: Dict[str, Any], expected_version: int,
+             persistent: bool = False) -> int:
+        """
+        Écrire l'état si la version n'a pas changé (compare-and-set)
+
+        Args:
+            session_id: Identifiant de session
+            state: Nouvel état
+            expected_version: Version lue avant modification (0 pour une création)
+            persistent: Jamais expiré (ex: agrégats de progression); sinon expiration
+                après `session_ttl_s` d'inactivité
+
+        Returns:
+            int: Nouvelle version
+
+        Raises:
+            ConflictError: Si un autre worker a écrit entre-temps
+        """
+        raise NotImplementedError
+
+    def get_blob(self, key: str) -> Optional[bytes]:
+        """Lire un blob (ex: audio TTS)"""
+        raise NotImplementedError
+
+    def put_blob(self, key: str, data: bytes, ttl_s: Optional[int] = None) -> None:
+        """Écrire un blob avec expiration optionnelle"""
+        raise NotImplementedError
+
+    def acquire_lease(self, key: str, owner: str, ttl_s: float) -> bool:
+        """
+        Prendre un bail exclusif sur une clé (ex: une session pendant un tour de l'agent)
+
+        Args:
+            key: Clé protégée
+            owner: Identifiant unique du détenteur
+            ttl_s: Durée du bail; il expire seul si le détenteur disparaît
+
+        Returns:
+            bool: True si le bail est obtenu, False s'il est détenu par un autre
+        """
+        raise NotImplementedError
+
+    def release_lease(self, key: str, owner: str) -> None:
+        """Rendre un bail (sans effet s'il a expiré ou appartient à un autre)"""
+        raise NotImplementedError
+
+    def update(
+        self,
+        session_id: str,
+        fn: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+        retries: int = 2,
+        persistent: bool = False
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Appliquer `fn` à l'état courant avec relecture en cas de conflit
+
+        `fn` peut être rejouée: elle doit être pure et peu coûteuse (jamais d'appel modèle,
+        voir `acquire_lease` pour sérialiser un tour de l'agent).
+
+        Args:
+            session_id: Identifiant de session
+            fn: Transformation état -> nouvel état (rejouée après un conflit)
+            retries: Nombre de relectures autorisées
+            persistent: Jamais expiré (voir `save`)
+
+        Returns:
+            tuple: (nouvel état, nouvelle version)
+        """
+        for attempt in range(retries + 1):
+            state, version = self.load(session_id)
+            new_state = fn(state)
+            try:
+                return new_state, self.save(session_id, new_state, version, persistent)
+            except ConflictError:
+                if attempt == retries:
+                    raise
+        raise ConflictError(session_id)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Stockage SQLite en mode WAL (plusieurs processus sur un même volume)"""
+
+    # Intervalle minimal entre deux purges des lignes expirées (déclenchées par les écritures)
+    PURGE_INTERVAL_S = 3600
+
+    def __init__(self, path: str = 'sessions/state.db', session_ttl_s: int = 7 * 24 * 3600):
+        """
+        Ouvrir la base
+
+        Args:
+            path: Chemin du fichier SQLite
+            session_ttl_s: Expiration d'une session inactive (repoussée à chaque écriture, comme Redis)
+        """
+        self.path = path
+        self.session_ttl_s = session_ttl_s
+        self._last_purge = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Une connexion par thread (les sessions Streamlit tournent dans des threads distincts)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, version INTEGER NOT NULL, "
+                "state TEXT NOT NULL, updated_at REAL NOT NULL, expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expires_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "key TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        row = self._connect().execute(
+            "SELECT state, version FROM sessions WHERE session_id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (session_id, time.time())
+        ).fetchone()
+        if row is None:
+            return None, 0
+        return json.loads(row[0]), row[1]
+
+    def save(self, session_id: str, state: Dict[str, Any], expected_version: int,
+             persistent: bool = False) -> int:
+        payload = json.dumps(state, ensure_ascii=False)
+        now = time.time()
+        expires_at = None if persistent else now + self.session_ttl_s
+        with self._connect() as conn:
+            if expected_version == 0:
+                # Création, ou remplacement d'une session expirée pas encore purgée
+                cursor = conn.execute(
+                    "INSERT INTO sessions (session_id, version, state, updated_at, expires_at) "
+                    "VALUES (?, 1, ?, ?, ?) ON CONFLICT(session_id) DO UPDATE SET "
+                    "version = 1, state = excluded.state, updated_at = excluded.updated_at, "
+                    "expires_at = excluded.expires_at "
+                    "WHERE sessions.expires_at IS NOT NULL AND sessions.expires_at <= ?",
+                    (session_id, payload, now, expires_at, now)
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE sessions SET version = version + 1, state = ?, updated_at = ?, expires_at = ? "
+                    "WHERE session_id = ? AND version = ? AND (expires_at IS NULL OR expires_at > ?)",
+                    (payload, now, expires_at, session_id, expected_version, now)
+                )
+        if cursor.rowcount != 1:
+            raise ConflictError(f"Session {session_id} modifiée par un autre worker")
+        if now - self._last_purge > self.PURGE_INTERVAL_S:
+            self.purge_expired(now)
+        return expected_version + 1
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """
+        Supprimer sessions, blobs et baux expirés (Redis les expire seul)
+
+        Returns:
+            int: Nombre de sessions supprimées
+        """
+        now = time.time() if now is None else now
+        self._last_purge = now
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM blobs WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+        return cursor.rowcount
+
+    def get_blob(self, key: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            "SELECT data, expires_at FROM blobs WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return row[0]
+
+    def put_blob(self, key: str, data: bytes, ttl_s: Optional[int] = None) -> None:
+        expires_at = time.time() + ttl_s if ttl_s else None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs (key, data, expires_at) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(data), expires_at)
+            )
+
+    def acquire_lease(self, key: str, owner: str, ttl_s: float) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires_at < ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, owner, now + ttl_s)
+            )
+        return cursor.rowcount == 1
+
+    def release_lease(self, key: str, owner: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+
+class RedisSessionStore(SessionStore):
+    """Stockage Redis (dépendance optionnelle `redis`)"""
+
+    PREFIX = 'tennis-ai'
+
+    # Suppression d'un bail seulement par son détenteur (GET + DEL atomiques)
+    _RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', session_ttl_s: int = 7 * 24 * 3600):
+        """
+        Se connecter à Redis
+
+        Args:
+            url: URL Redis
+            session_ttl_s: Expiration d'une session inactive (repoussée à chaque écriture)
+        """
+        try:
+            import redis
+        except ImportError:
+            raise Exception("Le paquet 'redis' est requis pour TENNIS_AI_STATE_URL=redis://... (pip install redis)")
+        self._redis = redis.Redis.from_url(url)
+        self._watch_error = redis.WatchError
+        self.session_ttl_s = session_ttl_s
+
+    def _key(self, kind: str, key: str) -> str:
+        return f"{self.PREFIX}:{kind}:{key}"
+
+    def load(self, session_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        values = self._redis.hmget(self._key('session', session_id), 'state', 'version')
+        if values[0] is None:
+            return None, 0
+        return json.loads(values[0]), int(values[1])
+
+    def save(self, session_id: str, state: Dict[str, Any], expected_version: int,
+             persistent: bool = False) -> int:
+        key = self._key('session', session_id)
+        payload = json.dumps(state, ensure_ascii=False)
+        with self._redis.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = pipe.hget(key, 'version')
+                if int(current or 0) != expected_version:
+                    raise ConflictError(f"Session {session_id} modifiée par un autre worker")
+                pipe.multi()
+                pipe.hset(key, mapping={'state': payload, 'version': expected_version + 1})
+                if persistent:
+                    pipe.persist(key)
+                else:
+                    pipe.expire(key, self.session_ttl_s)
+                pipe.execute()
+            except self._watch_error:
+                raise ConflictError(f"Session {session_id} modifiée par un autre worker")
+        return expected_version + 1
+
+    def get_blob(self, key: str) -> Optional[bytes]:
+        return self._redis.get(self._key('blob', key))
+
+    def put_blob(self, key: str, data: bytes, ttl_s: Optional[int] = None) -> None:
+        self._redis.set(self._key('blob', key), data, ex=ttl_s)
+
+    def acquire_lease(self, key: str, owner: str, ttl_s: float) -> bool:
+        return bool(self._redis.set(self._key('lease', key), owner, nx=True, px=int(ttl_s * 1000)))
+
+    def release_lease(self, key: str, owner: str) -> None:
+        self._redis.eval(self._RELEASE_SCRIPT, 1, self._key('lease', key), owner)
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """
+    Stockage partagé configuré par TENNIS_AI_STATE_URL (singleton du processus)
+
+    - sqlite:///sessions/state.db : SQLite WAL (stand-in local, volume partagé)
+    - redis://host:6379/0 : Redis
+
+    Returns:
+        SessionStore ou None si le mode partagé n'est pas activé
+    """
+    global _store
+    url = os.getenv('TENNIS_AI_STATE_URL')
+    if not url:
+        return None
+    with _store_lock:
+        if _store is None:
+            if url.startswith('sqlite:///'):
+                _store = SQLiteSessionStore(url[len('sqlite:///'):])
+            elif url.startswith(('redis://', 'rediss://')):
+                _store = RedisSessionStore(url)
+            else:
+                raise ValueError(f"TENNIS_AI_STATE_URL non supportée: {url}")
+    return _store
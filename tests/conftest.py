@@ -0,0 +1,9 @@
+"""
+Configuration pytest Tennis AI
+"""
+
+import os
+import sys
+
+# Ajouter la racine du projet au path pour importer les modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,98 @@
+"""
+Tests de l'index analytics des sessions (indexation incrémentale, funnel, étapes, latence)
+"""
+
+import json
+import logging
+import os
+
+import pytest
+
+from tools.analytics import SessionIndex
+
+
+def _turn(stage, latency_ms, output_tokens=20):
+    return {"stage": stage, "latency_ms": latency_ms, "output_tokens": output_tokens,
+            "stop_reason": "end_turn", "trimmed": False}
+
+
+SESSIONS = {
+    # Joueur FR arrivé au bout
+    "a.json": {"user_type": "player", "language": "fr", "current_stage": "terminé",
+               "turn_metrics": [_turn("bienvenue", 100), _turn("profil", 200), _turn("profil", 300)]},
+    # Joueur FR abandonné à l'étape profil
+    "b.json": {"user_type": "player", "language": "fr", "current_stage": "profil",
+               "turn_metrics": [_turn("bienvenue", 400), _turn("profil", 500)]},
+    # Joueur EN abandonné à l'accueil
+    "c.json": {"user_type": "player", "language": "en", "current_stage": "bienvenue",
+               "turn_metrics": [_turn("bienvenue", 1000)]},
+    # Ancienne sauvegarde: pas de métriques de tour
+    "d.json": {"user_type": "coach", "current_stage": "profil_coach",
+               "conversation_history": [{"role": "user"}, {"role": "assistant"}, {"role": "user"}]},
+}
+
+
+def _write(directory, name, data):
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+@pytest.fixture
+def index(tmp_path):
+    sessions_dir = tmp_path / "sessions"
+    sessions_dir.mkdir()
+    for name, data in SESSIONS.items():
+        _write(sessions_dir, name, data)
+    return SessionIndex(str(tmp_path / "analytics.db"), str(sessions_dir))
+
+
+def test_update_is_incremental(index):
+    assert index.update()["indexed"] == 4
+    counts = index.update()
+    assert (counts["indexed"], counts["unchanged"]) == (0, 4)
+
+    _write(index.sessions_dir, "b.json", dict(SESSIONS["b.json"], current_stage="objectifs"))
+    os.remove(os.path.join(index.sessions_dir, "c.json"))
+    counts = index.update()
+    assert (counts["indexed"], counts["unchanged"], counts["removed"]) == (1, 2, 1)
+    assert index.conn.execute("SELECT COUNT(*) FROM turns WHERE path = 'c.json'").fetchone()[0] == 0
+
+
+def test_corrupt_file_is_logged_and_retried(index, caplog):
+    with open(os.path.join(index.sessions_dir, "e.json"), "w", encoding="utf-8") as f:
+        f.write("{tronqué")
+    with caplog.at_level(logging.WARNING, logger="tools.analytics"):
+        counts = index.update()
+    assert counts["errors"] == 1
+    assert "e.json" in caplog.text
+    assert index.update()["errors"] == 1
+
+
+def test_funnel_counts_reached_and_dropped(index):
+    index.update()
+    rows = {row["stage"]: row for row in index.funnel("player")}
+    assert (rows["bienvenue"]["reached"], rows["bienvenue"]["dropped"]) == (3, 1)
+    assert (rows["profil"]["reached"], rows["profil"]["dropped"]) == (2, 1)
+    assert rows["profil"]["drop_rate"] == 0.5
+    assert (rows["terminé"]["reached"], rows["terminé"]["dropped"]) == (1, 0)
+    # Ancienne sauvegarde: comptée dans le funnel coach sans ligne de tour
+    assert {row["stage"]: row["dropped"] for row in index.funnel("coach")}["profil_coach"] == 1
+
+
+def test_stages_average_turns_and_latency(index):
+    index.update()
+    rows = {row["stage"]: row for row in index.stages("player")}
+    assert rows["profil"]["turns"] == 3
+    assert rows["profil"]["sessions"] == 2
+    assert rows["profil"]["turns_per_session"] == 1.5
+    assert rows["profil"]["avg_latency_ms"] == 333.3
+    assert index.stages("coach") == []
+
+
+def test_latency_percentiles_by_language_and_user_type(index):
+    index.update()
+    rows = {(row["language"], row["user_type"]): row for row in index.latency()}
+    assert set(rows) == {("fr", "player"), ("en", "player")}
+    french = rows[("fr", "player")]
+    assert (french["turns"], french["mean_ms"], french["p50_ms"], french["p95_ms"]) == (5, 300.0, 300.0, 500.0)
+    assert rows[("en", "player")]["p95_ms"] == 1000.0
@@ -0,0 +1,115 @@
+"""
+Tests de la synthèse multi-élèves (classe de priorité, admission, homonymes, cache)
+"""
+
+import json
+import threading
+import time
+
+from agents.coach_synthesis import CoachSynthesis
+from api.bedrock_client import BedrockClient
+from api.scheduler import AdmissionScheduler
+
+
+class RecordingBedrock:
+    """Stand-in Bedrock qui enregistre les appels"""
+
+    def __init__(self, fail_ids=()):
+        self.calls = []
+        self.fail_ids = set(fail_ids)
+        self._lock = threading.Lock()
+
+    def chat(self, messages, system_prompt, max_tokens=1024, temperature=0.7,
+             stop_sequences=None, priority='interactive', session_id=None):
+        content = messages[0]["content"]
+        with self._lock:
+            self.calls.append({"priority": priority, "session_id": session_id, "content": content})
+        if max_tokens == 120:
+            student = json.loads(content)
+            if student["id"] in self.fail_ids:
+                raise RuntimeError("délesté")
+            return f"résumé {student['id']}"
+        return "synthèse"
+
+
+def roster():
+    return [
+        {"id": "e1", "version": 1, "name": "Léa"},
+        {"id": "e2", "version": 1, "name": "Léa"},
+        {"id": "e3", "version": 1, "name": "Tom"},
+    ]
+
+
+def test_summaries_run_in_dashboard_class():
+    bedrock = RecordingBedrock()
+    CoachSynthesis(bedrock).synthesize(roster(), session_id="coach")
+    summary_calls = [c for c in bedrock.calls if c["content"].startswith("{")]
+    merge_calls = [c for c in bedrock.calls if not c["content"].startswith("{")]
+    assert {c["priority"] for c in summary_calls} == {"dashboard"}
+    assert merge_calls[0]["priority"] == "interactive" and merge_calls[0]["session_id"] == "coach"
+
+
+def test_homonyms_are_kept_apart():
+    bedrock = RecordingBedrock()
+    result = CoachSynthesis(bedrock).synthesize(roster())
+    assert result["summaries"] == {"e1": "résumé e1", "e2": "résumé e2", "e3": "résumé e3"}
+    merge_prompt = bedrock.calls[-1]["content"]
+    assert "Léa (e1)" in merge_prompt and "Léa (e2)" in merge_prompt and "- Tom:" in merge_prompt
+
+
+def test_failed_student_is_reported_by_id_and_retried():
+    bedrock = RecordingBedrock(fail_ids={"e2"})
+    engine = CoachSynthesis(bedrock)
+    result = engine.synthesize(roster())
+    assert set(result["errors"]) == {"e2"}
+    assert set(result["summaries"]) == {"e1", "e3"}
+
+    bedrock.fail_ids.clear()
+    result = engine.synthesize(roster())
+    assert result["cache_hits"] == 2
+    assert set(result["summaries"]) == {"e1", "e2", "e3"}
+
+
+def test_fanout_queues_through_scheduler_without_shedding_or_reserved_slots():
+    client = BedrockClient.__new__(BedrockClient)
+    client.region, client.model_id = 'local', 'local-model'
+    # 4 slots dont 1 réservé à l'interactif: 10 résumés doivent faire la queue
+    client.scheduler = AdmissionScheduler('test', max_concurrency=4, max_queue=64)
+    release = threading.Event()
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def invoke(body):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+        return "résumé", {"input_tokens": 10, "output_tokens": 5}
+
+    client._invoke = invoke
+    students = [{"id": f"e{i}", "version": 1, "name": f"Élève {i}"} for i in range(10)]
+    results = []
+    thread = threading.Thread(target=lambda: results.append(CoachSynthesis(client).synthesize(students)))
+    thread.start()
+
+    for _ in range(1000):
+        stats = client.scheduler.stats()
+        if stats["in_flight"] == 3 and stats["classes"]["dashboard"]["waiting"] == 7:
+            break
+        time.sleep(0.001)
+    else:
+        raise AssertionError("les résumés n'ont pas rempli les slots non réservés")
+    # Le slot réservé reste libre pour un tour interactif
+    ticket = client.scheduler.acquire('interactive')
+    client.scheduler.release(ticket)
+
+    release.set()
+    thread.join(5)
+    result = results[0]
+    assert result["errors"] == {}
+    assert len(result["summaries"]) == 10 and result["digest"] == "résumé"
+    assert peak[0] == 3
+    stats = client.scheduler.stats()["classes"]
+    assert stats["dashboard"]["shed"] == 0 and stats["dashboard"]["admitted"] == 10
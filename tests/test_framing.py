@@ -0,0 +1,46 @@
+"""
+Tests de la validation du cadrage (orientation EXIF, angles requis)
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+from analysis.framing import prepare_frame, summarize_framing, validate_angles
+
+
+def _portrait_upload() -> bytes:
+    """JPEG stocké en paysage avec orientation EXIF 6 (téléphone tenu en portrait)"""
+    pixels = np.zeros((240, 320), dtype=np.uint8)
+    pixels[:, 160:] = 255
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+def test_prepare_frame_applies_exif_orientation():
+    gray, size = prepare_frame(_portrait_upload(), width=120)
+    assert size == (240, 320)
+    assert gray.shape == (160, 120)
+    # Rotation de 90° horaire: la moitié gauche stockée (noire) s'affiche en haut
+    assert gray[:60].mean() < 50 < 200 < gray[-60:].mean()
+
+
+def test_no_frames_is_not_valid():
+    report = validate_angles({})
+    assert not report['ok']
+    assert report['manquants'] == ['lateral']
+    summary = summarize_framing(report)
+    assert summary['angles'] == {'lateral': 'angle_manquant'}
+    assert summary['consigne']
+
+
+def test_missing_required_angle_is_reported_in_language():
+    report = validate_angles({'frontal': Image.new('RGB', (320, 180), (90, 90, 90))}, language='en')
+    assert not report['ok']
+    assert report['manquants'] == ['lateral']
+    assert report['message'].startswith('Missing angle')
+    assert 'frontal' in report['angles']
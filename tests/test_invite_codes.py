@@ -0,0 +1,94 @@
+"""
+Tests des codes d'invitation (caractère de contrôle, expiration, utilisations, limitation)
+"""
+
+import time
+
+import pytest
+
+from storage.invite_codes import (ALPHABET, InviteCodeError, InviteCodeService, RateLimitedError,
+                                  SQLiteInviteCodeStore, _check_char, format_code, generate_code,
+                                  normalize_code)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteInviteCodeStore(str(tmp_path / "invites.db"))
+
+
+@pytest.fixture
+def service(store):
+    return InviteCodeService(store)
+
+
+def _reason(service, text, player_id, client_id=None):
+    with pytest.raises(InviteCodeError) as excinfo:
+        service.redeem(text, player_id, client_id=client_id)
+    return excinfo.value.reason
+
+
+def test_normalize_accepts_display_and_dictation_forms():
+    code = generate_code()
+    spoken = format_code(code).lower().replace("0", "o").replace("1", "l")
+    assert normalize_code(format_code(code)) == code
+    assert normalize_code(" ".join(spoken)) == code
+
+
+def test_single_character_typo_fails_check_character():
+    code = generate_code()
+    for position in range(len(code)):
+        for char in ALPHABET:
+            if char != code[position]:
+                typo = code[:position] + char + code[position + 1:]
+                assert normalize_code(typo) is None
+
+
+def test_malformed_code_is_rejected_without_lookup(service):
+    assert _reason(service, "ABC", "p1") == "format"
+    assert service.resolve("ABC") is None
+
+
+def test_expired_code_is_rejected(store, service):
+    code = generate_code()
+    store.insert_many([{"code": code, "coach_id": "c1", "student": "Léa",
+                        "expires_at": time.time() - 1, "uses_left": 1}])
+    assert service.resolve(code) is None
+    assert _reason(service, code, "p1") == "expire"
+
+
+def test_consume_is_idempotent_per_player_and_bounded_by_max_uses(service):
+    code = service.issue("c1", ["Léa"])[0]["code"]
+    first = service.redeem(code, "p1")
+    assert (first["coach_id"], first["student"]) == ("c1", "Léa")
+    # Même élève: pas de nouvelle utilisation
+    assert service.redeem(code, "p1")["coach_id"] == "c1"
+    assert _reason(service, code, "p2") == "epuise"
+
+
+def test_group_code_allows_max_uses_players(service):
+    code = service.issue("c1", [None], max_uses=2)[0]["code"]
+    service.redeem(code, "p1")
+    service.redeem(code, "p2")
+    assert service.resolve(code)["uses_left"] == 0
+    assert _reason(service, code, "p3") == "epuise"
+
+
+def test_rate_limit_follows_client_across_players(service):
+    code = service.issue("c1", ["Léa"])[0]["code"]
+    # Chaque rechargement de page = nouveau joueur anonyme, même client
+    for i in range(InviteCodeService.MAX_FAILURES):
+        _reason(service, "ABC", f"anonyme-{i}", client_id="10.0.0.1")
+    with pytest.raises(RateLimitedError) as excinfo:
+        service.redeem(code, "anonyme-x", client_id="10.0.0.1")
+    assert excinfo.value.retry_after_s > 0
+    assert service.redeem(code, "p1", client_id="10.0.0.2")["coach_id"] == "c1"
+
+
+def test_wrong_guesses_on_a_code_do_not_block_its_owner(service):
+    code = service.issue("c1", ["Léa"])[0]["code"]
+    prefix = normalize_code(code)[:4]
+    # Codes bien formés de même préfixe, essayés par plusieurs clients: le vrai code reste utilisable
+    for i in range(InviteCodeService.MAX_FAILURES * 5):
+        body = prefix + f"{i:04d}"
+        assert _reason(service, body + _check_char(body), f"p{i}", client_id=f"client-{i}") == "inconnu"
+    assert service.redeem(code, "p-lea", client_id="client-lea")["student"] == "Léa"
@@ -0,0 +1,48 @@
+"""
+Tests de la détection de niveau (extraction des réponses, confiance)
+"""
+
+import numpy as np
+import pytest
+
+from analysis.level_classifier import build_features, get_level_classifier, parse_answers
+
+
+@pytest.mark.parametrize("text", ["Dispo le 12/3.", "Ma fille est en classe de 3e.", "Le 15/3/2024 au club."])
+def test_dates_and_school_classes_are_not_rankings(text):
+    assert parse_answers(text)["classe"] is None
+
+
+@pytest.mark.parametrize("text", ["Je suis classé 30/1.", "classée 15/2", "Je suis 4/6", "-2/6", "I'm ranked", "UTR 9"])
+def test_rankings_are_detected(text):
+    assert parse_answers(text)["classe"] == 1.0
+
+
+@pytest.mark.parametrize("text", ["Je suis non classé.", "Pas de classement.", "NC", "not ranked"])
+def test_unranked_is_an_explicit_zero(text):
+    assert parse_answers(text)["classe"] == 0.0
+
+
+def test_competition_affirmed_denied_or_unknown():
+    assert parse_answers("Je fais des tournois.")["competition"] == 1.0
+    assert parse_answers("Jamais fait de tournoi, je joue en loisir.")["competition"] == 0.0
+    assert parse_answers("Je joue depuis 3 ans.")["competition"] is None
+
+
+def test_years_and_sessions():
+    answers = parse_answers("J'ai 24 ans, je joue depuis 6 mois, 2 fois par semaine.")
+    assert answers["annees_pratique"] == pytest.approx(0.5)
+    assert answers["seances_par_semaine"] == 2.0
+
+
+def test_unmentioned_answers_are_missing_features():
+    X = build_features([{"answers": parse_answers("Bonjour !")}])
+    assert np.isnan(X).all()
+    assert get_level_classifier().classify_one({"answers": parse_answers("Bonjour !")})["fallback"]
+
+
+def test_rule_applies_to_ranked_competitor():
+    result = get_level_classifier().classify_one(
+        {"answers": parse_answers("Classé 15/1, je fais des tournois depuis 8 ans.")}
+    )
+    assert result["niveau_estime"] == "avancé" and result["source"] == "regle"
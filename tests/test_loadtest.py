@@ -0,0 +1,47 @@
+"""
+Tests du générateur de charge (modèles closed / open contre les stand-ins locaux)
+"""
+
+import argparse
+import csv
+
+import pytest
+
+from tools.loadtest import LoadTest, find_saturation, parse_ramp, write_curves
+
+
+def _args(**overrides):
+    values = dict(time_scale=0.0005, slo_p95_ms=2000.0, llm_first_token_ms=2.0, llm_sigma=0.0,
+                  llm_tokens_per_s=1e5, llm_output_tokens=10, bedrock_concurrency=8, tts=False, seed=7)
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+@pytest.mark.parametrize("model, ramp", [("closed", [(2, 0.4), (4, 0.4)]), ("open", [(20, 0.4)])])
+def test_load_model_produces_steps_against_local_clients(model, ramp, tmp_path):
+    report = LoadTest(model, ramp, _args()).run()
+
+    assert report["model"] == model
+    assert [step["load"] for step in report["steps"]] == [load for load, _ in ramp]
+    assert all(step["turns"] > 0 and step["errors"] == 0 for step in report["steps"])
+    assert all(step["p95_ms"] is not None for step in report["steps"])
+
+    output = tmp_path / "report.json"
+    write_curves(report, str(output))
+    with open(tmp_path / "report.csv", encoding="utf-8") as f:
+        assert len(list(csv.DictReader(f))) == len(ramp)
+
+
+def test_parse_ramp_defaults_duration():
+    assert parse_ramp("5:20,10") == [(5.0, 20.0), (10.0, 30.0)]
+
+
+def test_saturation_on_slo_or_throughput_plateau():
+    steps = [
+        {"load": 5, "throughput_tps": 10.0, "p95_ms": 500.0},
+        {"load": 10, "throughput_tps": 20.0, "p95_ms": 600.0},
+        {"load": 20, "throughput_tps": 20.5, "p95_ms": 900.0},
+    ]
+    assert find_saturation(steps, 2000.0) == {"saturated_at": 20, "reason": "débit plafonné", "capacity": 10}
+    assert find_saturation(steps, 550.0)["capacity"] == 5
+    assert find_saturation(steps[:2], 2000.0) == {"saturated_at": None, "reason": "non atteinte", "capacity": 10}
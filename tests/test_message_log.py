@@ -0,0 +1,73 @@
+"""
+Tests du journal de conversation (source unique de l'historique)
+"""
+
+from agents.message_log import MessageLog
+
+
+def make_log():
+    log = MessageLog()
+    log.append("assistant", "Bienvenue !", local=True)
+    log.append("user", "Bonjour")
+    log.append("assistant", "Quel est ton niveau ?")
+    return log
+
+
+def test_local_messages_are_displayed_but_not_sent():
+    log = make_log()
+    assert len(log) == 3
+    assert log.payload_size() == 2
+    assert [m["role"] for m in log.to_bedrock()] == ["user", "assistant"]
+    assert log.to_bedrock()[0] == {"role": "user", "content": [{"type": "text", "text": "Bonjour"}]}
+
+
+def test_payload_is_encoded_once_and_shared():
+    log = make_log()
+    first = log.to_bedrock()
+    log.append("user", "Intermédiaire")
+    assert log.to_bedrock() is first
+    assert first[-1]["content"][0]["text"] == "Intermédiaire"
+
+
+def test_pop_keeps_payload_in_sync():
+    log = make_log()
+    log.append("user", "en échec")
+    log.pop()
+    assert log.payload_size() == 2
+    log.append("user", "affiché seulement", local=True)
+    log.pop()
+    assert log.payload_size() == 2
+    assert len(log) == 3
+
+
+def test_slicing_returns_a_log_with_its_own_payload():
+    log = make_log()
+    tail = log[1:]
+    assert isinstance(tail, MessageLog)
+    assert len(tail) == 2
+    assert tail.payload_size() == 2
+    head = log[:1]
+    assert len(head) == 1 and head.payload_size() == 0
+    assert log[-1].text == "Quel est ton niveau ?"
+
+
+def test_unpacking_for_ui():
+    role, text = make_log()[1]
+    assert (role, text) == ("user", "Bonjour")
+
+
+def test_records_round_trip_preserves_local_flag():
+    log = make_log()
+    restored = MessageLog.from_records(log.to_records())
+    assert restored.to_records() == log.to_records()
+    assert restored.payload_size() == 2
+    # Anciens enregistrements sans drapeau `local`
+    assert MessageLog.from_records([("user", "salut")]).payload_size() == 1
+
+
+def test_from_bedrock_accepts_string_and_block_content():
+    log = MessageLog.from_bedrock([
+        {"role": "user", "content": "texte brut"},
+        {"role": "assistant", "content": [{"type": "text", "text": "a"}, {"type": "text", "text": "b"}]},
+    ])
+    assert [m.text for m in log] == ["texte brut", "ab"]
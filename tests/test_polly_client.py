@@ -0,0 +1,66 @@
+"""
+Tests des formats audio TTS (choix par client, validation, encapsulation WAV, cache)
+"""
+
+import io
+import wave
+
+import pytest
+
+from api.audio_cache import AudioCache
+from api.polly_client import PollyClient, _wrap_wav
+
+
+@pytest.mark.parametrize("user_agent, expected", [
+    ("Mozilla/5.0 (iPhone; CPU iPhone OS 17_0) AppleWebKit Safari/604.1", ("mp3", "16000")),
+    ("Mozilla/5.0 (Macintosh) AppleWebKit/605.1.15 Version/17.0 Safari/605.1.15", ("mp3", "16000")),
+    ("Mozilla/5.0 (Linux; Android 14) Chrome/120.0 Mobile Safari/537.36", ("ogg_vorbis", "16000")),
+    ("Mozilla/5.0 (Windows NT 10.0) Chrome/120.0 Safari/537.36", ("mp3", None)),
+    (None, ("mp3", None)),
+])
+def test_choose_format_by_client(user_agent, expected):
+    assert PollyClient.choose_format(user_agent) == expected
+
+
+def test_every_chosen_format_is_supported():
+    for user_agent in (None, "iPhone Safari", "Android Mobile"):
+        assert PollyClient.check_format(*PollyClient.choose_format(user_agent))
+
+
+def test_parse_forced_format():
+    assert PollyClient.parse_format("ogg_vorbis:16000") == ("ogg_vorbis", "16000")
+    assert PollyClient.parse_format("mp3") == ("mp3", None)
+    # PCM sans fréquence: 16 kHz (nécessaire à l'en-tête WAV)
+    assert PollyClient.parse_format("pcm") == ("pcm", "16000")
+
+
+@pytest.mark.parametrize("spec", ["flac", "pcm:22050", "mp3:44100", ""])
+def test_unsupported_format_or_sample_rate_is_rejected(spec):
+    with pytest.raises(ValueError):
+        PollyClient.parse_format(spec)
+
+
+def test_synthesize_validates_before_calling_polly():
+    polly = PollyClient.__new__(PollyClient)
+    polly.voice_config = PollyClient.VOICES['fr']
+    with pytest.raises(ValueError):
+        polly.synthesize("Bonjour", audio_format="pcm", sample_rate="24000")
+
+
+def test_pcm_is_wrapped_in_playable_wav():
+    pcm = bytes(range(256)) * 10
+    with wave.open(io.BytesIO(_wrap_wav(pcm, 16000))) as wav:
+        assert (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (1, 2, 16000)
+        assert wav.readframes(wav.getnframes()) == pcm
+    assert PollyClient.content_type("pcm") == "audio/wav"
+
+
+def test_cache_keeps_one_entry_per_encoding_and_evicts_oldest():
+    cache = AudioCache(max_entries=2)
+    mp3 = AudioCache.make_key("Salut", "Lea", "neural", "mp3")
+    ogg = AudioCache.make_key("Salut", "Lea", "neural", "ogg_vorbis", "16000")
+    cache.put(mp3, b"mp3")
+    cache.put(ogg, b"ogg")
+    assert cache.get(mp3) == b"mp3"
+    cache.put(AudioCache.make_key("Autre", "Lea", "neural"), b"x")
+    assert cache.get(ogg) is None and cache.get(mp3) == b"mp3"
@@ -0,0 +1,58 @@
+"""
+Tests du préchargement TTS pendant le temps de lecture de l'utilisateur
+"""
+
+import threading
+import time
+
+from agents.prefetch import Prefetcher
+
+
+def test_schedule_is_skipped_without_tts():
+    prefetcher = Prefetcher()
+    assert not prefetcher.schedule("Bonjour !")
+    assert prefetcher.stats["scheduled"] == 0
+
+
+def test_reply_is_presynthesized():
+    prefetcher = Prefetcher()
+    done = threading.Event()
+    spoken = []
+    prefetcher.tts = lambda text: (spoken.append(text), done.set())
+
+    assert prefetcher.schedule("Quel est ton niveau ?")
+    assert done.wait(5)
+    assert spoken == ["Quel est ton niveau ?"]
+
+
+def test_superseded_reply_is_not_synthesized():
+    prefetcher = Prefetcher()
+    spoken = []
+    prefetcher.tts = spoken.append
+    # Génération périmée: un nouveau tour a commencé avant l'exécution
+    prefetcher._run(prefetcher._generation - 1, "ancienne réplique", prefetcher.tts, time.perf_counter())
+    assert spoken == []
+    assert prefetcher.stats["stale"] == 1
+
+
+def test_tts_failure_is_logged_not_raised(caplog):
+    prefetcher = Prefetcher()
+
+    def boom(text):
+        raise RuntimeError("polly indisponible")
+
+    prefetcher._run(prefetcher._generation, "réplique", boom, time.perf_counter())
+    assert "polly indisponible" in caplog.text
+
+
+def test_stats_are_consistent_under_concurrent_workers():
+    prefetcher = Prefetcher()
+    workers = [
+        threading.Thread(target=lambda: [prefetcher._run(-1, "x", None, 0.0) for _ in range(500)])
+        for _ in range(8)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert prefetcher.stats["stale"] == 4000
@@ -0,0 +1,66 @@
+"""
+Tests de l'assemblage des programmes d'entrée (contraintes, variété, cache)
+"""
+
+import pytest
+
+from training.program_builder import ProgramBuilder, parse_constraints
+
+
+@pytest.mark.parametrize("text, minutes", [
+    ("Des séances de 45 min", 45),
+    ("1h30 par séance", 90),
+    ("1 h 30 min", 90),
+    ("1,5 heure", 90),
+    ("2 heures", 120),
+    ("Mardi à 18h, séances de 45 min", 45),
+    ("Vers 9h30, pendant 1h", 60),
+    ("Je suis dispo mardi à 18h", None),
+    ("J'ai 12 ans", None),
+])
+def test_session_duration(text, minutes):
+    assert parse_constraints(text)["session_minutes"] == minutes
+
+
+def test_equipment_matches_whole_words():
+    assert parse_constraints("un murmure dans la machinerie")["equipment"] == {"balles"}
+    assert parse_constraints("Contre le mur, avec des plots et un panier")["equipment"] == {
+        "balles", "mur", "plots", "panier"
+    }
+
+
+@pytest.fixture(scope="module")
+def builder():
+    return ProgramBuilder()
+
+
+def test_program_respects_duration_and_single_error(builder):
+    program = builder.build("intermédiaire", primary_error="contact", equipment=("plots",), session_minutes=45)
+    assert program["feasible"] and program["focus"] == "contact_point"
+    assert len(program["sessions"]) == ProgramBuilder.SESSIONS
+    for session in program["sessions"]:
+        assert session["minutes"] <= 45
+        techniques = [d for d in session["drills"] if d["phase"] == "technique"]
+        assert techniques
+        for drill in techniques:
+            assert "contact_point" in builder.catalog.drills[drill["id"]]["targets"]
+            assert builder.catalog.drills[drill["id"]]["equipment"] <= {"balles", "plots"}
+
+
+def test_sessions_vary_when_the_catalog_allows(builder):
+    kit = ("plots", "partenaire", "panier", "trepied")
+    program = builder.build("intermédiaire", primary_error="contact_point", equipment=kit, session_minutes=45)
+    cores = [
+        frozenset(d["id"] for d in session["drills"] if d["phase"] in ("technique", "application"))
+        for session in program["sessions"]
+    ]
+    assert len(set(cores)) == len(cores)
+    # Échauffement et retour au calme peuvent revenir d'une séance à l'autre
+    assert program["relaxed"] == []
+
+
+def test_equivalent_signatures_share_the_cached_program(builder):
+    first = builder.build("avancé", primary_error="timing", equipment=("mur",), session_minutes=42)
+    second = builder.build("avancé", primary_error="timing", equipment=["mur", "balles"], session_minutes=40)
+    assert not first["cached"] and second["cached"]
+    assert second["sessions"] is first["sessions"]
@@ -0,0 +1,76 @@
+"""
+Tests des agrégats de progression (idempotence, séries, EWMA)
+"""
+
+import time
+from datetime import date
+
+import pytest
+
+from storage.progress_store import ProgressStore
+from storage.session_store import SQLiteSessionStore
+
+RANGES = {"knee_angle": (120.0, 150.0)}
+
+
+@pytest.fixture
+def progress(tmp_path):
+    return ProgressStore(SQLiteSessionStore(str(tmp_path / "progress.db")), ranges=RANGES)
+
+
+def test_same_session_is_counted_once_even_after_another(progress):
+    progress.record("p1", {"knee_angle": 130}, session_id="A", day=date(2026, 5, 1))
+    progress.record("p1", {"knee_angle": 135}, session_id="B", day=date(2026, 5, 2))
+    state = progress.record("p1", {"knee_angle": 130}, session_id="A", day=date(2026, 5, 2))
+    assert state["sessions"] == 2
+    assert state["metrics"]["knee_angle"]["count"] == 2
+
+
+def test_recent_sessions_are_bounded(progress):
+    for i in range(ProgressStore.RECENT_SESSIONS + 5):
+        state = progress.record("p1", {}, session_id=f"s{i}", day=date(2026, 5, 1))
+    assert len(state["recent_sessions"]) == ProgressStore.RECENT_SESSIONS
+    assert state["recent_sessions"][-1] == f"s{ProgressStore.RECENT_SESSIONS + 4}"
+
+
+def test_progress_outlives_session_ttl(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "progress.db"), session_ttl_s=1)
+    progress = ProgressStore(store, ranges=RANGES)
+    progress.record("p1", {"knee_angle": 130}, session_id="A", day=date(2026, 5, 1))
+    store.purge_expired(time.time() + 3600)
+    assert progress.get("p1")["sessions"] == 1
+
+
+def test_day_streak_and_error_streak(progress):
+    progress.record("p1", {}, main_error="grip", session_id="A", day=date(2026, 5, 1))
+    progress.record("p1", {}, main_error="grip", session_id="B", day=date(2026, 5, 2))
+    state = progress.record("p1", {}, main_error="stance", session_id="C", day=date(2026, 5, 4))
+    assert state["best_day_streak"] == 2 and state["day_streak"] == 1
+    assert state["current_error"] == "stance" and state["error_streak"] == 1
+
+
+def test_snapshot_trend(progress):
+    progress.record("p1", {"knee_angle": 100}, session_id="A", day=date(2026, 5, 1))
+    progress.record("p1", {"knee_angle": 140}, session_id="B", day=date(2026, 5, 2))
+    snapshot = progress.snapshot("p1")
+    assert snapshot["seances"] == 2
+    assert snapshot["metriques"]["knee_angle"]["tendance"] == "en_progres"
+    assert snapshot["metriques"]["knee_angle"]["meilleure"] == 140
+    assert progress.snapshot("inconnu") is None
+
+
+def test_session_file_is_written_when_progress_store_fails(tmp_path, monkeypatch, caplog):
+    import storage.progress_store as progress_store
+    from agents.onboarding_agent import OnboardingAgent
+
+    def unavailable():
+        raise ConnectionError("stockage indisponible")
+
+    monkeypatch.setattr(progress_store, "get_progress_store", unavailable)
+    agent = OnboardingAgent("player", bedrock=object(), prefetch=False)
+    agent.player_id = "p1"
+    agent.set_swing_analysis({"metriques": {"knee_angle": 130}})
+    path = tmp_path / "session.json"
+    agent.save_session(str(path))
+    assert path.exists()
+    assert "stockage indisponible" in caplog.text
@@ -0,0 +1,88 @@
+"""
+Tests du contrôle d'admission (priorités, délestage, limites par session)
+"""
+
+import threading
+import time
+
+import pytest
+
+from api.scheduler import AdmissionScheduler, OverloadedError
+
+
+def test_interactive_waits_for_a_slot():
+    scheduler = AdmissionScheduler('test', max_concurrency=1, max_wait_s={'interactive': 2.0})
+    first = scheduler.acquire('interactive')
+    admitted = threading.Event()
+
+    def second():
+        with scheduler.admit('interactive'):
+            admitted.set()
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    time.sleep(0.05)
+    assert not admitted.is_set()
+    scheduler.release(first)
+    thread.join(2)
+    assert admitted.is_set()
+    assert scheduler.stats()["classes"]["interactive"]["admitted"] == 2
+
+
+def test_background_is_shed_without_waiting():
+    scheduler = AdmissionScheduler('test', max_concurrency=1)
+    ticket = scheduler.acquire('interactive')
+    start = time.perf_counter()
+    with pytest.raises(OverloadedError) as excinfo:
+        scheduler.acquire('background')
+    assert time.perf_counter() - start < 0.5
+    assert excinfo.value.priority == 'background'
+    assert scheduler.stats()["classes"]["background"]["shed"] == 1
+    scheduler.release(ticket)
+
+
+def test_background_never_takes_reserved_slots():
+    scheduler = AdmissionScheduler('test', max_concurrency=4, reserved_share=0.25)
+    tickets = [scheduler.acquire('background') for _ in range(3)]
+    with pytest.raises(OverloadedError):
+        scheduler.acquire('background')
+    # Le slot réservé reste disponible pour un tour utilisateur
+    tickets.append(scheduler.acquire('interactive'))
+    for ticket in tickets:
+        scheduler.release(ticket)
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_per_session_limit():
+    scheduler = AdmissionScheduler('test', max_concurrency=8, per_session=1,
+                                   max_wait_s={'interactive': 0.05})
+    ticket = scheduler.acquire('interactive', session_id='s1')
+    with pytest.raises(OverloadedError):
+        scheduler.acquire('interactive', session_id='s1')
+    scheduler.release(scheduler.acquire('interactive', session_id='s2'))
+    scheduler.release(ticket)
+
+
+def test_full_queue_is_shed_immediately():
+    scheduler = AdmissionScheduler('test', max_concurrency=1, max_queue=0)
+    ticket = scheduler.acquire('interactive')
+    with pytest.raises(OverloadedError) as excinfo:
+        scheduler.acquire('batch')
+    assert excinfo.value.reason == "file pleine"
+    scheduler.release(ticket)
+
+
+def test_token_budget_sheds_background_but_keeps_reserve():
+    scheduler = AdmissionScheduler('test', max_concurrency=8, tokens_per_minute=1000, reserved_share=0.25)
+    with scheduler.admit('background', tokens=700):
+        pass
+    # 300 tokens restants <= réserve interactive (250 + demande): le spéculatif est délesté
+    with pytest.raises(OverloadedError):
+        scheduler.acquire('background', tokens=100)
+    scheduler.release(scheduler.acquire('interactive', tokens=250))
+
+
+def test_unknown_priority_is_rejected():
+    scheduler = AdmissionScheduler('test', max_concurrency=1)
+    with pytest.raises(ValueError):
+        scheduler.acquire('urgent')
@@ -0,0 +1,105 @@
+"""
+Tests du stockage partagé des sessions (compare-and-set, baux, expiration)
+"""
+
+import time
+
+import pytest
+
+from storage.session_store import ConflictError, SQLiteSessionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteSessionStore(str(tmp_path / "state.db"))
+
+
+def test_save_increments_version_and_rejects_stale_writes(store):
+    assert store.load("s1") == (None, 0)
+    assert store.save("s1", {"n": 1}, 0) == 1
+    assert store.save("s1", {"n": 2}, 1) == 2
+    assert store.load("s1") == ({"n": 2}, 2)
+
+    with pytest.raises(ConflictError):
+        store.save("s1", {"n": 3}, 1)
+    with pytest.raises(ConflictError):
+        store.save("s1", {"n": 3}, 0)
+    assert store.load("s1") == ({"n": 2}, 2)
+
+
+def test_update_rereads_and_replays_after_conflict(store):
+    store.save("s1", {"n": 0}, 0)
+    calls = []
+
+    def increment(state):
+        calls.append(state["n"])
+        if len(calls) == 1:
+            # Écriture concurrente entre la lecture et l'écriture
+            store.save("s1", {"n": 10}, 1)
+        return {"n": state["n"] + 1}
+
+    state, version = store.update("s1", increment)
+    assert calls == [0, 10]
+    assert state == {"n": 11} and version == 3
+    assert store.load("s1") == ({"n": 11}, 3)
+
+
+def test_update_gives_up_after_retries(store):
+    store.save("s1", {"n": 0}, 0)
+    calls = []
+
+    def always_conflicting(state):
+        calls.append(1)
+        current, version = store.load("s1")
+        store.save("s1", current, version)
+        return {"n": -1}
+
+    with pytest.raises(ConflictError):
+        store.update("s1", always_conflicting, retries=2)
+    assert len(calls) == 3
+
+
+def test_update_creates_missing_state(store):
+    state, version = store.update("s2", lambda state: {"n": 1} if state is None else state)
+    assert (state, version) == ({"n": 1}, 1)
+
+
+def test_lease_is_exclusive_until_released(store):
+    assert store.acquire_lease("s1", "a", ttl_s=60)
+    assert not store.acquire_lease("s1", "b", ttl_s=60)
+    # Seul le détenteur peut rendre le bail
+    store.release_lease("s1", "b")
+    assert not store.acquire_lease("s1", "b", ttl_s=60)
+    store.release_lease("s1", "a")
+    assert store.acquire_lease("s1", "b", ttl_s=60)
+
+
+def test_lease_expires(store):
+    assert store.acquire_lease("s1", "a", ttl_s=0.01)
+    time.sleep(0.02)
+    assert store.acquire_lease("s1", "b", ttl_s=60)
+
+
+def test_inactive_session_expires_and_can_be_recreated(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "state.db"), session_ttl_s=0.01)
+    store.save("s1", {"n": 1}, 0)
+    time.sleep(0.02)
+    assert store.load("s1") == (None, 0)
+    # Session expirée non purgée: une création la remplace
+    assert store.save("s1", {"n": 2}, 0) == 1
+    assert store.load("s1") == ({"n": 2}, 1)
+
+
+def test_purge_removes_expired_sessions_blobs_and_leases(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "state.db"), session_ttl_s=60)
+    store.save("old", {"n": 1}, 0)
+    store.save("recent", {"n": 1}, 0)
+    store.put_blob("audio", b"x", ttl_s=1)
+    store.put_blob("kept", b"y")
+    store.acquire_lease("old", "a", ttl_s=1)
+
+    assert store.purge_expired(now=time.time() + 30) == 0
+    assert store.purge_expired(now=time.time() + 120) == 2
+    conn = store._connect()
+    assert conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0] == 0
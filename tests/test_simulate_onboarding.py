@@ -0,0 +1,44 @@
+"""
+Tests du runner de simulations d'onboarding (stand-in Bedrock local, sans AWS)
+"""
+
+import json
+import os
+
+from api.local_clients import LocalBedrockClient
+from tools.personas import PERSONAS
+from tools.simulate_onboarding import SimulationRunner
+
+
+def _runner(output_dir):
+    bedrock = LocalBedrockClient(first_token_ms=1.0, sigma=0.0, tokens_per_s=1e6, seed=0)
+    persona = next(iter(PERSONAS))
+    return SimulationRunner([persona], repeat=2, output_dir=str(output_dir), bedrock=bedrock,
+                            concurrency=2), persona
+
+
+def test_simulation_runs_every_script_and_writes_report(tmp_path):
+    runner, persona = _runner(tmp_path / "run")
+    report = runner.run()
+
+    assert report["sessions"] == 2
+    assert report["personas"][persona]["sessions"] == 2
+    assert report["personas"][persona]["errors"] == 0
+    assert 0 < report["rounds"] <= len(PERSONAS[persona]["answers"])
+    assert all(session.done for session in runner.sessions)
+    assert report["latency"]["p50_ms"] is not None
+    assert os.path.exists(tmp_path / "run" / "report.json")
+    assert len(os.listdir(tmp_path / "run" / "transcripts")) == 2
+
+
+def test_simulation_resumes_from_checkpoint(tmp_path):
+    runner, persona = _runner(tmp_path / "run")
+    runner.run()
+    with open(tmp_path / "run" / "checkpoint.json", encoding="utf-8") as f:
+        saved = json.load(f)
+
+    resumed, _ = _runner(tmp_path / "run")
+    assert resumed.round == saved["round"]
+    assert [s.turn for s in resumed.sessions] == [s["turn"] for s in saved["sessions"]]
+    assert resumed.sessions[0].agent.session_id == saved["sessions"][0]["agent"]["session_id"]
+    assert all(session.done for session in resumed.sessions)
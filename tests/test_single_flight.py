@@ -0,0 +1,145 @@
+"""
+Tests de la coalescence des requêtes identiques (single-flight)
+"""
+
+import threading
+
+import pytest
+
+from agents.onboarding_agent import OnboardingAgent
+from api.bedrock_client import BedrockClient
+from api.single_flight import SingleFlight
+
+
+def run_concurrently(group, key, fn, callers):
+    """Lancer `callers` appels simultanés; retourne (résultats, erreurs)"""
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def call():
+        try:
+            value = group.do(key, fn)
+            with lock:
+                results.append(value)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def wait_for_followers(group, key, followers):
+    """Attendre que tous les suiveurs aient rejoint l'appel du leader"""
+    for _ in range(1000):
+        with group._lock:
+            call = group._calls.get(key)
+            if call is not None and call.waiters >= followers:
+                return
+        threading.Event().wait(0.001)
+    raise AssertionError("les suiveurs n'ont pas rejoint l'appel en cours")
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    group = SingleFlight('test')
+    release = threading.Event()
+    executions = []
+
+    def fn():
+        executions.append(1)
+        release.wait(5)
+        return {"text": "ok"}
+
+    threads, results, errors = run_concurrently(group, 'k', fn, 5)
+    wait_for_followers(group, 'k', 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(executions) == 1
+    assert errors == []
+    assert len(results) == 5 and all(r is results[0] for r in results)
+    assert group.stats() == {"name": "test", "calls": 1, "deduplicated": 4, "in_flight": 0}
+
+
+def test_leader_error_is_raised_in_every_follower():
+    group = SingleFlight('test')
+    release = threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise ValueError("échec du leader")
+
+    threads, results, errors = run_concurrently(group, 'k', fn, 4)
+    wait_for_followers(group, 'k', 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == []
+    assert len(errors) == 4
+    assert all(isinstance(e, ValueError) and str(e) == "échec du leader" for e in errors)
+    assert group.stats()["in_flight"] == 0
+
+
+def test_finished_call_is_not_cached():
+    group = SingleFlight('test')
+    counter = iter(range(10))
+
+    assert group.do('k', lambda: next(counter)) == 0
+    assert group.do('k', lambda: next(counter)) == 1
+    assert group.stats()["calls"] == 2
+    assert group.stats()["deduplicated"] == 0
+
+
+def test_error_does_not_poison_next_call():
+    group = SingleFlight('test')
+
+    def boom():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        group.do('k', boom)
+    assert group.do('k', lambda: "ok") == "ok"
+
+
+def test_different_keys_run_independently():
+    group = SingleFlight('test')
+    assert group.do(('a', 1), lambda: 'a') == 'a'
+    assert group.do(('b', 1), lambda: 'b') == 'b'
+    assert group.stats()["calls"] == 2
+
+
+def test_detection_niveau_turn_submitted_twice_shares_one_bedrock_call():
+    policy = OnboardingAgent.GENERATION_POLICIES["detection_niveau"]
+    client = BedrockClient.__new__(BedrockClient)
+    client.region, client.model_id = 'local', 'local-model'
+    release = threading.Event()
+    invocations = []
+
+    def invoke(body):
+        invocations.append(body)
+        release.wait(5)
+        return "Ton niveau: intermédiaire.", {"input_tokens": 10, "output_tokens": 5}
+
+    client._invoke = invoke
+    request = {"messages": [{"role": "user", "content": [{"type": "text", "text": "Je joue en 30/2"}]}],
+               "system_prompt": "detection_niveau", "max_tokens": policy["max_tokens"],
+               "temperature": policy["temperature"]}
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.chat(**request))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for _ in range(1000):
+        with BedrockClient.inflight._lock:
+            if any(call.waiters >= 1 for call in BedrockClient.inflight._calls.values()):
+                break
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(invocations) == 1
+    assert results == ["Ton niveau: intermédiaire."] * 2
@@ -0,0 +1,142 @@
+"""
+Tests des métriques de swing (calcul par frappe, masquage, chargement, agrégation)
+"""
+
+import json
+import math
+
+import numpy as np
+import pytest
+
+from analysis.swing_metrics import (CONFIDENCE_MIN, KEYPOINTS, Clip, analyze_clip, analyze_clips,
+                                    compute_metrics, load_clip, summarize_analysis)
+
+# Poignet droit: accélération entre les frames 4 et 5 (contact à la frame 5)
+WRIST_X = [0.0, 0.1, 0.2, 0.3, 0.4, 1.0, 1.1, 1.15, 1.2, 1.2]
+
+
+def make_stroke(racket: bool = True) -> np.ndarray:
+    """
+    Frappe synthétique (10 frames, confiance 1) aux métriques connues
+
+    Buste de longueur 1, pieds écartés de 1.2, contact 1.0 devant les hanches,
+    épaules réduites de moitié à la frame 3 (rotation 60°), raquette à 90° de l'avant-bras.
+    """
+    stroke = np.zeros((len(WRIST_X), 19 if racket else 17, 3), dtype=np.float32)
+    stroke[..., 2] = 1.0
+    for frame, x in enumerate(WRIST_X):
+        half_width = 0.25 if frame == 3 else 0.5
+        points = {
+            'left_shoulder': (-half_width, 0.0), 'right_shoulder': (half_width, 0.0),
+            'left_hip': (-0.3, 1.0), 'right_hip': (0.3, 1.0),
+            'left_ankle': (-0.6, 2.0), 'right_ankle': (0.6, 2.0),
+            'right_elbow': (x - 0.5, 0.5), 'right_wrist': (x, 0.5), 'left_wrist': (-0.5, 0.5)
+        }
+        if racket:
+            points.update({'racket_butt': (x, 0.5), 'racket_tip': (x, -0.5)})
+        for name, xy in points.items():
+            stroke[frame, KEYPOINTS[name], :2] = xy
+    return stroke
+
+
+def test_compute_metrics_measures_each_stroke():
+    metrics = compute_metrics(Clip(make_stroke()))
+    assert metrics['contact_frame'].tolist() == [5]
+    assert metrics['stance'][0] == pytest.approx(1.2, abs=1e-5)
+    assert metrics['contact_point'][0] == pytest.approx(1.0, abs=1e-5)
+    assert metrics['follow_through'][0] == pytest.approx(math.hypot(1.7, 0.5), abs=1e-5)
+    assert metrics['body_rotation'][0] == pytest.approx(60.0, abs=1e-3)
+    assert metrics['grip'][0] == pytest.approx(90.0, abs=1e-3)
+
+
+def test_left_handed_stroke_is_mirrored():
+    stroke = make_stroke(racket=False)
+    stroke[..., 0] *= -1
+    right, left = KEYPOINTS['right_wrist'], KEYPOINTS['left_wrist']
+    stroke[:, [right, left]] = stroke[:, [left, right]]
+    stroke[:, [KEYPOINTS['right_elbow'], KEYPOINTS['left_elbow']]] = stroke[:, [KEYPOINTS['left_elbow'],
+                                                                                KEYPOINTS['right_elbow']]]
+    stroke[:, [KEYPOINTS['right_shoulder'], KEYPOINTS['left_shoulder']]] = stroke[:, [KEYPOINTS['left_shoulder'],
+                                                                                      KEYPOINTS['right_shoulder']]]
+    metrics = compute_metrics(Clip(stroke, handedness='left'))
+    assert metrics['contact_point'][0] == pytest.approx(1.0, abs=1e-5)
+    assert math.isnan(metrics['grip'][0])
+
+
+def test_low_confidence_keypoints_are_masked():
+    unreliable = make_stroke()
+    unreliable[..., KEYPOINTS['right_wrist'], 2] = CONFIDENCE_MIN / 2
+    partial = make_stroke()
+    partial[5, KEYPOINTS['left_ankle'], 2] = 0.0
+
+    metrics = compute_metrics(Clip(np.stack([make_stroke(), unreliable, partial])))
+    # Poignet jamais fiable: frappe non mesurable
+    assert metrics['contact_frame'].tolist() == [5, -1, 5]
+    assert all(math.isnan(metrics[name][1]) for name in ('stance', 'contact_point', 'body_rotation', 'grip'))
+    # Cheville masquée au contact: seul l'écart des pieds manque
+    assert math.isnan(metrics['stance'][2])
+    assert metrics['contact_point'][2] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_analyze_clip_reports_plain_rounded_floats():
+    unreliable = make_stroke()
+    unreliable[..., 2] = 0.0
+    result = analyze_clip(Clip(np.stack([make_stroke(), make_stroke(), unreliable])))
+    assert (result['strokes'], result['valid_strokes']) == (3, 2)
+    # float32 arrondi sans bruit de conversion (pas de 1.2000000476837158)
+    assert result['per_stroke']['stance'][:2] == [1.2, 1.2]
+    assert math.isnan(result['per_stroke']['stance'][2])
+    assert result['metrics']['stance'] == 1.2
+    # Pieds et contact dans la plage, fin de geste trop longue: une seule erreur
+    assert result['main_error'] == 'follow_through'
+    json.dumps(result['metrics'])
+
+
+def test_load_clip_pads_json_strokes_and_reads_npy(tmp_path):
+    short = make_stroke()[:8]
+    path = tmp_path / "seance.json"
+    path.write_text(json.dumps({"strokes": [make_stroke().tolist(), short.tolist()],
+                                "angle": "frontal", "fps": 60}), encoding='utf-8')
+    clip = load_clip(str(path))
+    assert clip.keypoints.shape == (2, 10, 19, 3)
+    assert (clip.clip_id, clip.angle, clip.fps, clip.handedness) == ("seance", "frontal", 60, "right")
+    # Frames ajoutées de confiance nulle: ignorées par le calcul
+    assert not clip.keypoints[1, 8:].any()
+    assert compute_metrics(clip)['contact_frame'].tolist() == [5, 5]
+
+    npy = tmp_path / "frappe.npy"
+    np.save(npy, make_stroke())
+    clip = load_clip(str(npy), angle="frontal")
+    assert clip.keypoints.shape == (1, 10, 19, 3)
+    assert (clip.clip_id, clip.angle) == ("frappe", "frontal")
+
+
+def test_analyze_clips_reports_unreadable_files(tmp_path):
+    good = tmp_path / "ok.npy"
+    np.save(good, make_stroke())
+    bad = tmp_path / "bad.npy"
+    np.save(bad, np.zeros((10, 5, 3)))
+    results = list(analyze_clips([str(good), str(bad), str(tmp_path / "absent.json")]))
+    assert results[0]['clip_id'] == "ok" and 'error' not in results[0]
+    assert [r['clip_id'] for r in results[1:]] == ["bad.npy", "absent.json"]
+    assert all('error' in r for r in results[1:])
+
+
+def test_summary_weights_clips_by_valid_strokes():
+    results = [
+        {'angle': 'lateral', 'strokes': 4, 'valid_strokes': 3, 'metrics': {'stance': 1.0, 'follow_through': 1.2}},
+        {'angle': 'frontal', 'strokes': 2, 'valid_strokes': 1, 'metrics': {'stance': 2.0}},
+        {'angle': 'lateral', 'strokes': 5, 'valid_strokes': 0, 'metrics': {}},
+        {'clip_id': 'illisible', 'error': 'format'}
+    ]
+    summary = summarize_analysis(results)
+    assert summary['metriques'] == {'stance': 1.25, 'follow_through': 1.2}
+    assert (summary['clips'], summary['frappes'], summary['angles']) == (2, 4, ['frontal', 'lateral'])
+    assert summary['confiance'] == round(4 / 6, 2)
+    assert summary['erreur_principale_id'] == 'follow_through'
+
+
+def test_summary_of_nothing_measurable():
+    summary = summarize_analysis([{'clip_id': 'x', 'error': 'format'}])
+    assert summary['metriques'] == {} and summary['erreur_principale_id'] is None
+    assert summary['confiance'] == 0.0
@@ -0,0 +1,76 @@
+"""
+Tests du post-contrôle local des réponses (trim_reply) et des politiques de génération
+"""
+
+from agents.onboarding_agent import OnboardingAgent, trim_reply
+from training import get_program_builder
+
+
+def _programme_reply(inline=False):
+    """Réponse du modèle présentant un vrai programme de 3 séances"""
+    program = get_program_builder().build("intermédiaire", "contact_point", equipment={"plots", "paniers"},
+                                          session_minutes=45)
+    lines = ["Voici ton programme de la semaine, centré sur le point de contact."]
+    for number, session in enumerate(program["sessions"], 1):
+        drills = [f"{i}. {drill['name']} ({drill['minutes']} min)" for i, drill in enumerate(session["drills"], 1)]
+        if inline:
+            lines.append(f"Séance {number} : " + " ".join(drills))
+        else:
+            lines.extend([f"Séance {number} ({session['minutes']} min) :", *drills])
+    lines.append("Ça te va ?")
+    return program, "\n".join(lines)
+
+
+def test_compliant_reply_is_unchanged():
+    text = "Super, merci !\n\nTu joues depuis combien de temps ?"
+    assert trim_reply(text, 2) == text
+
+
+def test_long_reply_keeps_first_sentences():
+    text = "Première phrase. Deuxième phrase. Troisième phrase."
+    assert trim_reply(text, 2) == "Première phrase. Deuxième phrase."
+
+
+def test_final_question_replaces_last_kept_sentence():
+    text = "Bravo. Ton coup droit progresse. Le placement est bon.\n\nOn passe au revers ?"
+    assert trim_reply(text, 2) == "Bravo. On passe au revers ?"
+
+
+def test_kept_question_is_not_replaced():
+    text = "Bravo. Tu joues en club ? Autre chose. Et en tournoi ?"
+    assert trim_reply(text, 2) == "Bravo. Tu joues en club ?"
+
+
+def test_truncated_reply_drops_incomplete_sentence():
+    text = "Ton service est solide. Pour la suite on va travailler le"
+    assert trim_reply(text, 3, truncated=True) == "Ton service est solide."
+
+
+def test_truncated_single_sentence_is_kept():
+    text = "Pour la suite on va travailler le"
+    assert trim_reply(text, 2, truncated=True) == text
+
+
+def test_programme_list_is_presented_unchanged():
+    program, text = _programme_reply()
+    policy = OnboardingAgent.GENERATION_POLICIES["proposition_programme"]
+    assert trim_reply(text, policy["max_sentences"]) == text
+    assert all(drill["name"] in text for session in program["sessions"] for drill in session["drills"])
+
+
+def test_inline_programme_numbers_are_not_sentence_ends():
+    program, text = _programme_reply(inline=True)
+    trimmed = trim_reply(text, OnboardingAgent.GENERATION_POLICIES["demo_programmes"]["max_sentences"])
+    assert trimmed.count("Séance") == len(program["sessions"])
+    assert trimmed.endswith("Ça te va ?")
+    assert "Séance 2 : 1. Ça te va" not in trimmed
+
+
+def test_truncated_list_drops_only_incomplete_line():
+    text = "Voici ton programme :\n1. Shadow swing (5 min)\n2. Auto-lancer et contact devant"
+    assert trim_reply(text, 5, truncated=True) == "Voici ton programme :\n1. Shadow swing (5 min)"
+
+
+def test_turn_request_sends_no_stop_sequences():
+    agent = OnboardingAgent(user_type="player", bedrock=object(), prefetch=False)
+    assert "stop_sequences" not in agent.begin_turn("Salut")
@@ -0,0 +1,130 @@
+"""
+Tests du tour vocal (stand-in de transcription local, décodage WAV, libération du flux)
+"""
+
+import asyncio
+import io
+import threading
+import wave
+from array import array
+
+import pytest
+
+from agents.voice_turn import VoiceTurn, read_wav, split_pcm
+from api.transcribe_client import (LocalTranscriber, TranscriptionBackend, TranscriptionStream,
+                                   _TranscribeStream)
+
+
+class FakeAgent:
+    language = 'fr'
+
+    def __init__(self):
+        self.prepared = []
+        self.received = []
+
+    def prepare_turn(self, partial):
+        self.prepared.append(partial)
+
+    def chat(self, message):
+        self.received.append(message)
+        return "Très bien !"
+
+
+def _wav(samples, channels=1, sample_width=2, rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(rate)
+        wav.writeframes(samples)
+    return buffer.getvalue()
+
+
+def test_local_stream_reveals_words_with_audio():
+    stream = LocalTranscriber(["je joue depuis deux ans"], bytes_per_word=100).start_stream()
+    assert stream.send(b"\0" * 50) is None
+    assert stream.send(b"\0" * 150) == "je joue"
+    assert stream.send(b"\0" * 10) is None
+    assert stream.finish() == "je joue depuis deux ans"
+
+
+def test_local_transcriber_cycles_transcripts():
+    backend = LocalTranscriber(["un", "deux"])
+    assert [backend.start_stream().finish() for _ in range(3)] == ["un", "deux", "un"]
+
+
+def test_voice_turn_forwards_partials_and_final_transcript():
+    agent = FakeAgent()
+    turn = VoiceTurn(agent, LocalTranscriber(["je suis droitier"], bytes_per_word=3200))
+    turn.feed_all(split_pcm(b"\0" * 3200 * 3, chunk_ms=100))
+    result = turn.finish()
+
+    assert agent.prepared == ["je", "je suis", "je suis droitier"]
+    assert agent.received == ["je suis droitier"]
+    assert result["response"] == "Très bien !"
+    assert result["partials"] == 3
+    assert result["timings_ms"]["end_to_end"] >= result["timings_ms"]["agent"]
+
+
+def test_empty_transcript_does_not_call_agent():
+    agent = FakeAgent()
+    result = VoiceTurn(agent, LocalTranscriber([""])).finish()
+    assert agent.received == []
+    assert result["response"] == ""
+
+
+def test_failed_send_still_closes_stream():
+    closed = []
+
+    class BrokenStream(TranscriptionStream):
+        def send(self, chunk):
+            raise ConnectionError("flux coupé")
+
+        def close(self):
+            closed.append(True)
+
+    class BrokenBackend(TranscriptionBackend):
+        def start_stream(self, language='fr', sample_rate=16000):
+            return BrokenStream()
+
+    turn = VoiceTurn(FakeAgent(), BrokenBackend())
+    with pytest.raises(ConnectionError):
+        try:
+            turn.feed(b"\0" * 320)
+        finally:
+            turn.close()
+    assert closed == [True]
+
+
+def test_transcribe_stream_close_stops_its_event_loop_thread():
+    # Boucle et thread tels que créés par le constructeur, sans le SDK amazon-transcribe
+    stream = _TranscribeStream.__new__(_TranscribeStream)
+    stream._loop = asyncio.new_event_loop()
+    stream._thread = threading.Thread(target=stream._loop.run_forever, daemon=True)
+    stream._thread.start()
+    started = threading.Event()
+
+    async def read_results():
+        started.set()
+        await asyncio.sleep(60)
+
+    stream._reader = asyncio.run_coroutine_threadsafe(read_results(), stream._loop)
+    assert started.wait(5)
+
+    stream.close()
+    stream.close()
+    assert not stream._thread.is_alive()
+    assert stream._loop.is_closed()
+    assert stream._reader.cancelled()
+
+
+def test_read_wav_downmixes_to_first_channel():
+    stereo = array("h", [1, -1, 2, -2, 3, -3]).tobytes()
+    pcm, rate = read_wav(_wav(stereo, channels=2, rate=22050))
+    assert array("h", pcm).tolist() == [1, 2, 3]
+    assert rate == 22050
+
+
+def test_read_wav_rejects_other_sample_widths():
+    with pytest.raises(ValueError):
+        read_wav(_wav(b"\0\0\0\0", sample_width=1))
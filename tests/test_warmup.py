@@ -0,0 +1,58 @@
+"""
+Tests du démarrage à froid (import paresseux de boto3, clients partagés, warm-up best-effort)
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+
+from api import aws, warmup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_boto3_is_imported_lazily():
+    code = "import sys, api.aws, api.warmup; print('boto3' in sys.modules, 'botocore' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=ROOT).stdout
+    assert output.split() == ['False', 'False']
+
+
+def test_clients_are_created_once_per_service_and_region(monkeypatch):
+    created = []
+
+    class FakeBoto3:
+        @staticmethod
+        def client(service_name, region_name, config):
+            created.append((service_name, region_name))
+            return object()
+
+    monkeypatch.setattr(aws, 'load_boto3', lambda: FakeBoto3)
+    aws.reset_clients()
+    try:
+        first = aws.get_client('polly', 'eu-west-1')
+        assert aws.get_client('polly', 'eu-west-1') is first
+        aws.get_client('polly', 'us-east-1')
+        assert created == [('polly', 'eu-west-1'), ('polly', 'us-east-1')]
+    finally:
+        aws.reset_clients()
+
+
+def test_warm_up_reports_errors_and_signals_readiness(monkeypatch, tmp_path, caplog):
+    def unavailable(service_name, region):
+        raise RuntimeError(f"{service_name} indisponible")
+
+    ready_file = tmp_path / 'ready.json'
+    monkeypatch.setattr(warmup, 'READY_FILE', str(ready_file))
+    monkeypatch.setattr(aws, 'get_client', unavailable)
+    monkeypatch.delenv('TENNIS_AI_STATE_URL', raising=False)
+
+    with caplog.at_level(logging.WARNING, logger='api.warmup'):
+        report = warmup.warm_up(region='eu-west-1', synthesize_welcome=False)
+
+    assert warmup.is_ready()
+    assert set(report['errors']) >= {'bedrock-runtime', 'polly'}
+    assert json.loads(ready_file.read_text(encoding='utf-8'))['errors'] == report['errors']
+    assert any('polly' in record.getMessage() for record in caplog.records)
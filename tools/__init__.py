@@ -0,0 +1,3 @@
+"""
+Outils hors-ligne Tennis AI (simulation, benchmarks)
+"""
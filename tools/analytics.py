@@ -0,0 +1,335 @@
+"""
+Analytics des sessions Tennis AI
+Indexation incrémentale de sessions/*.json dans SQLite + rapports de funnel
+
+Seuls les fichiers nouveaux ou modifiés depuis la dernière indexation sont relus
+(watermark par fichier: mtime + taille). Les rapports interrogent uniquement l'index.
+
+Usage:
+    python -m tools.analytics index
+    python -m tools.analytics funnel --user-type player
+    python -m tools.analytics stages
+    python -m tools.analytics latency
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Ajouter le répertoire parent au path pour importer les modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.onboarding_agent import OnboardingAgent
+
+logger = logging.getLogger(__name__)
+
+STAGES = {
+    'player': OnboardingAgent.PLAYER_STAGES,
+    'coach': OnboardingAgent.COACH_STAGES
+}
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS files ("
+    "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, indexed_at REAL NOT NULL)",
+    # Une ligne par session (le fichier est la clé: un fichier réécrit remplace ses lignes)
+    "CREATE TABLE IF NOT EXISTS sessions ("
+    "path TEXT PRIMARY KEY, user_type TEXT, language TEXT, final_stage TEXT, "
+    "final_stage_index INTEGER, completed INTEGER, turns INTEGER, saved_at TEXT)",
+    # Une ligne par tour; langue et type dupliqués pour grouper sans jointure
+    "CREATE TABLE IF NOT EXISTS turns ("
+    "path TEXT NOT NULL, turn_index INTEGER NOT NULL, user_type TEXT, language TEXT, "
+    "stage TEXT, stage_index INTEGER, latency_ms REAL, output_tokens INTEGER, "
+    "stop_reason TEXT, trimmed INTEGER, PRIMARY KEY (path, turn_index))",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_funnel ON sessions (user_type, final_stage_index)",
+    "CREATE INDEX IF NOT EXISTS idx_turns_stage ON turns (user_type, stage_index)",
+    # Percentiles de latence par groupe: parcours ordonné de l'index (LIMIT/OFFSET)
+    "CREATE INDEX IF NOT EXISTS idx_turns_latency ON turns (language, user_type, latency_ms)"
+]
+
+
+def _stage_index(user_type: str, stage: Optional[str]) -> int:
+    try:
+        return STAGES.get(user_type, []).index(stage)
+    except ValueError:
+        return -1
+
+
+def parse_session(path: str, data: Dict[str, Any]) -> Tuple[tuple, List[tuple]]:
+    """
+    Convertir une session sauvegardée en lignes d'index
+
+    Les anciennes sauvegardes (sans `language` ni `turn_metrics`) produisent une ligne
+    de session, avec un nombre de tours déduit de l'historique, mais aucune ligne de tour.
+
+    Args:
+        path: Chemin relatif du fichier (clé)
+        data: Contenu JSON de `OnboardingAgent.save_session`
+
+    Returns:
+        tuple: (ligne session, lignes de tours)
+    """
+    user_type = data.get("user_type")
+    language = data.get("language")
+    final_stage = data.get("current_stage")
+    metrics = data.get("turn_metrics") or []
+    turns = len(metrics) or sum(1 for m in data.get("conversation_history", []) if m.get("role") == "user")
+
+    session = (
+        path, user_type, language, final_stage, _stage_index(user_type, final_stage),
+        int(final_stage == "terminé"), turns, data.get("timestamp")
+    )
+    turn_rows = [
+        (path, i, user_type, language, m.get("stage"), _stage_index(user_type, m.get("stage")),
+         m.get("latency_ms"), m.get("output_tokens"), m.get("stop_reason"), int(bool(m.get("trimmed"))))
+        for i, m in enumerate(metrics)
+    ]
+    return session, turn_rows
+
+
+class SessionIndex:
+    """Index SQLite incrémental des sessions sauvegardées"""
+
+    def __init__(self, db_path: str = 'sessions/analytics.db', sessions_dir: str = 'sessions'):
+        """
+        Ouvrir (ou créer) l'index
+
+        Args:
+            db_path: Chemin de la base SQLite
+            sessions_dir: Répertoire des sessions JSON
+        """
+        self.sessions_dir = sessions_dir
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+
+    def _scan(self) -> Iterator[Tuple[str, int, int]]:
+        """Fichiers de session présents: (chemin relatif, mtime_ns, taille)"""
+        if not os.path.isdir(self.sessions_dir):
+            return
+        for entry in os.scandir(self.sessions_dir):
+            if entry.is_file() and entry.name.endswith('.json'):
+                stat = entry.stat()
+                yield entry.name, stat.st_mtime_ns, stat.st_size
+
+    def update(self, batch_size: int = 500) -> Dict[str, Any]:
+        """
+        Indexer les fichiers nouveaux ou modifiés, oublier les fichiers supprimés
+
+        Args:
+            batch_size: Fichiers par transaction
+
+        Returns:
+            dict: Compteurs (scanned, indexed, unchanged, removed, errors) et durée
+        """
+        start = time.perf_counter()
+        watermarks = {
+            path: (mtime_ns, size)
+            for path, mtime_ns, size in self.conn.execute("SELECT path, mtime_ns, size FROM files")
+        }
+        counts = {"scanned": 0, "indexed": 0, "unchanged": 0, "removed": 0, "errors": 0}
+        pending = []
+        seen = set()
+
+        for path, mtime_ns, size in self._scan():
+            counts["scanned"] += 1
+            seen.add(path)
+            if watermarks.get(path) == (mtime_ns, size):
+                counts["unchanged"] += 1
+                continue
+            try:
+                with open(os.path.join(self.sessions_dir, path), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                # Fichier en cours d'écriture ou corrompu: réessayé au prochain passage
+                logger.warning("Session ignorée (%s): %s", path, e)
+                counts["errors"] += 1
+                continue
+            pending.append((path, mtime_ns, size, parse_session(path, data)))
+            if len(pending) >= batch_size:
+                counts["indexed"] += self._write(pending)
+                pending = []
+        counts["indexed"] += self._write(pending)
+
+        removed = [(path,) for path in watermarks if path not in seen]
+        if removed:
+            with self.conn:
+                for table in ("turns", "sessions", "files"):
+                    self.conn.executemany(f"DELETE FROM {table} WHERE path = ?", removed)
+            counts["removed"] = len(removed)
+
+        counts["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return counts
+
+    def _write(self, pending: List[tuple]) -> int:
+        if not pending:
+            return 0
+        now = time.time()
+        with self.conn:
+            paths = [(path,) for path, _, _, _ in pending]
+            # Un fichier modifié remplace toutes ses lignes
+            self.conn.executemany("DELETE FROM turns WHERE path = ?", paths)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [session for _, _, _, (session, _) in pending]
+            )
+            self.conn.executemany(
+                "INSERT INTO turns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for _, _, _, (_, turns) in pending for row in turns]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                [(path, mtime_ns, size, now) for path, mtime_ns, size, _ in pending]
+            )
+        return len(pending)
+
+    # ==================== RAPPORTS ====================
+
+    def funnel(self, user_type: str = 'player') -> List[Dict[str, Any]]:
+        """
+        Funnel par étape: sessions ayant atteint l'étape et abandons à cette étape
+
+        Args:
+            user_type: 'player' ou 'coach'
+
+        Returns:
+            list: Une ligne par étape (reached, dropped, drop_rate)
+        """
+        finals = dict(self.conn.execute(
+            "SELECT final_stage_index, COUNT(*) FROM sessions WHERE user_type = ? GROUP BY final_stage_index",
+            (user_type,)
+        ).fetchall())
+        stages = STAGES[user_type]
+        rows = []
+        reached = sum(count for index, count in finals.items() if index >= 0)
+        for index, stage in enumerate(stages):
+            dropped = finals.get(index, 0) if stage != "terminé" else 0
+            rows.append({
+                "stage": stage,
+                "reached": reached,
+                "dropped": dropped,
+                "drop_rate": round(dropped / reached, 3) if reached else 0.0
+            })
+            reached -= finals.get(index, 0)
+        return rows
+
+    def stages(self, user_type: str = 'player') -> List[Dict[str, Any]]:
+        """
+        Tours par étape (moyenne par session ayant joué l'étape) et latence moyenne
+
+        Args:
+            user_type: 'player' ou 'coach'
+
+        Returns:
+            list: Une ligne par étape
+        """
+        rows = self.conn.execute(
+            "SELECT stage, stage_index, COUNT(*), COUNT(DISTINCT path), AVG(latency_ms), AVG(output_tokens) "
+            "FROM turns WHERE user_type = ? GROUP BY stage_index ORDER BY stage_index",
+            (user_type,)
+        ).fetchall()
+        return [
+            {
+                "stage": stage,
+                "turns": turns,
+                "sessions": sessions,
+                "turns_per_session": round(turns / sessions, 2),
+                "avg_latency_ms": round(latency or 0.0, 1),
+                "avg_output_tokens": round(tokens or 0.0, 1)
+            }
+            for stage, _, turns, sessions, latency, tokens in rows
+        ]
+
+    def _percentile(self, language: str, user_type: str, count: int, q: float) -> Optional[float]:
+        row = self.conn.execute(
+            "SELECT latency_ms FROM turns WHERE language IS ? AND user_type IS ? AND latency_ms IS NOT NULL "
+            "ORDER BY latency_ms LIMIT 1 OFFSET ?",
+            (language, user_type, min(count - 1, int(count * q)))
+        ).fetchone()
+        return round(row[0], 1) if row else None
+
+    def latency(self) -> List[Dict[str, Any]]:
+        """
+        Latence des tours par langue et type d'utilisateur (moyenne, p50, p95)
+
+        Returns:
+            list: Une ligne par groupe
+        """
+        groups = self.conn.execute(
+            "SELECT language, user_type, COUNT(latency_ms), AVG(latency_ms) FROM turns "
+            "WHERE latency_ms IS NOT NULL GROUP BY language, user_type ORDER BY language, user_type"
+        ).fetchall()
+        return [
+            {
+                "language": language,
+                "user_type": user_type,
+                "turns": count,
+                "mean_ms": round(mean, 1),
+                "p50_ms": self._percentile(language, user_type, count, 0.5),
+                "p95_ms": self._percentile(language, user_type, count, 0.95)
+            }
+            for language, user_type, count, mean in groups
+        ]
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    """Afficher des lignes homogènes en colonnes alignées"""
+    if not rows:
+        print("(aucune donnée — lancer `python -m tools.analytics index`)")
+        return
+    columns = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics des sessions Tennis AI")
+    parser.add_argument("--db", default="sessions/analytics.db", help="Base d'index SQLite")
+    parser.add_argument("--sessions-dir", default="sessions", help="Répertoire des sessions JSON")
+    parser.add_argument("--json", action="store_true", help="Sortie JSON au lieu d'un tableau")
+    parser.add_argument("--no-update", action="store_true", help="Ne pas indexer avant le rapport")
+    subparsers = parser.add_subparsers(dest="report", required=True)
+
+    subparsers.add_parser("index", help="Indexer les sessions nouvelles ou modifiées")
+    funnel = subparsers.add_parser("funnel", help="Sessions atteintes et abandons par étape")
+    funnel.add_argument("--user-type", choices=sorted(STAGES), default="player")
+    stages = subparsers.add_parser("stages", help="Tours et latence par étape")
+    stages.add_argument("--user-type", choices=sorted(STAGES), default="player")
+    subparsers.add_parser("latency", help="Latence par langue et type d'utilisateur")
+
+    args = parser.parse_args()
+    index = SessionIndex(args.db, args.sessions_dir)
+
+    if args.report == "index" or not args.no_update:
+        counts = index.update()
+        if args.report == "index":
+            print(json.dumps(counts, indent=2))
+            return
+
+    if args.report == "funnel":
+        rows = index.funnel(args.user_type)
+    elif args.report == "stages":
+        rows = index.stages(args.user_type)
+    else:
+        rows = index.latency()
+
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,534 @@
+"""
+Benchmarks Tennis AI
+Mesures hors-ligne contre les stand-ins locaux (aucun appel AWS)
+
+Usage:
+    python -m tools.bench voice --turns 20
+    python -m tools.bench coach --students 30
+    python -m tools.bench level --players 10000
+    python -m tools.bench program --repeat 10
+    python -m tools.bench invite --codes 1000000
+    python -m tools.bench framing --frames 50
+"""
+
+import argparse
+import io
+import json
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+
+# Ajouter le répertoire parent au path pour importer les modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.coach_synthesis import CoachSynthesis
+from agents.onboarding_agent import OnboardingAgent
+from agents.voice_turn import VoiceTurn, split_pcm
+from analysis.framing import check_frame, validate_angles
+from analysis.level_classifier import ANSWER_FEATURES, LEVELS, LevelClassifier, parse_answers
+from analysis.swing_metrics import METRIC_RANGES
+from api.local_clients import LocalBedrockClient
+from api.scheduler import AdmissionScheduler
+from api.transcribe_client import LocalTranscriber
+from storage.invite_codes import InviteCodeService, SQLiteInviteCodeStore
+from training.program_builder import ProgramBuilder
+from tools.personas import PERSONAS
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """p50/p95/moyenne d'une série de mesures (ms)"""
+    values = sorted(values)
+    return {
+        "p50_ms": round(values[len(values) // 2], 1),
+        "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+        "mean_ms": round(statistics.fmean(values), 1)
+    }
+
+
+# ==================== VOICE ====================
+
+def capture(chunks: List[bytes], interval_s: float, sink: queue.Queue) -> None:
+    """Micro simulé: dépose les chunks au rythme de la parole, puis None à la fin de parole"""
+    for chunk in chunks:
+        time.sleep(interval_s)
+        sink.put((chunk, None))
+    sink.put((None, time.perf_counter()))
+
+
+def bench_voice(args) -> Dict[str, Any]:
+    """
+    Latence d'un tour vocal, mesurée depuis la fin de parole
+
+    Les deux modes reçoivent le même audio, capturé au rythme de la parole (divisé par
+    `--speed`) par un micro simulé:
+    - streaming: chaque chunk est transcrit dès sa capture, pendant que l'utilisateur parle
+    - buffered: l'enregistrement complet n'est transcrit qu'après la fin de parole
+      (cas de `st.audio_input` dans app.py)
+    """
+    answers = PERSONAS["debutant"]["answers"][:args.turns]
+    bytes_per_word = args.sample_rate * 2 * 400 // 1000  # ~2,5 mots/s
+    interval_s = args.chunk_ms / 1000 / args.speed
+
+    results = {}
+    for mode in ("streaming", "buffered"):
+        transcriber = LocalTranscriber(
+            answers,
+            bytes_per_word=bytes_per_word,
+            chunk_latency_ms=args.chunk_latency_ms,
+            finalize_latency_ms=args.finalize_latency_ms
+        )
+        agent = OnboardingAgent(
+            user_type="player",
+            bedrock=LocalBedrockClient(first_token_ms=args.llm_ms, seed=args.seed)
+        )
+        agent.start_conversation()
+
+        timings = []
+        for answer in answers:
+            audio = b"\x00" * (len(answer.split()) * bytes_per_word)
+            chunks = list(split_pcm(audio, args.sample_rate, args.chunk_ms))
+            mic: queue.Queue = queue.Queue()
+            recorder = threading.Thread(target=capture, args=(chunks, interval_s, mic))
+            turn = VoiceTurn(agent, transcriber, sample_rate=args.sample_rate)
+            recorder.start()
+            if mode == "streaming":
+                while True:
+                    chunk, end_of_speech = mic.get()
+                    if chunk is None:
+                        break
+                    turn.feed(chunk)
+            else:
+                recorded = []
+                while True:
+                    chunk, end_of_speech = mic.get()
+                    if chunk is None:
+                        break
+                    recorded.append(chunk)
+                turn.feed_all(recorded)
+            recorder.join()
+            result = turn.finish(end_of_speech=end_of_speech)
+            timings.append(result["timings_ms"]["end_to_end"])
+
+        results[mode] = summarize(timings)
+
+    results["saved_p50_ms"] = round(results["buffered"]["p50_ms"] - results["streaming"]["p50_ms"], 1)
+    return results
+
+
+# ==================== COACH ====================
+
+def make_roster(count: int, version: int = 1) -> List[Dict[str, Any]]:
+    """Effectif synthétique (niveaux et erreurs tournants)"""
+    levels = ("débutant", "intermédiaire", "avancé")
+    errors = ("grip", "stance", "contact point", "follow-through", "body rotation")
+    return [
+        {
+            "id": f"eleve-{i:03d}", "name": f"Élève {i}", "version": version,
+            "level": levels[i % len(levels)], "main_error": errors[i % len(errors)],
+            "sessions_last_30d": 2 + i % 5
+        }
+        for i in range(count)
+    ]
+
+
+def bench_coach(args) -> Dict[str, Any]:
+    """
+    Chargement du tableau de bord coach (synthèse d'effectif)
+
+    - sequential: un résumé après l'autre puis la fusion (un worker)
+    - fanout: résumés en parallèle (un worker par élève) puis la fusion
+    - cached: même effectif, une donnée d'élève modifiée (seul ce résumé est refait)
+
+    Les appels passent par un ordonnanceur d'admission de la taille du quota simulé,
+    comme BedrockClient en production (slots réservés à l'interactif compris).
+    """
+    scheduler = AdmissionScheduler('bedrock-bench', max_concurrency=args.bedrock_concurrency)
+    bedrock = LocalBedrockClient(first_token_ms=args.llm_ms, seed=args.seed, scheduler=scheduler)
+    roster = make_roster(args.students)
+
+    results = {}
+    for mode, workers in (("sequential", 1), ("fanout", args.workers)):
+        engine = CoachSynthesis(bedrock, max_workers=workers)
+        results[mode] = engine.synthesize(roster)["timings_ms"]
+
+    # Reprise du moteur en éventail: seul l'élève modifié manque au cache
+    roster[0] = dict(roster[0], version=2, sessions_last_30d=9)
+    result = engine.synthesize(roster)
+    results["cached"] = dict(result["timings_ms"], cache_hits=result["cache_hits"])
+
+    # Référence: un seul appel de la taille de la fusion
+    single = []
+    for _ in range(5):
+        start = time.perf_counter()
+        bedrock.chat([], "", max_tokens=400)
+        single.append((time.perf_counter() - start) * 1000)
+    results["single_request"] = summarize(single)
+    results["speedup"] = round(results["sequential"]["total"] / results["fanout"]["total"], 1)
+    results["scheduler"] = scheduler.stats()["classes"][CoachSynthesis.SUMMARY_PRIORITY]
+    return results
+
+
+# ==================== LEVEL ====================
+
+def make_players(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Joueurs synthétiques étiquetés (métriques de plus en plus proches des cibles avec le niveau)
+
+    Sert au benchmark et à l'amorçage du modèle livré (`analysis/models/level_model.json`).
+    """
+    rng = np.random.default_rng(seed)
+    years_median = (0.3, 4.0, 10.0)
+    per_week = (1, 2, 4)
+    competition = (0.02, 0.4, 0.9)
+    ranked = (0.01, 0.5, 0.95)
+    spread = (1.0, 0.45, 0.2)
+
+    players = []
+    for level in rng.integers(0, len(LEVELS), size=count):
+        metrics = {}
+        for name, (low, high) in METRIC_RANGES.items():
+            width = high - low
+            metrics[name] = round(float((low + high) / 2 + rng.normal(0, spread[level]) * width), 3)
+        answers = {
+            'annees_pratique': float(rng.lognormal(np.log(years_median[level]), 0.5)),
+            'seances_par_semaine': float(max(1, rng.poisson(per_week[level]))),
+            'competition': float(rng.random() < competition[level]),
+            'classe': float(rng.random() < ranked[level])
+        }
+        # Données partielles: analyse vidéo absente ou réponses non données
+        for key in ANSWER_FEATURES:
+            if rng.random() < 0.3:
+                answers[key] = None
+        players.append({
+            'analyse_swing': {'metriques': metrics} if rng.random() > 0.2 else None,
+            'answers': answers,
+            'niveau': LEVELS[level]
+        })
+    return players
+
+
+# Réponses en texte libre du générateur de validation (passent par `parse_answers`)
+_YEARS_TEXT = ("Je joue depuis {years} ans.", "I've played for {years} years.", "Ça fait un moment, depuis {years} ans.")
+_PER_WEEK_TEXT = ("Je m'entraîne {n} fois par semaine.", "About {n} times per week.")
+_COMPETITION_TEXT = {True: ("Je fais des tournois.", "On joue les interclubs.", "I play tournaments."),
+                     False: ("Pas de compétition pour moi.", "Je joue en loisir.", "I don't play tournaments.")}
+_RANKED_TEXT = {True: ("Je suis classé {rank}.", "Classement {rank}.", "I'm ranked, UTR {utr}."),
+                False: ("Je suis non classé.", "Pas de classement.", "Not ranked.")}
+_NOISE_TEXT = ("Dispo le 12/3.", "Ma fille est en classe de 4e.", "J'ai 34 ans.", "Le club ferme le 15/8.", "")
+_RANKS = (("40", "30/5"), ("30/2", "15/4", "15/2"), ("15/1", "5/6", "2/6", "-2/6"))
+
+
+def make_players_text(count: int, seed: int = 23) -> List[Dict[str, Any]]:
+    """
+    Joueurs de validation: distributions décalées par rapport à `make_players` (ancienneté,
+    dispersion, bruit à queue lourde) et réponses écrites en texte libre puis relues par
+    `parse_answers` (dates, âge, "classe de 4e" compris). Jamais utilisé pour l'entraînement.
+    """
+    rng = np.random.default_rng(seed)
+    years_median = (0.6, 3.0, 8.0)
+    per_week = (1.5, 2.5, 3.5)
+    competition = (0.08, 0.5, 0.8)
+    ranked = (0.05, 0.6, 0.9)
+    spread = (0.8, 0.55, 0.3)
+
+    players = []
+    for level in rng.integers(0, len(LEVELS), size=count):
+        metrics = {}
+        for name, (low, high) in METRIC_RANGES.items():
+            noise = rng.standard_t(4) * spread[level]
+            metrics[name] = round(float((low + high) / 2 + noise * (high - low)), 3)
+        sentences = []
+        if rng.random() < 0.7:
+            years = max(1, round(rng.lognormal(np.log(years_median[level]), 0.6)))
+            sentences.append(rng.choice(_YEARS_TEXT).format(years=years))
+        if rng.random() < 0.6:
+            sentences.append(rng.choice(_PER_WEEK_TEXT).format(n=max(1, rng.poisson(per_week[level]))))
+        if rng.random() < 0.7:
+            sentences.append(rng.choice(_COMPETITION_TEXT[bool(rng.random() < competition[level])]))
+        if rng.random() < 0.7:
+            template = rng.choice(_RANKED_TEXT[bool(rng.random() < ranked[level])])
+            sentences.append(template.format(rank=rng.choice(_RANKS[level]), utr=3 + 3 * level))
+        sentences.append(rng.choice(_NOISE_TEXT))
+        rng.shuffle(sentences)
+        players.append({
+            'analyse_swing': {'metriques': metrics} if rng.random() > 0.3 else None,
+            'answers': parse_answers(" ".join(sentences)),
+            'niveau': LEVELS[level]
+        })
+    return players
+
+
+def _accuracy(classifier: LevelClassifier, players: List[Dict[str, Any]]) -> Dict[str, float]:
+    results = classifier.classify(players)
+    labels = [p["niveau"] for p in players]
+    confident = [(r, t) for r, t in zip(results, labels) if not r['fallback']]
+    return {
+        "fallback_rate": round(1 - len(confident) / len(results), 3),
+        "accuracy_confident": round(sum(r['niveau_estime'] == t for r, t in confident) / max(1, len(confident)), 3),
+        "accuracy_all": round(sum(r['niveau_estime'] == t for r, t in zip(results, labels)) / len(results), 3)
+    }
+
+
+def bench_level(args) -> Dict[str, Any]:
+    """
+    Débit du classifieur de niveau: lot vectorisé vs appels unitaires, et précision
+
+    La précision de référence (`held_out`) est mesurée sur `make_players_text`, un générateur
+    distinct de celui du modèle livré; `in_distribution` (même générateur, autre graine)
+    n'est donnée qu'à titre de comparaison.
+    """
+    classifier = LevelClassifier(min_confidence=args.min_confidence)
+    players = make_players(args.players, seed=args.seed)
+
+    start = time.perf_counter()
+    batch = classifier.classify(players)
+    batch_s = time.perf_counter() - start
+
+    sample = players[:args.single]
+    start = time.perf_counter()
+    for player in sample:
+        classifier.classify_one(player)
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.single):
+        parse_answers("Je joue en club depuis 6 ans, 3 fois par semaine, classé 30/1 et je fais des tournois.")
+    parse_s = time.perf_counter() - start
+
+    return {
+        "players": len(players),
+        "batch_players_per_s": round(len(players) / batch_s),
+        "single_players_per_s": round(len(sample) / single_s),
+        "parse_answers_per_s": round(args.single / parse_s),
+        "held_out": _accuracy(classifier, make_players_text(args.players, seed=args.seed)),
+        "in_distribution": _accuracy(classifier, players)
+    }
+
+
+def bench_program(args) -> Dict[str, Any]:
+    """
+    Génération de programmes: toutes les signatures (niveau x erreur x matériel x durée)
+    à froid, puis relues depuis le cache
+    """
+    builder = ProgramBuilder()
+    kits = [(), ("plots",), ("mur",), ("partenaire",), ("panier", "trepied"), ("lance_balles",),
+            ("plots", "partenaire", "panier", "trepied")]
+    signatures = [
+        (level, error, kit, minutes)
+        for level in LEVELS for error in builder.catalog.errors for kit in kits for minutes in (10, 20, 30, 45, 60, 90)
+    ]
+
+    start = time.perf_counter()
+    programs = [builder.build(*signature) for signature in signatures]
+    cold_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for signature in signatures:
+            builder.build(*signature)
+    cached_s = time.perf_counter() - start
+
+    # Variété: séances identiques à la précédente et drills technique / application répétés
+    identical = repeated = core = 0
+    relaxations: Dict[str, int] = {}
+    for program in programs:
+        for relaxation in program["relaxed"]:
+            relaxations[relaxation] = relaxations.get(relaxation, 0) + 1
+        seen = set()
+        previous = None
+        for session in program["sessions"]:
+            ids = [d["id"] for d in session["drills"]]
+            identical += ids == previous
+            previous = ids
+            for drill in session["drills"]:
+                if drill["phase"] in ("technique", "application"):
+                    core += 1
+                    repeated += drill["id"] in seen
+                    seen.add(drill["id"])
+    feasible = [p for p in programs if p["feasible"]]
+    return {
+        "signatures": len(signatures),
+        "cold_ms_per_program": round(cold_s * 1000 / len(signatures), 3),
+        "cached_us_per_program": round(cached_s * 1e6 / (len(signatures) * args.repeat), 1),
+        "infeasible": len(programs) - len(feasible),
+        "relaxed_rate": round(sum(bool(p["relaxed"]) for p in programs) / len(programs), 3),
+        "relaxation_rates": {name: round(count / len(programs), 3) for name, count in sorted(relaxations.items())},
+        "all_sessions_identical": sum(
+            all(s["drills"] == p["sessions"][0]["drills"] for s in p["sessions"]) and len(p["sessions"]) > 1
+            for p in feasible
+        ),
+        "identical_to_previous_rate": round(identical / max(1, sum(len(p["sessions"]) - 1 for p in feasible)), 3),
+        "repeated_core_drill_rate": round(repeated / max(1, core), 3),
+        "cache": builder.stats()
+    }
+
+
+def bench_invite(args) -> Dict[str, Any]:
+    """
+    Codes d'invitation: émission en lot par effectifs, puis résolution et validation
+    une fois la base remplie (SQLite temporaire)
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        service = InviteCodeService(SQLiteInviteCodeStore(os.path.join(directory, "invites.db")))
+        start = time.perf_counter()
+        issued = []
+        for roster in range(0, args.codes, args.roster):
+            codes = service.issue(f"coach-{roster}", [f"eleve-{i}" for i in range(min(args.roster, args.codes - roster))])
+            issued.extend(entry["code"] for entry in codes[:2])
+        issue_s = time.perf_counter() - start
+
+        sample = issued[:args.lookups]
+        start = time.perf_counter()
+        for code in sample:
+            service.resolve(code)
+        resolve_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i, code in enumerate(sample):
+            service.redeem(code, f"joueur-{i}")
+        redeem_s = time.perf_counter() - start
+
+        return {
+            "codes": args.codes,
+            "issue_us_per_code": round(issue_s * 1e6 / args.codes, 1),
+            "resolve_us": round(resolve_s * 1e6 / len(sample), 1),
+            "redeem_us": round(redeem_s * 1e6 / len(sample), 1)
+        }
+
+
+def make_court_frame(width: int = 1920, height: int = 1080, seed: int = 0, tilt: float = 0.0,
+                     lines: bool = True) -> Image.Image:
+    """Image synthétique d'un court vu depuis le fond (perspective), joueur au centre"""
+    rng = np.random.default_rng(seed)
+    pixels = np.empty((height, width, 3), dtype=np.float32)
+    pixels[:] = (40, 110, 160)
+    pixels[:int(height * 0.3)] = (120, 130, 120)
+    pixels += rng.normal(0, 10, (height, width, 1))
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    draw = ImageDraw.Draw(image)
+
+    def point(u, v):
+        half = width * (0.22 + 0.33 * v)
+        return (width / 2 + (u - 0.5) * 2 * half, height * (0.35 + 0.6 * v))
+
+    if lines:
+        segments = [((0, v), (1, v)) for v in (0, 0.27, 1)] + [((u, 0), (u, 1)) for u in (0, 0.12, 0.88, 1)]
+        segments += [((0.5, 0.27), (0.5, 0.6)), ((0.12, 0.6), (0.88, 0.6))]
+        for start, end in segments:
+            draw.line([point(*start), point(*end)], fill=(235, 235, 235), width=max(3, width // 300))
+    draw.rectangle([0.45 * width, 0.35 * height, 0.55 * width, 0.85 * height], fill=(200, 60, 40))
+    if tilt:
+        image = image.rotate(tilt, resample=Image.BILINEAR, fillcolor=(40, 110, 160))
+    return image
+
+
+def bench_framing(args) -> Dict[str, Any]:
+    """
+    Validation de cadrage sur images JPEG synthétiques: latence par image et raison
+    retournée pour chaque défaut simulé
+    """
+    def jpeg(image: Image.Image) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=85)
+        return buffer.getvalue()
+
+    width, height = args.width, args.height
+    base = make_court_frame(width, height, seed=args.seed)
+    variants = {
+        "ok": base,
+        "flou": base.filter(ImageFilter.GaussianBlur(width / 320)),
+        "sombre": ImageEnhance.Brightness(base).enhance(0.25),
+        "surexpose": ImageEnhance.Brightness(base).enhance(3.0),
+        "incline": make_court_frame(width, height, seed=args.seed, tilt=12),
+        "sans_lignes": make_court_frame(width, height, seed=args.seed, lines=False)
+    }
+    encoded = {name: jpeg(image) for name, image in variants.items()}
+    player_box = (0.45, 0.35, 0.55, 0.85)
+
+    reasons = {name: check_frame(data, player_box=player_box)["raison"] for name, data in encoded.items()}
+    samples = []
+    for i in range(args.frames):
+        data = list(encoded.values())[i % len(encoded)]
+        start = time.perf_counter()
+        check_frame(data, player_box=player_box)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    angles = {"lateral": encoded["ok"], "frontal": encoded["incline"]}
+    batch = []
+    for _ in range(max(1, args.frames // 5)):
+        start = time.perf_counter()
+        validate_angles(angles, player_boxes={"lateral": player_box, "frontal": player_box})
+        batch.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        "input": f"{width}x{height} JPEG",
+        "frame_ms_p50": round(statistics.median(samples), 1),
+        "frame_ms_p95": round(samples[int(0.95 * (len(samples) - 1))], 1),
+        "two_angles_ms_p50": round(statistics.median(batch), 1),
+        "reasons": reasons
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks Tennis AI (stand-ins locaux)")
+    subparsers = parser.add_subparsers(dest="bench", required=True)
+
+    voice = subparsers.add_parser("voice", help="Latence bout-en-bout d'un tour vocal")
+    voice.add_argument("--turns", type=int, default=12)
+    voice.add_argument("--sample-rate", type=int, default=16000)
+    voice.add_argument("--chunk-ms", type=int, default=100)
+    voice.add_argument("--speed", type=float, default=4.0,
+                       help="Accélération de la parole simulée (1 = temps réel)")
+    voice.add_argument("--chunk-latency-ms", type=float, default=8.0, help="Traitement STT par chunk")
+    voice.add_argument("--finalize-latency-ms", type=float, default=120.0, help="Finalisation STT")
+    voice.add_argument("--llm-ms", type=float, default=400.0, help="Latence médiane du stand-in Bedrock")
+    voice.add_argument("--seed", type=int, default=7)
+    voice.set_defaults(func=bench_voice)
+
+    coach = subparsers.add_parser("coach", help="Synthèse d'effectif coach: séquentiel vs éventail vs cache")
+    coach.add_argument("--students", type=int, default=30)
+    coach.add_argument("--workers", type=int, default=None, help="Résumés simultanés (défaut: un par élève)")
+    coach.add_argument("--bedrock-concurrency", type=int, default=16, help="Quota simulé du stand-in")
+    coach.add_argument("--llm-ms", type=float, default=400.0, help="Latence médiane du stand-in Bedrock")
+    coach.add_argument("--seed", type=int, default=7)
+    coach.set_defaults(func=bench_coach)
+
+    level = subparsers.add_parser("level", help="Débit et précision du classifieur de niveau")
+    level.add_argument("--players", type=int, default=10000)
+    level.add_argument("--single", type=int, default=1000, help="Joueurs classés un par un")
+    level.add_argument("--min-confidence", type=float, default=0.6)
+    level.add_argument("--seed", type=int, default=11)
+    level.set_defaults(func=bench_level)
+
+    program = subparsers.add_parser("program", help="Programmes d'entrée: génération à froid vs cache")
+    program.add_argument("--repeat", type=int, default=10, help="Relectures de chaque signature")
+    program.set_defaults(func=bench_program)
+
+    invite = subparsers.add_parser("invite", help="Codes d'invitation: émission en lot et résolution")
+    invite.add_argument("--codes", type=int, default=1000000)
+    invite.add_argument("--roster", type=int, default=30, help="Élèves par lot")
+    invite.add_argument("--lookups", type=int, default=5000)
+    invite.set_defaults(func=bench_invite)
+
+    framing = subparsers.add_parser("framing", help="Validation de cadrage: latence par image et raisons")
+    framing.add_argument("--frames", type=int, default=50)
+    framing.add_argument("--width", type=int, default=1920)
+    framing.add_argument("--height", type=int, default=1080)
+    framing.add_argument("--seed", type=int, default=7)
+    framing.set_defaults(func=bench_framing)
+
+    args = parser.parse_args()
+    print(json.dumps(args.func(args), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Test de charge Tennis AI
+Utilisateurs virtuels pilotant OnboardingAgent contre les stand-ins locaux Bedrock/Polly
+
+Modèles de charge:
+- closed: N utilisateurs en boucle (temps de réflexion puis tour), N suit la rampe
+- open: arrivées de nouvelles sessions selon un processus de Poisson (sessions/s suivant la rampe)
+
+Usage:
+    python -m tools.loadtest closed --ramp 10:30,20:30,40:30,80:30 --time-scale 0.05
+    python -m tools.loadtest open --ramp 0.5:60,1:60,2:60 --bedrock-concurrency 16
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Ajouter le répertoire parent au path pour importer les modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.onboarding_agent import OnboardingAgent
+from api.local_clients import LocalBedrockClient, LocalPollyClient
+from tools.personas import PERSONAS
+
+
+# Temps de réflexion moyens (s) par étape: lecture de la réponse + saisie/action physique
+DEFAULT_THINK_TIMES_S = {
+    "bienvenue": 6, "profil": 8, "objectifs": 10, "configuration_matériel": 25,
+    "test_cadrage": 20, "demo_calibration": 15, "video_evaluation": 45, "analyse": 12,
+    "detection_niveau": 8, "proposition_programme": 15, "upsell": 10, "terminé": 5,
+    "profil_coach": 8, "préférences": 10, "liaison_élèves": 20, "configuration_court": 25,
+    "validation_court": 20, "demo_multi_élèves": 15, "demo_synthèse": 12,
+    "demo_programmes": 15, "intro_dashboard": 10,
+}
+
+
+def _rss_bytes() -> int:
+    """Mémoire résidente courante du processus"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # Hors Linux: pic de RSS (ko sous Linux, octets sous macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class LoadStats:
+    """Mesures collectées par les utilisateurs virtuels (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns: List[Tuple[float, str, float, bool]] = []
+        self.active_sessions = 0
+
+    def record(self, stage: str, latency_ms: float, ok: bool) -> None:
+        with self._lock:
+            self.turns.append((time.perf_counter(), stage, latency_ms, ok))
+
+    def session_started(self) -> None:
+        with self._lock:
+            self.active_sessions += 1
+
+    def session_ended(self) -> None:
+        with self._lock:
+            self.active_sessions -= 1
+
+    def window(self, start: float, end: float) -> List[Tuple[float, str, float, bool]]:
+        with self._lock:
+            return [t for t in self.turns if start <= t[0] < end]
+
+
+class VirtualUser:
+    """Utilisateur virtuel: enchaîne des onboardings scriptés"""
+
+    def __init__(self, stats: LoadStats, bedrock, polly, think_times: Dict[str, float],
+                 time_scale: float, rng: random.Random, loop: bool, tts: bool):
+        self.stats = stats
+        self.bedrock = bedrock
+        self.polly = polly
+        self.think_times = think_times
+        self.time_scale = time_scale
+        self.rng = rng
+        self.loop = loop
+        self.tts = tts
+        self.stop = threading.Event()
+
+    def _think(self, stage: str) -> None:
+        mean_s = self.think_times.get(stage, 10) * self.time_scale
+        self.stop.wait(self.rng.expovariate(1 / mean_s) if mean_s > 0 else 0)
+
+    def run_session(self) -> None:
+        """Un onboarding complet"""
+        persona = PERSONAS[self.rng.choice(list(PERSONAS))]
+        agent = OnboardingAgent(user_type=persona["user_type"], language=persona["language"], bedrock=self.bedrock)
+        agent.start_conversation()
+        self.stats.session_started()
+        try:
+            for answer in persona["answers"]:
+                stage = agent.get_current_stage()
+                self._think(stage)
+                if self.stop.is_set() or stage == "terminé":
+                    return
+                turns_before = len(agent.turn_metrics)
+                start = time.perf_counter()
+                reply = agent.chat(answer)
+                if self.tts:
+                    self.polly.synthesize(reply)
+                self.stats.record(stage, (time.perf_counter() - start) * 1000, len(agent.turn_metrics) > turns_before)
+        finally:
+            self.stats.session_ended()
+
+    def run(self) -> None:
+        while not self.stop.is_set():
+            self.run_session()
+            if not self.loop:
+                return
+
+
+class LoadTest:
+    """Pilote une rampe de charge et produit les courbes de capacité"""
+
+    def __init__(self, model: str, ramp: List[Tuple[float, float]], args):
+        """
+        Initialiser le test
+
+        Args:
+            model: 'closed' ou 'open'
+            ramp: Paliers (charge, durée en s); charge = utilisateurs (closed) ou sessions/s (open)
+            args: Options CLI (latences des stand-ins, temps de réflexion, SLO)
+        """
+        self.model = model
+        self.ramp = ramp
+        self.args = args
+        self.stats = LoadStats()
+        self.rng = random.Random(args.seed)
+        self.bedrock = LocalBedrockClient(
+            first_token_ms=args.llm_first_token_ms,
+            sigma=args.llm_sigma,
+            tokens_per_s=args.llm_tokens_per_s,
+            output_tokens=args.llm_output_tokens,
+            max_concurrency=args.bedrock_concurrency,
+            seed=args.seed
+        )
+        self.polly = LocalPollyClient(seed=args.seed)
+        self.users: List[VirtualUser] = []
+        self.threads: List[threading.Thread] = []
+        self.baseline_rss = _rss_bytes()
+
+    def _spawn(self, loop: bool) -> VirtualUser:
+        user = VirtualUser(
+            self.stats, self.bedrock, self.polly, DEFAULT_THINK_TIMES_S, self.args.time_scale,
+            random.Random(self.rng.random()), loop=loop, tts=self.args.tts
+        )
+        thread = threading.Thread(target=user.run, daemon=True)
+        thread.start()
+        self.users.append(user)
+        self.threads.append(thread)
+        return user
+
+    def _set_closed_users(self, count: int) -> None:
+        running = [u for u in self.users if not u.stop.is_set()]
+        for _ in range(count - len(running)):
+            self._spawn(loop=True)
+        for user in running[count:]:
+            user.stop.set()
+
+    def _run_step(self, load: float, duration_s: float) -> Dict[str, Any]:
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        samples = []
+
+        if self.model == "closed":
+            self._set_closed_users(int(load))
+        end = start + duration_s
+        next_arrival = start
+        while time.perf_counter() < end:
+            now = time.perf_counter()
+            if self.model == "open" and load > 0:
+                while next_arrival <= now:
+                    self._spawn(loop=False)
+                    next_arrival += self.rng.expovariate(load)
+            samples.append((self.stats.active_sessions, _rss_bytes()))
+            time.sleep(min(0.2, max(0.0, end - time.perf_counter())))
+
+        wall_s = time.perf_counter() - start
+        cpu_s = time.process_time() - cpu_start
+        turns = self.stats.window(start, start + wall_s)
+        latencies = sorted(t[2] for t in turns if t[3])
+        active = sum(s[0] for s in samples) / len(samples) if samples else 0
+        rss = max(s[1] for s in samples) if samples else _rss_bytes()
+
+        def pct(q):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * q))], 1) if latencies else None
+
+        return {
+            "load": load,
+            "duration_s": round(wall_s, 2),
+            "turns": len(turns),
+            "errors": sum(1 for t in turns if not t[3]),
+            "throughput_tps": round(len(latencies) / wall_s, 3),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "active_sessions": round(active, 1),
+            "cpu_cores": round(cpu_s / wall_s, 3),
+            "cpu_ms_per_session": round(cpu_s * 1000 / active, 2) if active else None,
+            "rss_mb": round(rss / 2 ** 20, 1),
+            # Mémoire marginale: RSS au-delà de la référence d'avant test, par session active
+            "rss_kb_per_session": round(max(0, rss - self.baseline_rss) / 1024 / active, 1) if active else None
+        }
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Exécuter la rampe
+
+        Returns:
+            dict: Paliers mesurés et point de saturation
+        """
+        self.baseline_rss = _rss_bytes()
+        steps = []
+        for load, duration_s in self.ramp:
+            step = self._run_step(load, duration_s)
+            steps.append(step)
+            print(f"[{self.model}] charge={load:g} débit={step['throughput_tps']}/s "
+                  f"p95={step['p95_ms']} ms sessions={step['active_sessions']} cpu={step['cpu_cores']}")
+
+        for user in self.users:
+            user.stop.set()
+
+        return {
+            "model": self.model,
+            "baseline_rss_mb": round(self.baseline_rss / 2 ** 20, 1),
+            "slo_p95_ms": self.args.slo_p95_ms,
+            "steps": steps,
+            "saturation": find_saturation(steps, self.args.slo_p95_ms)
+        }
+
+
+def find_saturation(steps: List[Dict[str, Any]], slo_p95_ms: float) -> Dict[str, Any]:
+    """
+    Détecter le point de saturation
+
+    Premier palier où le p95 dépasse le SLO, ou où le débit ne progresse plus
+    (<5 % de gain pour une charge en hausse): la capacité est la charge du palier précédent.
+
+    Args:
+        steps: Paliers mesurés (charge croissante)
+        slo_p95_ms: Latence p95 maximale acceptable
+
+    Returns:
+        dict: saturated_at, reason, capacity
+    """
+    for previous, step in zip([None] + steps[:-1], steps):
+        if step["p95_ms"] is not None and step["p95_ms"] > slo_p95_ms:
+            reason = f"p95 {step['p95_ms']} ms > SLO {slo_p95_ms} ms"
+        elif (previous and previous["throughput_tps"] and step["load"] > previous["load"]
+              and step["throughput_tps"] < previous["throughput_tps"] * 1.05):
+            reason = "débit plafonné"
+        else:
+            continue
+        return {
+            "saturated_at": step["load"],
+            "reason": reason,
+            "capacity": previous["load"] if previous else None
+        }
+    return {"saturated_at": None, "reason": "non atteinte", "capacity": steps[-1]["load"] if steps else None}
+
+
+def parse_ramp(spec: str) -> List[Tuple[float, float]]:
+    """Parser une rampe 'charge:durée,charge:durée'"""
+    ramp = []
+    for step in spec.split(','):
+        load, _, duration = step.partition(':')
+        ramp.append((float(load), float(duration or 30)))
+    return ramp
+
+
+def write_curves(report: Dict[str, Any], output: str) -> None:
+    """Écrire le rapport JSON et les courbes CSV (un palier par ligne)"""
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    with open(os.path.splitext(output)[0] + '.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(report["steps"][0]))
+        writer.writeheader()
+        writer.writerows(report["steps"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge Tennis AI (stand-ins locaux)")
+    parser.add_argument("model", choices=["closed", "open"], help="Modèle de charge")
+    parser.add_argument("--ramp", default="5:20,10:20,20:20,40:20",
+                        help="Paliers charge:durée_s (utilisateurs en closed, sessions/s en open)")
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="Facteur appliqué aux temps de réflexion (1 = temps réel)")
+    parser.add_argument("--slo-p95-ms", type=float, default=2000.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=400.0)
+    parser.add_argument("--llm-sigma", type=float, default=0.35)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=120.0)
+    parser.add_argument("--llm-output-tokens", type=int, default=40)
+    parser.add_argument("--bedrock-concurrency", type=int, default=32,
+                        help="Appels Bedrock simultanés servis par le stand-in (quota simulé)")
+    parser.add_argument("--tts", action="store_true", help="Synthétiser chaque réponse (stand-in Polly)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="sessions/loadtest/report.json")
+    args = parser.parse_args()
+
+    report = LoadTest(args.model, parse_ramp(args.ramp), args).run()
+    write_curves(report, args.output)
+    print(json.dumps(report["saturation"], ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
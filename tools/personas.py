@@ -0,0 +1,133 @@
+"""
+Personas scriptés pour les simulations d'onboarding
+Réponses tirées des parcours débutant / intermédiaire / avancé / coach
+"""
+
+from typing import Dict, List
+
+
+PERSONAS: Dict[str, Dict] = {
+    "debutant": {
+        "user_type": "player",
+        "language": "fr",
+        "answers": [
+            "Salut, je m'appelle Léa et j'ai 24 ans.",
+            "Je suis droitière.",
+            "Je débute, je joue depuis 2 mois.",
+            "Je veux apprendre les bases et réussir à faire des échanges.",
+            "Pas de blessure.",
+            "J'ai un téléphone et un petit trépied.",
+            "Je le mets au fond du court, derrière moi.",
+            "C'est bon, je me vois en entier sur l'écran.",
+            "Le cadrage est validé.",
+            "J'ai activé le mode mains libres.",
+            "La calibration est terminée.",
+            "Je filme 6 coups droits.",
+            "J'ajoute un angle de côté.",
+            "Les vidéos sont envoyées.",
+            "D'accord, je regarde l'analyse.",
+            "Ma position de pieds est trop serrée ?",
+            "Ok, je suis débutante alors.",
+            "Ça me va comme niveau.",
+            "Oui, je veux un programme.",
+            "10 minutes par jour, c'est possible.",
+            "Ça me plaît, on commence demain.",
+            "Je veux voir l'offre premium.",
+            "Non merci, plus tard.",
+            "Merci, à demain !",
+        ],
+    },
+    "intermediaire": {
+        "user_type": "player",
+        "language": "fr",
+        "answers": [
+            "Thomas, 31 ans.",
+            "Gaucher.",
+            "Je joue en club depuis 6 ans, classé 30/1.",
+            "Je veux améliorer mon service, trop de doubles fautes.",
+            "Petite gêne à l'épaule l'an dernier, rien aujourd'hui.",
+            "Téléphone sur trépied, je peux régler la hauteur.",
+            "Côté latéral, à 4 mètres de la ligne de fond.",
+            "Je suis bien dans le cadre.",
+            "Validé.",
+            "Mode mains libres activé.",
+            "Calibration faite.",
+            "J'envoie 2 services.",
+            "Et 2 coups droits en plus.",
+            "C'est envoyé.",
+            "Mon timing d'impact est tardif ?",
+            "Ok pour la rotation épaule.",
+            "Intermédiaire-avancé, ça me paraît juste.",
+            "Oui.",
+            "Propose-moi des drills pour le service.",
+            "3 séances de 20 minutes par semaine.",
+            "Parfait.",
+            "Qu'est-ce qu'il y a dans le premium ?",
+            "Je vais essayer l'essai gratuit.",
+            "Merci !",
+        ],
+    },
+    "avance": {
+        "user_type": "player",
+        "language": "fr",
+        "answers": [
+            "Inès, 19 ans, compétitrice.",
+            "Droitière, revers à deux mains.",
+            "Classée 15/1, je fais des tournois chaque mois.",
+            "Gagner en vitesse de service et en régularité du revers.",
+            "Aucune blessure.",
+            "Deux téléphones sur trépieds, angles frontal et latéral.",
+            "À hauteur de hanche, 5 mètres derrière la ligne de fond.",
+            "Les deux angles sont cadrés.",
+            "OK.",
+            "Mains libres activé.",
+            "Calibration terminée sur les deux caméras.",
+            "7 services filmés.",
+            "Et 5 revers.",
+            "Tout est envoyé.",
+            "Montre-moi les métriques détaillées.",
+            "La rotation du buste est en retard, je vois.",
+            "Avancée, oui.",
+            "Je confirme.",
+            "Je veux un programme de compétition.",
+            "45 minutes, 4 fois par semaine.",
+            "Valide le programme.",
+            "Le premium m'intéresse pour l'analyse match.",
+            "Je m'abonne.",
+            "Merci, à la prochaine séance.",
+        ],
+    },
+    "coach": {
+        "user_type": "coach",
+        "language": "fr",
+        "answers": [
+            "Marc Dupuis, TC Lyon.",
+            "Je suis moniteur DE, responsable de l'école de tennis.",
+            "J'entraîne 30 élèves, surtout des ados.",
+            "Je préfère des feedbacks courts et des drills simples.",
+            "Une erreur à la fois, oui.",
+            "Comment j'invite mes élèves ?",
+            "Envoie-moi les codes d'invitation.",
+            "C'est partagé au groupe.",
+            "Caméra fixée au grillage, derrière le court 3.",
+            "Hauteur 2 mètres environ.",
+            "Le cadrage couvre tout le court.",
+            "Validé.",
+            "Montre-moi la démo sur plusieurs élèves.",
+            "Ok, 3 élèves analysés en même temps.",
+            "Fais la synthèse des priorités.",
+            "Le service revient souvent, oui.",
+            "Génère un micro-programme 2 semaines.",
+            "Pour le toss au service.",
+            "Parfait.",
+            "Montre-moi le dashboard.",
+            "Les alertes IA sont claires.",
+            "Merci, on démarre lundi.",
+        ],
+    },
+}
+
+
+def get_persona_names() -> List[str]:
+    """Noms des personas disponibles"""
+    return list(PERSONAS)
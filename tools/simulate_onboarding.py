@@ -0,0 +1,362 @@
+"""
+Runner de simulations d'onboarding Tennis AI
+Fait avancer de nombreuses sessions scriptées en parallèle (lockstep) pour régler prompts et étapes
+
+Usage:
+    python -m tools.simulate_onboarding --repeat 10 --concurrency 8
+    python -m tools.simulate_onboarding --repeat 50 --batch-input-s3 s3://bucket/in \\
+        --batch-output-s3 s3://bucket/out --batch-role-arn arn:aws:iam::123:role/bedrock-batch
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Ajouter le répertoire parent au path pour importer les modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.onboarding_agent import OnboardingAgent
+from api.bedrock_client import BedrockClient
+from tools.personas import PERSONAS
+
+
+class SimulatedSession:
+    """Session d'onboarding pilotée par un persona scripté"""
+
+    def __init__(self, session_id: str, persona: str, bedrock: BedrockClient):
+        """
+        Initialiser la session
+
+        Args:
+            session_id: Identifiant unique
+            persona: Nom du persona (voir `tools.personas.PERSONAS`)
+            bedrock: Client Bedrock partagé
+        """
+        config = PERSONAS[persona]
+        self.session_id = session_id
+        self.persona = persona
+        self.answers = config["answers"]
+        self.agent = OnboardingAgent(
+            user_type=config["user_type"],
+            language=config["language"],
+            bedrock=bedrock
+        )
+        self.agent.start_conversation()
+        self.turn = 0
+        self.turns: List[Dict[str, Any]] = []
+        self.errors = 0
+
+    @property
+    def done(self) -> bool:
+        """Script épuisé ou onboarding terminé"""
+        return self.turn >= len(self.answers) or self.agent.get_current_stage() == "terminé"
+
+    def next_answer(self) -> str:
+        """Prochaine réponse scriptée"""
+        return self.answers[self.turn]
+
+    def record(self, stage: str, latency_ms: Optional[float], ok: bool, output_tokens: Optional[int] = None) -> None:
+        """Enregistrer les métriques du tour courant et avancer le script"""
+        self.turns.append({"stage": stage, "latency_ms": latency_ms, "ok": ok, "output_tokens": output_tokens})
+        if not ok:
+            self.errors += 1
+        self.turn += 1
+
+    def to_checkpoint(self) -> Dict[str, Any]:
+        """État sérialisable de la session"""
+        return {
+            "session_id": self.session_id,
+            "persona": self.persona,
+            "turn": self.turn,
+            "turns": self.turns,
+            "errors": self.errors,
+            "agent": self.agent.to_state()
+        }
+
+    @classmethod
+    def from_checkpoint(cls, data: Dict[str, Any], bedrock: BedrockClient) -> 'SimulatedSession':
+        """Restaurer une session depuis `to_checkpoint`"""
+        session = cls.__new__(cls)
+        session.session_id = data["session_id"]
+        session.persona = data["persona"]
+        session.answers = PERSONAS[data["persona"]]["answers"]
+        session.turn = data["turn"]
+        session.turns = data["turns"]
+        session.errors = data["errors"]
+        # Profil (niveau estimé, programme...) et session_id de l'agent inclus dans l'état
+        session.agent = OnboardingAgent.from_state(data["agent"], bedrock=bedrock)
+        return session
+
+
+class SimulationRunner:
+    """Exécute les sessions en lockstep avec un pool borné et des checkpoints"""
+
+    def __init__(
+        self,
+        personas: List[str],
+        repeat: int,
+        output_dir: str,
+        bedrock: BedrockClient,
+        concurrency: int = 8,
+        batch_config: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialiser le runner
+
+        Args:
+            personas: Personas à simuler
+            repeat: Nombre de sessions par persona
+            output_dir: Dossier du run (checkpoint, rapport, transcripts)
+            bedrock: Client Bedrock partagé
+            concurrency: Nombre max d'appels Bedrock simultanés
+            batch_config: input_s3_uri / output_s3_uri / role_arn pour le mode batch (optionnel)
+        """
+        self.output_dir = output_dir
+        self.bedrock = bedrock
+        self.concurrency = concurrency
+        self.batch_config = batch_config
+        self.checkpoint_path = os.path.join(output_dir, "checkpoint.json")
+        self.round = 0
+        self.elapsed_s = 0.0
+
+        if os.path.exists(self.checkpoint_path):
+            self._load_checkpoint()
+        else:
+            self.sessions = [
+                SimulatedSession(f"{persona}-{i:04d}", persona, bedrock)
+                for persona in personas
+                for i in range(repeat)
+            ]
+
+    # ==================== CHECKPOINTS ====================
+
+    def _load_checkpoint(self) -> None:
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.round = data["round"]
+        self.elapsed_s = data["elapsed_s"]
+        self.sessions = [SimulatedSession.from_checkpoint(s, self.bedrock) for s in data["sessions"]]
+        print(f"Reprise du checkpoint: round {self.round}, {len(self.sessions)} sessions")
+
+    def _save_checkpoint(self) -> None:
+        data = {
+            "round": self.round,
+            "elapsed_s": self.elapsed_s,
+            "sessions": [s.to_checkpoint() for s in self.sessions]
+        }
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        # Écriture atomique: un crash ne laisse jamais un checkpoint tronqué
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # ==================== ROUNDS ====================
+
+    def _step_online(self, session: SimulatedSession) -> None:
+        """Jouer un tour via l'API Bedrock synchrone"""
+        answer = session.next_answer()
+        stage = session.agent.get_current_stage()
+        request = session.agent.begin_turn(answer)
+        start = time.perf_counter()
+        try:
+            # Priorité 'batch': une simulation ne passe jamais devant les utilisateurs réels
+            response, usage = self.bedrock.chat_with_usage(
+                **request, priority='batch', session_id=session.session_id
+            )
+            latency_ms = (time.perf_counter() - start) * 1000
+            session.agent.complete_turn(answer, response, usage, latency_ms)
+            session.record(stage, latency_ms, True, usage.get("output_tokens"))
+        except Exception as e:
+            session.agent.fail_turn(answer, e)
+            session.record(stage, (time.perf_counter() - start) * 1000, False)
+
+    def _run_online_round(self, active: List[SimulatedSession]) -> None:
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            list(pool.map(self._step_online, active))
+
+    def _run_batch_round(self, active: List[SimulatedSession]) -> None:
+        """Soumettre le même tour de toutes les sessions actives en un job batch"""
+        requests = {}
+        for session in active:
+            answer = session.next_answer()
+            request = session.agent.begin_turn(answer)
+            requests[session.session_id] = (session.agent.get_current_stage(), answer,
+                                            BedrockClient.build_request_body(**request))
+
+        job_name = f"tennis-ai-sim-{os.path.basename(self.output_dir)}-r{self.round:03d}"
+        records = {sid: body for sid, (_, _, body) in requests.items()}
+        job_arn = self.bedrock.submit_batch(
+            records,
+            self.batch_config["input_s3_uri"],
+            self.batch_config["output_s3_uri"],
+            self.batch_config["role_arn"],
+            job_name
+        )
+        print(f"  Job batch soumis: {job_arn}")
+        start = time.perf_counter()
+        try:
+            status = self.bedrock.wait_batch(job_arn, timeout_s=self.batch_config.get("timeout_s", 24 * 3600))
+            results = self.bedrock.read_batch_results(job_arn, self.batch_config["output_s3_uri"])
+        except TimeoutError as e:
+            print(f"  {e}")
+            status, results = "Timeout", {}
+        # Latence vue par chaque session: durée du job, de la soumission aux résultats
+        latency_ms = (time.perf_counter() - start) * 1000
+        print(f"  Job batch {status}: {len(results)}/{len(records)} réponses")
+
+        for session in active:
+            stage, answer, _ = requests[session.session_id]
+            result = results.get(session.session_id)
+            if result is not None:
+                response, usage = result
+                session.agent.complete_turn(answer, response, usage, latency_ms)
+                session.record(stage, latency_ms, True, usage.get("output_tokens"))
+            else:
+                session.agent.fail_turn(answer, Exception(f"batch {status}"))
+                session.record(stage, latency_ms, False)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Exécuter toutes les sessions jusqu'à la fin de leur script
+
+        Returns:
+            dict: Rapport agrégé (également écrit dans report.json)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        while True:
+            active = [s for s in self.sessions if not s.done]
+            if not active:
+                break
+
+            start = time.perf_counter()
+            use_batch = self.batch_config and len(active) >= BedrockClient.BATCH_MIN_RECORDS
+            if use_batch:
+                self._run_batch_round(active)
+            else:
+                self._run_online_round(active)
+            self.elapsed_s += time.perf_counter() - start
+            self.round += 1
+
+            self._save_checkpoint()
+            print(f"Round {self.round}: {len(active)} sessions actives "
+                  f"({'batch' if use_batch else 'online'}, {time.perf_counter() - start:.1f}s)")
+
+        for session in self.sessions:
+            session.agent.save_session(os.path.join(self.output_dir, "transcripts", f"{session.session_id}.json"))
+
+        report = self.build_report()
+        with open(os.path.join(self.output_dir, "report.json"), 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    # ==================== RAPPORT ====================
+
+    def build_report(self) -> Dict[str, Any]:
+        """Agréger complétion des étapes et latences par persona et par étape"""
+        personas: Dict[str, Dict[str, Any]] = {}
+        stage_latencies: Dict[str, List[float]] = {}
+        stage_turns: Dict[str, int] = {}
+        stage_tokens: Dict[str, List[int]] = {}
+
+        for session in self.sessions:
+            entry = personas.setdefault(session.persona, {
+                "sessions": 0, "completed": 0, "errors": 0, "final_stages": {}
+            })
+            final_stage = session.agent.get_current_stage()
+            entry["sessions"] += 1
+            entry["errors"] += session.errors
+            entry["completed"] += final_stage == "terminé"
+            entry["final_stages"][final_stage] = entry["final_stages"].get(final_stage, 0) + 1
+
+            for turn in session.turns:
+                stage_turns[turn["stage"]] = stage_turns.get(turn["stage"], 0) + 1
+                if turn["ok"] and turn["latency_ms"] is not None:
+                    stage_latencies.setdefault(turn["stage"], []).append(turn["latency_ms"])
+                if turn.get("output_tokens") is not None:
+                    stage_tokens.setdefault(turn["stage"], []).append(turn["output_tokens"])
+
+        for entry in personas.values():
+            entry["completion_rate"] = round(entry["completed"] / entry["sessions"], 3)
+
+        stages = {}
+        for stage, count in stage_turns.items():
+            latencies = sorted(stage_latencies.get(stage, []))
+            tokens = stage_tokens.get(stage)
+            stages[stage] = {
+                "turns": count,
+                "avg_output_tokens": round(statistics.fmean(tokens), 1) if tokens else None,
+                **_latency_summary(latencies)
+            }
+
+        all_latencies = sorted(l for values in stage_latencies.values() for l in values)
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "rounds": self.round,
+            "elapsed_s": round(self.elapsed_s, 2),
+            "sessions": len(self.sessions),
+            "latency": _latency_summary(all_latencies),
+            "personas": personas,
+            "stages": stages
+        }
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/moyenne d'une liste triée de latences (ms)"""
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "mean_ms": None}
+    return {
+        "p50_ms": round(latencies[len(latencies) // 2], 1),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+        "mean_ms": round(statistics.fmean(latencies), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulations d'onboarding Tennis AI")
+    parser.add_argument("--personas", nargs="+", default=list(PERSONAS), choices=list(PERSONAS))
+    parser.add_argument("--repeat", type=int, default=5, help="Sessions par persona")
+    parser.add_argument("--concurrency", type=int, default=8, help="Appels Bedrock simultanés")
+    parser.add_argument("--run-name", default=datetime.now().strftime("%Y%m%d_%H%M%S"),
+                        help="Nom du run (réutiliser pour reprendre depuis le checkpoint)")
+    parser.add_argument("--output-dir", default="sessions/simulations")
+    parser.add_argument("--region", default=os.getenv("AWS_REGION", "eu-west-1"))
+    parser.add_argument("--model-id", default="anthropic.claude-3-haiku-20240307-v1:0")
+    parser.add_argument("--batch-input-s3", help="Préfixe S3 d'entrée (active le mode batch)")
+    parser.add_argument("--batch-output-s3", help="Préfixe S3 de sortie du mode batch")
+    parser.add_argument("--batch-role-arn", help="Rôle IAM du job batch")
+    parser.add_argument("--batch-timeout", type=float, default=24 * 3600,
+                        help="Attente max d'un job batch en secondes (job arrêté au-delà)")
+    args = parser.parse_args()
+
+    batch_config = None
+    if args.batch_input_s3:
+        if not (args.batch_output_s3 and args.batch_role_arn):
+            parser.error("--batch-input-s3 requiert --batch-output-s3 et --batch-role-arn")
+        batch_config = {
+            "input_s3_uri": args.batch_input_s3,
+            "output_s3_uri": args.batch_output_s3,
+            "role_arn": args.batch_role_arn,
+            "timeout_s": args.batch_timeout
+        }
+
+    runner = SimulationRunner(
+        personas=args.personas,
+        repeat=args.repeat,
+        output_dir=os.path.join(args.output_dir, args.run_name),
+        bedrock=BedrockClient(region=args.region, model_id=args.model_id),
+        concurrency=args.concurrency,
+        batch_config=batch_config
+    )
+    report = runner.run()
+    print(json.dumps({k: report[k] for k in ("sessions", "rounds", "elapsed_s", "latency")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Programmes d'entraînement Tennis AI (catalogue de drills, assemblage local)
+"""
+
+from .program_builder import DrillCatalog, ProgramBuilder, get_program_builder, parse_constraints
+
+__all__ = ['DrillCatalog', 'ProgramBuilder', 'get_program_builder', 'parse_constraints']
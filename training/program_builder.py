@@ -0,0 +1,354 @@
+"""
+Programmes d'entrée Tennis AI (étape proposition_programme)
+Assemblage local par satisfaction de contraintes sur le catalogue de drills, mémoïsé par signature
+
+Le modèle ne fait plus que formuler le message: les drills, durées et la progression
+viennent de `training/drills.json`.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from itertools import combinations
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'drills.json')
+
+# Vocabulaire des parcours (posture, contact, suivi...) -> identifiants d'erreur des métriques
+ERROR_ALIASES = {
+    'posture': 'stance', 'appuis': 'stance', 'position': 'stance',
+    'préparation': 'preparation', 'preparation_geste': 'preparation', 'préparation_geste': 'preparation',
+    'contact': 'contact_point', 'impact': 'contact_point',
+    'suivi': 'follow_through', 'fin_de_geste': 'follow_through',
+    'rotation': 'body_rotation', 'hip_rotation': 'body_rotation',
+    'prise': 'grip'
+}
+
+# Compétence de départ quand aucune erreur n'a été détectée (le parcours débutant commence par la posture)
+DEFAULT_ERRORS = {'débutant': 'stance', 'intermédiaire': 'timing', 'avancé': 'timing'}
+
+_MINUTES = re.compile(r'(?<![\w.,])(\d{1,3})\s*(?:min|minutes?|mn)\b', re.IGNORECASE)
+# Durées "1h", "1,5 heure", "1h30", "1 h 30 min"
+_HOURS = re.compile(
+    r'(?<![\w.,])(\d{1,2}(?:[.,]\d+)?)\s*(?:heures?|hours?|hrs?|h)(?:\s*(\d{2})\s*(?:min(?:utes?)?|mn)?)?(?!\w)',
+    re.IGNORECASE
+)
+# Heure d'horloge ("mardi à 18h", "vers 9h30"), jamais une durée
+_CLOCK_PREFIX = re.compile(r"(?:\b(?:à|vers|dès|jusqu'à|at|around|until|from)\s*)$", re.IGNORECASE)
+_MAX_SESSION_HOURS = 4
+_EQUIPMENT_WORDS = {
+    'panier': ('panier', 'basket'),
+    'plots': ('plot', 'cône', 'cone', 'coupelle'),
+    'mur': ('mur', 'wall'),
+    'partenaire': ('partenaire', 'partner', 'copain', 'copine', 'avec un ami', 'avec une amie'),
+    'lance_balles': ('lance-balles', 'lance balles', 'ball machine', 'machine'),
+    'trepied': ('trépied', 'trepied', 'tripod')
+}
+
+
+_EQUIPMENT_PATTERNS = {
+    item: re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in words) + r')s?\b', re.IGNORECASE)
+    for item, words in _EQUIPMENT_WORDS.items()
+}
+
+
+def _session_hours(text: str) -> Optional[int]:
+    """Première durée exprimée en heures (en minutes), heures d'horloge ignorées"""
+    for match in _HOURS.finditer(text):
+        hours = float(match.group(1).replace(',', '.'))
+        extra = int(match.group(2)) if match.group(2) else 0
+        if hours > _MAX_SESSION_HOURS or extra >= 60 or _CLOCK_PREFIX.search(text, 0, match.start()):
+            continue
+        return int(hours * 60) + extra
+    return None
+
+
+def parse_constraints(text: str) -> Dict[str, Any]:
+    """
+    Extraire matériel disponible et durée de séance du texte libre du joueur
+
+    Args:
+        text: Messages du joueur concaténés
+
+    Returns:
+        dict: equipment (set, 'balles' toujours inclus), session_minutes (None si non mentionné)
+    """
+    equipment = {'balles'}
+    for item, pattern in _EQUIPMENT_PATTERNS.items():
+        if pattern.search(text):
+            equipment.add(item)
+
+    minutes = _session_hours(text)
+    if minutes is None:
+        match = _MINUTES.search(text)
+        if match:
+            minutes = int(match.group(1))
+    return {'equipment': equipment, 'session_minutes': minutes}
+
+
+class DrillCatalog:
+    """Catalogue de drills indexé par (niveau, phase) et (niveau, phase, erreur ciblée)"""
+
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        """
+        Charger et indexer le catalogue
+
+        Args:
+            path: Fichier JSON du catalogue
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.version = data['version']
+        self.phases: List[str] = data['phases']
+        self.errors: List[str] = data['errors']
+        self.drills: Dict[str, Dict[str, Any]] = {}
+        self._by_phase: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._by_target: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+
+        for drill in data['drills']:
+            drill['equipment'] = frozenset(drill['equipment'])
+            self.drills[drill['id']] = drill
+            for level in drill['levels']:
+                self._by_phase.setdefault((level, drill['phase']), []).append(drill)
+                for target in drill['targets']:
+                    self._by_target.setdefault((level, drill['phase'], target), []).append(drill)
+
+    def candidates(self, level: str, phase: str, equipment: FrozenSet[str],
+                   target: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Drills utilisables (niveau, phase, matériel disponible, erreur ciblée optionnelle)
+
+        Returns:
+            list: Drills du catalogue (ne pas modifier)
+        """
+        pool = self._by_target.get((level, phase, target), []) if target else self._by_phase.get((level, phase), [])
+        return [drill for drill in pool if drill['equipment'] <= equipment]
+
+
+class ProgramBuilder:
+    """Assembleur de programmes d'entrée avec cache par signature d'entrée"""
+
+    # Séances proposées pour la première semaine
+    SESSIONS = 3
+    MAX_ENTRIES = 1024
+
+    # Remplissage minimum de la durée demandée
+    MIN_FILL = 0.75
+
+    # Séries supplémentaires: un drill technique / d'application peut durer jusqu'à x2
+    MAX_STRETCH = 2
+
+    # Variété entre séances: chaque drill technique / d'application déjà proposé coûte
+    # l'équivalent de ces minutes de remplissage (échauffement et retour au calme peuvent revenir)
+    REPEAT_PENALTY_MIN = 10
+
+    def __init__(self, catalog: Optional[DrillCatalog] = None):
+        """
+        Initialiser l'assembleur
+
+        Args:
+            catalog: Catalogue (défaut: `training/drills.json`)
+        """
+        self.catalog = catalog or DrillCatalog()
+        self._programs: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_error(error: Optional[str], level: str) -> str:
+        """Identifiant d'erreur canonique (alias des parcours acceptés)"""
+        if not error:
+            return DEFAULT_ERRORS.get(level, 'stance')
+        error = error.lower().replace(' ', '_')
+        return ERROR_ALIASES.get(error, error)
+
+    def signature(self, level: str, primary_error: Optional[str], equipment: Iterable[str],
+                  session_minutes: Optional[int], language: str = 'fr') -> tuple:
+        """
+        Signature d'entrée normalisée (clé de cache)
+
+        La durée est arrondie à 5 minutes (bornée à 10-120) pour que des profils
+        équivalents partagent le même programme.
+        """
+        minutes = min(120, max(10, 5 * round((session_minutes or 30) / 5)))
+        return (level, self.normalize_error(primary_error, level), frozenset(equipment) | {'balles'},
+                minutes, language)
+
+    def build(self, level: str, primary_error: Optional[str] = None, equipment: Iterable[str] = (),
+              session_minutes: Optional[int] = None, language: str = 'fr') -> Dict[str, Any]:
+        """
+        Construire (ou relire du cache) le programme d'entrée
+
+        Args:
+            level: 'débutant', 'intermédiaire' ou 'avancé'
+            primary_error: Erreur principale (identifiant de métrique ou alias des parcours)
+            equipment: Matériel disponible
+            session_minutes: Durée d'une séance
+            language: Langue des intitulés ('fr' ou 'en')
+
+        Returns:
+            dict: focus, minutes, sessions (drills par séance), feasible, relaxed, cached
+                  (partagé avec le cache: ne pas modifier)
+        """
+        key = self.signature(level, primary_error, equipment, session_minutes, language)
+        with self._lock:
+            program = self._programs.get(key)
+            if program is not None:
+                self._programs.move_to_end(key)
+                self.hits += 1
+        if program is None:
+            program = self._solve(*key)
+            with self._lock:
+                self.misses += 1
+                self._programs[key] = program
+                while len(self._programs) > self.MAX_ENTRIES:
+                    self._programs.popitem(last=False)
+            return dict(program, cached=False)
+        return dict(program, cached=True)
+
+    # ==================== CONTRAINTES ====================
+
+    def _solve(self, level: str, error: str, equipment: FrozenSet[str], minutes: int,
+               language: str) -> Dict[str, Any]:
+        """Assembler les séances, en relâchant les contraintes souples si nécessaire"""
+        sessions = []
+        relaxed = set()
+        used: FrozenSet[str] = frozenset()
+        for _ in range(self.SESSIONS):
+            plan, relaxations = self._solve_session(level, error, equipment, minutes, used)
+            if plan is None:
+                break
+            relaxed.update(relaxations)
+            sessions.append(self._stretch(plan, minutes))
+            used |= {drill['id'] for drill in plan if drill['phase'] in ('technique', 'application')}
+
+        name = 'fr' if language == 'fr' else 'en'
+        return {
+            'focus': error,
+            'level': level,
+            'minutes': minutes,
+            'feasible': bool(sessions),
+            'relaxed': sorted(relaxed),
+            'catalog_version': self.catalog.version,
+            'sessions': [
+                {
+                    'minutes': sum(duration for _, duration in plan),
+                    'drills': [
+                        {'id': drill['id'], 'name': drill[name], 'phase': drill['phase'], 'minutes': duration}
+                        for drill, duration in plan
+                    ]
+                }
+                for plan in sessions
+            ]
+        }
+
+    def _solve_session(self, level: str, error: str, equipment: FrozenSet[str], minutes: int,
+                       used: FrozenSet[str]):
+        """
+        Une séance: échauffement, 1-2 drills techniques sur l'erreur, application, retour au calme
+
+        Contraintes dures: niveau, matériel, technique ciblée sur l'erreur principale uniquement
+        (une seule erreur à la fois), durée <= demandée. La variété entre séances est une
+        pénalité (drills technique / application de `used`), pas une contrainte. Contraintes
+        relâchées dans l'ordre si aucune solution: application ciblée, remplissage minimum,
+        échauffement / retour au calme, puis application (séances très courtes: technique seule).
+        """
+        relaxation_steps = (
+            (),
+            ('application_libre',),
+            ('application_libre', 'remplissage'),
+            ('application_libre', 'remplissage', 'sans_encadrement'),
+            ('application_libre', 'remplissage', 'sans_encadrement', 'technique_seule')
+        )
+        technique = self.catalog.candidates(level, 'technique', equipment, error)
+        if not technique:
+            return None, ()
+
+        for relaxations in relaxation_steps:
+            if 'technique_seule' in relaxations:
+                application = [None]
+            else:
+                application = self.catalog.candidates(
+                    level, 'application', equipment, None if 'application_libre' in relaxations else error
+                )
+            if 'sans_encadrement' in relaxations:
+                warmups, cooldowns = [None], [None]
+            else:
+                warmups = self.catalog.candidates(level, 'echauffement', equipment)
+                cooldowns = self.catalog.candidates(level, 'retour_au_calme', equipment)
+            low = 0 if 'remplissage' in relaxations else self.MIN_FILL * minutes
+
+            plan = self._search(technique, application, warmups, cooldowns, error, minutes, low, used)
+            if plan is not None:
+                return plan, relaxations
+        return None, ()
+
+    @classmethod
+    def _stretch(cls, plan: List[Dict[str, Any]], minutes: int) -> List[Tuple[Dict[str, Any], int]]:
+        """Répartir le temps restant en séries supplémentaires sur les drills technique / application"""
+        durations = [drill['minutes'] for drill in plan]
+        spare = minutes - sum(durations)
+        for i, drill in enumerate(plan):
+            if spare <= 0:
+                break
+            if drill['phase'] in ('technique', 'application'):
+                extra = min(spare, (cls.MAX_STRETCH - 1) * drill['minutes'])
+                durations[i] += extra
+                spare -= extra
+        return list(zip(plan, durations))
+
+    @classmethod
+    def _search(cls, technique, application, warmups, cooldowns, error, minutes, low, used):
+        """Recherche exhaustive avec élagage sur la durée; meilleure solution par score"""
+        best, best_score = None, None
+        technique_sets = [(drill,) for drill in technique] + list(combinations(technique, 2))
+        for techniques in technique_sets:
+            base = sum(drill['minutes'] for drill in techniques)
+            if base > minutes:
+                continue
+            repeats = sum(drill['id'] in used for drill in techniques)
+            for app in application:
+                with_app = base + (app['minutes'] if app else 0)
+                if with_app > minutes:
+                    continue
+                penalty = cls.REPEAT_PENALTY_MIN * (repeats + int(app is not None and app['id'] in used))
+                for warmup in warmups:
+                    with_warmup = with_app + (warmup['minutes'] if warmup else 0)
+                    if with_warmup > minutes:
+                        continue
+                    for cooldown in cooldowns:
+                        total = with_warmup + (cooldown['minutes'] if cooldown else 0)
+                        # Durée atteignable avec les séries supplémentaires (voir `_stretch`)
+                        filled = min(minutes, total + (cls.MAX_STRETCH - 1) * with_app)
+                        if total > minutes or filled < low:
+                            continue
+                        plan = [d for d in (warmup, *techniques, app, cooldown) if d is not None]
+                        # Score: durée remplie moins les répétitions d'une séance à l'autre, puis
+                        # drills distincts plutôt que répétés, puis échauffement en lien avec l'erreur
+                        score = (filled - penalty, total, int(bool(warmup) and error in warmup['targets']),
+                                 -len(plan))
+                        if best_score is None or score > best_score:
+                            best, best_score = plan, score
+        return best
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs du cache de programmes"""
+        with self._lock:
+            return {'entries': len(self._programs), 'hits': self.hits, 'misses': self.misses}
+
+
+_default: Optional[ProgramBuilder] = None
+_default_lock = threading.Lock()
+
+
+def get_program_builder() -> ProgramBuilder:
+    """Assembleur partagé par le processus (catalogue indexé une fois, cache commun)"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ProgramBuilder()
+        return _default